@@ -1,6 +1,24 @@
 import streamlit as st
 import base64
-from gemini_backend import analyze_resume, suggest_improvements, find_jobs
+import time
+import uuid
+from datetime import date
+from gemini_backend import (get_cached_analysis, analysis_cache, extract_listings,
+                            suggest_improvements_stream, job_search_cache, single_flight, warm_up)
+from job_cache import clean_job_title
+from batch import analyze_batch, rank_results, results_to_csv
+from config import (BATCH_WORKERS, ONE_SHOT_ANALYSIS, METRICS_PORT, JOB_POLL_INTERVAL, STRUCTURED_JOBS,
+                    DEFAULT_TENANT)
+from metrics import APP_RERUNS, start_metrics_server
+from text_extraction import payload_log
+from preprocess import check_upload, preprocess_log, UploadRejected
+from templates import TEMPLATES
+from pdf_export import available_renderer, export_batch, pdfs_to_zip
+from candidate_store import candidate_store, candidate_key, CANDIDATE_COLUMNS
+from job_queue import job_queue, start_workers
+from job_ingest import job_store, ingest, normalize_url, parse_posted
+from scheduler import set_tenant, tenant_scope
+from derived import resume_artifacts
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -193,16 +211,53 @@ if 'page' not in st.session_state:
     st.session_state.page = 'HOME'
 if 'resume_data' not in st.session_state:
     st.session_state.resume_data = None
-if 'improvements' not in st.session_state:
-    st.session_state.improvements = []
+if 'derived' not in st.session_state:
+    # Improvements, rendered templates, rankings... recomputed only when the resume_data fields they use change
+    st.session_state.derived = resume_artifacts()
 if 'job_results' not in st.session_state:
     st.session_state.job_results = None
+if 'local_jobs' not in st.session_state:
+    st.session_state.local_jobs = None
 if 'show_success_message' not in st.session_state:
     st.session_state.show_success_message = False
+if 'analysis_job' not in st.session_state:
+    st.session_state.analysis_job = None
+if 'analysis_error' not in st.session_state:
+    st.session_state.analysis_error = False
+if 'tenant_id' not in st.session_state:
+    st.session_state.tenant_id = f"session-{uuid.uuid4().hex[:12]}"
+
+# Every backend call in this run is budgeted and fair-queued as this session
+set_tenant(st.session_state.tenant_id)
+derived = st.session_state.derived
+
+def load_resume(result):
+    # One-shot analyses and saved candidates already carry improvements for their weaknesses
+    st.session_state.resume_data = result
+    if result and result.get('improvements'):
+        derived.put('improvements', result, result['improvements'])
+
+# --- Background Analysis ---
+# Analyses run on queue workers; the session only keeps the job id, so reruns
+# and page switches never throw away a call in progress.
+start_workers()
+if st.session_state.analysis_job:
+    finished_job = job_queue.get(st.session_state.analysis_job)
+    if finished_job is None or finished_job['status'] in ('done', 'failed'):
+        st.session_state.analysis_job = None
+        if finished_job and finished_job['status'] == 'done':
+            load_resume(finished_job['result'])
+        else:
+            st.session_state.analysis_error = (finished_job or {}).get('error') or True
+
+# --- Metrics ---
+if METRICS_PORT:
+    start_metrics_server(METRICS_PORT)
+APP_RERUNS.inc(page=st.session_state.page)
 
 # --- Navigation Component ---
 def render_navbar():
-    col1, col2, col3, col4, col5 = st.columns([3, 1, 1, 1, 1])
+    col1, col2, col3, col4, col5, col6 = st.columns([3, 1, 1, 1, 1, 1])
     with col1:
         st.markdown('<div class="nav-logo">HireMe<span>AI</span></div>', unsafe_allow_html=True)
     with col2:
@@ -217,100 +272,26 @@ def render_navbar():
     with col5:
         if st.button("Jobs", key="nav_jobs", use_container_width=True): 
             st.session_state.page = 'JOBS'
+    with col6:
+        if st.button("Candidates", key="nav_candidates", use_container_width=True): 
+            st.session_state.page = 'CANDIDATES'
     
     st.markdown("<div style='height: 1px; background: #e2e8f0; margin-top: 10px; margin-bottom: 20px;'></div>", unsafe_allow_html=True)
 
 render_navbar()
 
-# --- Helper: Render HTML Template ---
-# --- Helper: Render HTML Template ---
-def get_template_html(template_id, data):
-    name = data.get('name', 'Candidate Name')
-    role = data.get('suggestedRole', 'Professional Role')
-    summary = data.get('summary', '')
-    skills = data.get('skillsFound', [])
-    strengths = data.get('strengths', [])
-    
-    base_style = "padding: 40px; font-family: sans-serif; color: #1e293b; background: white; min-height: 1000px;"
-    
-    if template_id == "modern":
-        return f"""
-        <div id="resume-preview" style="{base_style}">
-            <div style="border-bottom: 2px solid #0f172a; padding-bottom: 20px; margin-bottom: 30px;">
-                <h1 style="font-size: 42px; margin: 0; text-transform: uppercase; letter-spacing: 1px;">{name}</h1>
-                <p style="font-size: 18px; color: #64748b; margin-top: 10px;">{role}</p>
-            </div>
-            <div style="display: grid; grid-template-columns: 2fr 1fr; gap: 40px;">
-                <div>
-                    <h3 style="font-size: 14px; font-weight: bold; text-transform: uppercase; border-bottom: 1px solid #e2e8f0; padding-bottom: 5px;">Professional Summary</h3>
-                    <p style="font-size: 14px; line-height: 1.6;">{summary}</p>
-                    
-                    <h3 style="font-size: 14px; font-weight: bold; text-transform: uppercase; border-bottom: 1px solid #e2e8f0; padding-bottom: 5px; margin-top: 30px;">Strengths</h3>
-                    <ul style="font-size: 14px; line-height: 1.6;">
-                        {''.join([f'<li>{s}</li>' for s in strengths])}
-                    </ul>
-                </div>
-                <div style="background: #f8fafc; padding: 20px; border-radius: 8px;">
-                    <h3 style="font-size: 14px; font-weight: bold; text-transform: uppercase; margin-bottom: 15px;">Skills</h3>
-                    <div style="display: flex; flex-wrap: wrap; gap: 8px;">
-                        {''.join([f'<span style="background: white; border: 1px solid #e2e8f0; padding: 4px 8px; font-size: 12px;">{s}</span>' for s in skills])}
-                    </div>
-                </div>
-            </div>
-        </div>
-        """
-    elif template_id == "executive":
-        return f"""
-        <div id="resume-preview" style="{base_style} font-family: 'Georgia', serif; text-align: center;">
-            <h1 style="font-size: 36px; color: #1e3a8a; margin-bottom: 5px;">{name}</h1>
-            <p style="font-size: 16px; font-style: italic; color: #64748b; margin-bottom: 40px;">{role}</p>
-            
-            <div style="text-align: left; margin-bottom: 30px;">
-                <h2 style="font-size: 16px; color: #1e3a8a; border-bottom: 1px solid #cbd5e1; padding-bottom: 5px;">EXECUTIVE SUMMARY</h2>
-                <p style="font-size: 14px; line-height: 1.8;">{summary}</p>
-            </div>
-            
-            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 40px; text-align: left;">
-                <div>
-                    <h2 style="font-size: 16px; color: #1e3a8a; border-bottom: 1px solid #cbd5e1; padding-bottom: 5px;">COMPETENCIES</h2>
-                    <ul style="font-size: 14px; line-height: 1.6;">{''.join([f'<li>{s}</li>' for s in skills[:8]])}</ul>
-                </div>
-                 <div>
-                    <h2 style="font-size: 16px; color: #1e3a8a; border-bottom: 1px solid #cbd5e1; padding-bottom: 5px;">HIGHLIGHTS</h2>
-                    <ul style="font-size: 14px; line-height: 1.6;">{''.join([f'<li>{s}</li>' for s in strengths])}</ul>
-                </div>
-            </div>
-        </div>
-        """
-    elif template_id == "creative":
-        return f"""
-        <div id="resume-preview" style="{base_style} font-family: 'Arial', sans-serif;">
-            <div style="background: linear-gradient(135deg, #4f46e5 0%, #7c3aed 100%); color: white; padding: 40px; margin: -40px -40px 40px -40px;">
-                <h1 style="font-size: 48px; margin: 0; font-weight: 300;">{name}</h1>
-                <p style="font-size: 20px; margin: 10px 0 0 0; opacity: 0.9;">{role}</p>
-            </div>
-            
-            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 40px;">
-                <div>
-                    <h3 style="font-size: 18px; color: #4f46e5; border-left: 4px solid #4f46e5; padding-left: 15px; margin-bottom: 20px;">PROFILE</h3>
-                    <p style="font-size: 14px; line-height: 1.6; color: #64748b;">{summary}</p>
-                    
-                    <h3 style="font-size: 18px; color: #4f46e5; border-left: 4px solid #4f46e5; padding-left: 15px; margin: 30px 0 20px 0;">STRENGTHS</h3>
-                    <div style="display: flex; flex-wrap: wrap; gap: 10px;">
-                        {''.join([f'<span style="background: #f1f5f9; color: #4f46e5; padding: 8px 12px; border-radius: 20px; font-size: 12px; font-weight: 600;">{s}</span>' for s in strengths])}
-                    </div>
-                </div>
-                
-                <div>
-                    <h3 style="font-size: 18px; color: #4f46e5; border-left: 4px solid #4f46e5; padding-left: 15px; margin-bottom: 20px;">SKILLS</h3>
-                    <div style="display: flex; flex-wrap: wrap; gap: 8px;">
-                        {''.join([f'<span style="background: #4f46e5; color: white; padding: 6px 12px; border-radius: 6px; font-size: 12px; font-weight: 600;">{s}</span>' for s in skills])}
-                    </div>
-                </div>
-            </div>
-        </div>
-        """
-    return "<div>Template not found</div>"
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def render_analysis_status():
+    job = job_queue.get(st.session_state.analysis_job) if st.session_state.analysis_job else None
+    if job is None or job['status'] in ('done', 'failed'):
+        # Full rerun picks up the result (see Background Analysis)
+        st.rerun()
+    waited = time.time() - job['created']
+    st.info(f"⏳ Analyzing your resume with Gemini 2.5... {waited:.0f}s "
+            f"({'in progress' if job['status'] == 'running' else 'waiting for a worker'}) - feel free to look around")
+
+if st.session_state.analysis_job:
+    render_analysis_status()
 
 # --- VIEW: HOME ---
 
@@ -401,28 +382,70 @@ elif st.session_state.page == 'ANALYSIS':
     # Upload Section
     uploaded_file = st.file_uploader("Upload your Resume (PDF or Image)", type=['pdf', 'png', 'jpg', 'jpeg'])
     
-    if uploaded_file and not st.session_state.resume_data:
+    if st.session_state.analysis_error:
+        if isinstance(st.session_state.analysis_error, str):
+            st.error(f"Analysis failed: {st.session_state.analysis_error}")
+        else:
+            st.error("Analysis failed. Please try again.")
+        st.session_state.analysis_error = False
+
+    if uploaded_file and not st.session_state.resume_data and not st.session_state.analysis_job:
         st.markdown('<div class="primary-btn">', unsafe_allow_html=True)
+        one_shot = st.checkbox("✨ Include AI improvements in the same pass (one model call)",
+                               value=ONE_SHOT_ANALYSIS, key="one_shot_analysis")
         if st.button("Analyze Resume", use_container_width=True):
-            with st.spinner("Analyzing with Gemini 2.5..."):
-                bytes_data = uploaded_file.getvalue()
-                mime_type = uploaded_file.type
-                result = analyze_resume(bytes_data, mime_type)
-                if result:
-                    st.session_state.resume_data = result
-                    st.rerun()
-                else:
-                    st.error("Analysis failed. Please try again.")
+            bytes_data = uploaded_file.getvalue()
+            mime_type = uploaded_file.type
+            try:
+                # Size, type and page limits - checked before anything is queued or sent
+                check_upload(bytes_data, mime_type)
+            except UploadRejected as e:
+                st.error(str(e))
+                st.stop()
+            # Same file analyzed before? Return instantly without a model call
+            result = get_cached_analysis(bytes_data, mime_type, include_improvements=one_shot)
+            st.session_state.candidate_key = candidate_key(bytes_data)
+            if result is None:
+                # Hand the call to a background worker (it also saves the candidate)
+                st.session_state.analysis_job = job_queue.submit(
+                    "analyze",
+                    {"mime_type": mime_type, "include_improvements": one_shot,
+                     "filename": uploaded_file.name, "check_cache": False,
+                     "tenant": st.session_state.tenant_id},
+                    bytes_data,
+                    dedupe_key=f"analyze:{st.session_state.candidate_key}:{one_shot}"
+                )
+            else:
+                # Keep it beyond this browser session (CANDIDATES page)
+                candidate_store.save(result, st.session_state.candidate_key, uploaded_file.name)
+                load_resume(result)
+            st.rerun()
         st.markdown('</div>', unsafe_allow_html=True)
+
+        cache_stats = analysis_cache.stats()
+        flight_stats = single_flight.snapshot()
+        st.caption(f"⚡ Analysis cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses · "
+                   f"{flight_stats['coalesced']} duplicate calls merged")
+        last_upload = preprocess_log.last()
+        if last_upload and last_upload['action'] != 'none':
+            st.caption(f"🗜️ Preprocessed upload: {last_upload['original_bytes'] / 1024:.0f} KB → "
+                       f"{last_upload['sent_bytes'] / 1024:.0f} KB in {last_upload['preprocess_ms']:.0f} ms")
+        last_payload = payload_log.last()
+        if last_payload:
+            st.caption(f"📉 Last upload: sent {last_payload['sent_bytes'] / 1024:.0f} KB of "
+                       f"{last_payload['original_bytes'] / 1024:.0f} KB, ~{last_payload['tokens_saved']} tokens saved")
     
     # Results Section
     if st.session_state.resume_data:
         data = st.session_state.resume_data
+        if data.get('trimmedPages'):
+            st.warning(f"⚠️ Only the first pages of this PDF were analyzed - the last {data['trimmedPages']} "
+                       f"page(s) were left out. Upload a shorter resume for a complete review.")
         
         # Reset Button
         if st.button("Upload New Resume"):
             st.session_state.resume_data = None
-            st.session_state.improvements = []
+            derived.clear()
             st.rerun()
 
         # Editable Fields - FIXED VERSION
@@ -448,7 +471,11 @@ elif st.session_state.page == 'ANALYSIS':
                 st.session_state.resume_data['name'] = new_name
                 st.session_state.resume_data['suggestedRole'] = new_role
                 st.session_state.resume_data['summary'] = new_summary
+                if st.session_state.get('candidate_key'):
+                    candidate_store.save(st.session_state.resume_data, st.session_state.candidate_key)
                 st.success("✅ Changes saved successfully!")
+                if derived.stale_fields('job_search', data):
+                    st.info("🔍 Your target role changed - the Jobs page will suggest a new search.")
 
         # Score & Highlights
         col1, col2 = st.columns([1, 2])
@@ -475,18 +502,68 @@ elif st.session_state.page == 'ANALYSIS':
             with st.container():
                 st.warning(w)
         
-        if not st.session_state.improvements and weaknesses:
+        improvements = derived.peek('improvements', data)
+        if not improvements and weaknesses:
             if st.button("✨ Generate AI Improvements", key="generate_improvements"):
+                # Show each suggestion as soon as the model finishes writing it
+                live = st.empty()
+                imps = []
                 with st.spinner("Thinking..."):
-                    imps = suggest_improvements(weaknesses)
-                    st.session_state.improvements = imps
-                    st.rerun()
+                    for imps in suggest_improvements_stream(weaknesses):
+                        with live.container():
+                            st.markdown("### AI Suggestions")
+                            for imp in imps:
+                                st.info(f"💡 {imp}")
+                derived.put('improvements', data, imps)
+                st.rerun()
         
-        if st.session_state.improvements:
+        if improvements:
             st.markdown("### AI Suggestions")
-            for imp in st.session_state.improvements:
+            for imp in improvements:
                 st.info(f"💡 {imp}")
 
+    # Batch Screening - many resumes at once, ranked by score
+    st.markdown("---")
+    with st.expander("📂 Batch Screening (multiple resumes)"):
+        batch_files = st.file_uploader("Upload Resumes", type=['pdf', 'png', 'jpg', 'jpeg'],
+                                       accept_multiple_files=True, key="batch_uploader")
+        batch_workers = st.slider("Parallel analyses", min_value=1, max_value=32, value=BATCH_WORKERS)
+
+        if batch_files and st.button("🚀 Analyze All", key="batch_analyze"):
+            progress = st.progress(0.0)
+            table = st.empty()
+            rows = []
+            files = ((f.name, f.getvalue(), f.type) for f in batch_files)
+            # Rows stream in as each analysis finishes. Batch runs are exempt from the
+            # session budget (it would refuse most of a large upload); they still run
+            # at background priority under the global rate limits.
+            with tenant_scope(DEFAULT_TENANT):
+                for row in analyze_batch(files, max_workers=batch_workers):
+                    rows.append(row)
+                    progress.progress(len(rows) / len(batch_files), text=f"{len(rows)}/{len(batch_files)} analyzed")
+                    table.dataframe(rank_results(rows), column_order=["file", "score", "name", "suggestedRole", "error"],
+                                    use_container_width=True)
+            st.session_state.batch_results = rows
+
+        if st.session_state.get('batch_results'):
+            st.download_button("⬇️ Download Results (CSV)", results_to_csv(st.session_state.batch_results),
+                               file_name="resume_rankings.csv", mime="text/csv")
+
+            # Every analyzed resume as a PDF, rendered in parallel worker processes
+            if available_renderer():
+                pdf_template = st.selectbox("PDF template", list(TEMPLATES),
+                                            format_func=lambda t: TEMPLATES[t].label, key="batch_pdf_template")
+                if st.button("📄 Export All as PDF", key="batch_pdf_export"):
+                    with st.spinner("Rendering PDFs..."):
+                        pdfs = list(export_batch(st.session_state.batch_results, pdf_template))
+                    st.session_state.batch_pdfs = pdfs_to_zip(pdfs)
+                    failed = sum(1 for _, pdf, _ in pdfs if pdf is None)
+                    if failed:
+                        st.warning(f"{failed} PDF(s) could not be rendered.")
+                if st.session_state.get('batch_pdfs'):
+                    st.download_button("⬇️ Download PDFs (ZIP)", st.session_state.batch_pdfs,
+                                       file_name="resumes.zip", mime="application/zip")
+
 # --- VIEW: TEMPLATES ---
 
 elif st.session_state.page == 'TEMPLATES':
@@ -501,42 +578,20 @@ elif st.session_state.page == 'TEMPLATES':
         st.markdown("### Choose a Template Style")
         st.markdown("Select a template to preview your resume with professional formatting.")
         
-        col1, col2, col3 = st.columns(3)
+        columns = st.columns(len(TEMPLATES))
         
         template_choice = None
         
-        with col1:
-            st.markdown("""
-            <div style="text-align: center; margin-bottom: 20px;">
-                <h3>Modern Tech</h3>
-            </div>
-            """, unsafe_allow_html=True)
-            st.image("https://images.unsplash.com/photo-1586281380349-632531db7ed4?auto=format&fit=crop&q=80&w=400&h=300", 
-                    caption="Clean & Professional", use_container_width=True)  # CHANGE HERE
-            if st.button("Select Modern", key="modern_btn", use_container_width=True): 
-                template_choice = "modern"
-        
-        with col2:
-            st.markdown("""
-            <div style="text-align: center; margin-bottom: 20px;">
-                <h3>Executive Pro</h3>
-            </div>
-            """, unsafe_allow_html=True)
-            st.image("https://images.unsplash.com/photo-1586282391129-76a6df840fd0?auto=format&fit=crop&q=80&w=400&h=300", 
-                    caption="Elegant & Corporate", use_container_width=True)  # CHANGE HERE
-            if st.button("Select Executive", key="executive_btn", use_container_width=True): 
-                template_choice = "executive"
-
-        with col3:
-            st.markdown("""
-            <div style="text-align: center; margin-bottom: 20px;">
-                <h3>Creative</h3>
-            </div>
-            """, unsafe_allow_html=True)
-            st.image("https://images.unsplash.com/photo-1606326608606-aa0b62935f2b?auto=format&fit=crop&q=80&w=400&h=300", 
-                    caption="Modern & Creative", use_container_width=True)  # CHANGE HERE
-            if st.button("Select Creative", key="creative_btn", use_container_width=True): 
-                template_choice = "creative"
+        for col, template in zip(columns, TEMPLATES.values()):
+            with col:
+                st.markdown(f"""
+                <div style="text-align: center; margin-bottom: 20px;">
+                    <h3>{template.label}</h3>
+                </div>
+                """, unsafe_allow_html=True)
+                st.image(template.image, caption=template.caption, use_container_width=True)
+                if st.button(f"Select {template.template_id.title()}", key=f"{template.template_id}_btn", use_container_width=True): 
+                    template_choice = template.template_id
 
         if template_choice:
             st.session_state.selected_template = template_choice
@@ -545,14 +600,24 @@ elif st.session_state.page == 'TEMPLATES':
         if 'selected_template' in st.session_state:
             st.markdown("---")
             st.subheader("Live Preview")
-            st.info("💡 To download: Right-click inside the preview area → Print → Save as PDF")
             
-            html_content = get_template_html(st.session_state.selected_template, st.session_state.resume_data)
+            resume_data = st.session_state.resume_data
+            html_content = derived.get('template_html', resume_data, st.session_state.selected_template)
+            pdf_bytes = derived.get('template_pdf', resume_data, st.session_state.selected_template) \
+                if available_renderer() else None
+            if pdf_bytes:
+                file_stem = (st.session_state.resume_data.get('name') or 'resume').replace(' ', '_')
+                st.download_button("⬇️ Download PDF", pdf_bytes, file_name=f"{file_stem}.pdf",
+                                   mime="application/pdf", type="primary")
+            else:
+                st.info("💡 To download: Right-click inside the preview area → Print → Save as PDF")
             st.components.v1.html(html_content, height=1000, scrolling=True)
 
 # --- VIEW: JOBS ---
 
 elif st.session_state.page == 'JOBS':
+    # numpy and the vector index load on the first visit to this page, not at startup
+    from matching import get_matcher
     st.title("Smart Job Matching")
     
     if not st.session_state.resume_data:
@@ -584,7 +649,7 @@ elif st.session_state.page == 'JOBS':
             skills = data.get('skillsFound', [])
             
             # SIMPLIFIED QUERY - Only use clean job title
-            smart_query = default_role
+            smart_query = derived.get('job_query', data)
             
             c1, c2, c3 = st.columns([2, 1, 1])
             with c1:
@@ -605,34 +670,141 @@ elif st.session_state.page == 'JOBS':
                     st.write(f"- `{default_role} {loc if loc else 'Remote'}`")
                     if skills:
                         st.write(f"- `{skills[0]} Developer`")
+            structured = st.checkbox("📋 Structured listings", value=STRUCTURED_JOBS,
+                                     help="Company, location, work mode and posting date for each job "
+                                          "(one extra low-cost model call; known listings are reused)")
             
             search_submitted = st.form_submit_button("🚀 Find Matching Jobs")
         
         if search_submitted:
+            # Use only the clean job title for search
+            clean_query = clean_job_title(query)
+            live_text = st.empty()
+            live_sources = st.empty()
+            results = None
             with st.spinner("🔍 Searching for jobs that match your profile..."):
-                # Use only the clean job title for search
-                clean_query = query.split(',')[0].split(' with ')[0].strip()
-                results = find_jobs(clean_query, loc, mode)
-                st.session_state.job_results = results
+                # Render market insights and sources while they stream in
+                for results in job_search_cache.stream(clean_query, loc, mode):
+                    live_text.markdown(results['text'] + " ▌")
+                    if results['sources']:
+                        live_sources.caption(f"🔗 {len(results['sources'])} job links found so far")
+            live_text.empty()
+            live_sources.empty()
+            if results:
+                if structured and results['sources']:
+                    with st.spinner("📋 Reading the listings..."):
+                        records = extract_listings(results)
+                    results = dict(results, sources=records, structured=True)
+                    try:
+                        # Into the local job store: later searches find them there, deduped by URL and content
+                        ingest(records, job_store, source="search")
+                    except Exception as e:
+                        print(f"Error saving listings: {e}")
+                results = dict(results, query=clean_query)
+                derived.put('job_search', data, clean_query)
+                try:
+                    # Keep the listings for semantic matching in later searches and for other candidates
+                    get_matcher().add_jobs(results['sources'])
+                except Exception as e:
+                    print(f"Error indexing jobs: {e}")
+            st.session_state.job_results = results
+
+            # Listings loaded from job feeds (python -m job_ingest) - a local query, no model call
+            started = time.perf_counter()
+            local = job_store.search(text=clean_query, location=loc, mode=mode, limit=50)
+            shown = {normalize_url(job['url']) for job in (results or {}).get('sources', [])}
+            local = [job for job in local if job['url'] not in shown]
+            st.session_state.local_jobs = {
+                'sources': local,
+                'query': clean_query,
+                'ms': (time.perf_counter() - started) * 1000,
+            }
+
+        job_stats = job_search_cache.snapshot()
+        st.caption(f"⚡ Job search cache: {job_stats['fresh_hits'] + job_stats['stale_hits']} hits / "
+                   f"{job_stats['misses']} misses / {job_stats['coalesced']} shared searches")
         
         if st.session_state.job_results:
             res = st.session_state.job_results
+            if derived.stale_fields('job_search', data):
+                st.info(f"🎯 Your target role is now **{data.get('suggestedRole', '')}** - these results are for "
+                        f"\"{res.get('query', '')}\". Search again to refresh them.")
             
             # AI Summary
             with st.expander("📊 AI Job Market Insights", expanded=True):
                 st.write(res['text'])
             
+            # Best match for this candidate first - scored locally, redone only when the skills change
+            jobs = derived.get('job_ranking', data, res['sources'], res.get('query', ''))
+            if res.get('structured') and jobs:
+                # Typed records: filter and sort locally, no new search
+                f1, f2, f3 = st.columns([1, 1, 1])
+                with f1:
+                    modes = sorted({job['mode'] for job in jobs if job['mode']})
+                    picked_modes = st.multiselect("Work mode", modes, default=modes)
+                with f2:
+                    company_filter = st.text_input("Company contains", key="company_filter")
+                with f3:
+                    sort_by = st.selectbox("Sort by", ["Best match", "Company", "Location", "Posted"])
+                jobs = [job for job in jobs
+                        if (not job['mode'] or job['mode'] in picked_modes)
+                        and company_filter.casefold() in job['company'].casefold()]
+                if sort_by == "Posted":
+                    # Newest first; dates the parser does not understand go last
+                    dated = [(parse_posted(job['posted']), job) for job in jobs]
+                    jobs = [job for _, job in sorted(dated, key=lambda d: (d[0] is None, -(d[0] or date.min).toordinal()))]
+                elif sort_by != "Best match":
+                    field = sort_by.lower()
+                    jobs = sorted(jobs, key=lambda job: (not job[field], job[field].casefold()))
+                st.dataframe(
+                    [{k: job[k] for k in ("title", "company", "location", "mode", "posted", "match", "url")}
+                     for job in jobs],
+                    column_config={"url": st.column_config.LinkColumn("Link", display_text="View"),
+                                   "match": st.column_config.NumberColumn("Match %")},
+                    hide_index=True, use_container_width=True
+                )
+
             # Job Cards
-            st.subheader(f"🎯 Found {len(res['sources'])} Opportunities")
+            st.subheader(f"🎯 Found {len(jobs)} Opportunities")
             
-            for i, job in enumerate(res['sources']):
+            for i, job in enumerate(jobs):
+                details = " · ".join(p for p in (job['company'] or 'External Site', job.get('location'),
+                                                 job.get('mode'), job.get('posted')) if p)
                 st.markdown(f"""
                 <div style="padding: 20px; background: white; border-radius: 10px; border: 1px solid #e2e8f0; margin-bottom: 15px;">
                     <h3 style="margin: 0; color: #1e293b;">{job['title']}</h3>
-                    <p style="margin: 5px 0; color: #64748b; font-size: 14px;">{job['company']}</p>
+                    <p style="margin: 5px 0; color: #64748b; font-size: 14px;">{details} · <b style="color: #4f46e5;">{job.get('match', 0)}% match</b></p>
                     <a href="{job['url']}" target="_blank" style="display: inline-block; margin-top: 10px; text-decoration: none; color: #4f46e5; font-weight: 600;">View Job &rarr;</a>
                 </div>
                 """, unsafe_allow_html=True)
+
+        if st.session_state.local_jobs and st.session_state.local_jobs['sources']:
+            local = st.session_state.local_jobs
+            local = dict(local, sources=derived.get('job_ranking', data, local['sources'], local['query'])[:10])
+            st.subheader(f"📂 From Job Feeds ({len(local['sources'])})")
+            st.caption(f"Searched {job_store.count()} ingested listings in {local['ms']:.0f} ms")
+            for job in local['sources']:
+                mode_label = job['mode'] if job['mode'] != job['location'] else ''
+                where = " · ".join(p for p in (job['company'], job['location'], mode_label) if p)
+                st.markdown(f"- [{job['title']}]({job['url']}) · {where} · **{job.get('match', 0)}% match**")
+
+        # Listings collected by earlier searches (any session) that fit this profile
+        matcher = get_matcher()
+        if len(matcher.jobs):
+            shown = sorted(job['url'] for job in (st.session_state.job_results or {}).get('sources', []))
+            try:
+                # Re-embedded and searched only when the profile text or the index changes
+                similar = derived.get('similar_jobs', data,
+                                      st.session_state.get('candidate_key') or f"session:{st.session_state.tenant_id}",
+                                      shown, len(matcher.jobs))
+            except Exception as e:
+                print(f"Error matching jobs: {e}")
+                similar = []
+            if similar:
+                st.subheader("🧭 Similar Jobs From Earlier Searches")
+                for _, similarity, job in similar:
+                    st.markdown(f"- [{job['title']}]({job['url']}) · {job['company']} · "
+                                f"{round(similarity * 100)}% similar")
         
         # Manual override option
         st.markdown("---")
@@ -648,4 +820,68 @@ elif st.session_state.page == 'JOBS':
             if st.button("🔄 Re-analyze Resume", use_container_width=True):
                 st.session_state.resume_data = None
                 st.session_state.page = 'ANALYSIS'
-                st.rerun()
\ No newline at end of file
+                st.rerun()
+
+# --- VIEW: CANDIDATES ---
+
+elif st.session_state.page == 'CANDIDATES':
+    st.title("Candidate Database")
+    st.markdown(f"Every analyzed resume is saved here - **{candidate_store.count()}** candidates so far.")
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        search_text = st.text_input("Search summary & skills", placeholder="e.g. machine learning")
+    with col2:
+        roles = candidate_store.roles()
+        role_filter = st.selectbox("Role", ["All roles"] + [r for r, _ in roles],
+                                   format_func=lambda r: r if r == "All roles" else f"{r} ({dict(roles)[r]})")
+        role_prefix = st.checkbox("Include roles starting with it", value=False,
+                                  help="e.g. \"Data Analyst\" also finds \"Data Analyst Intern\"")
+    with col3:
+        min_score = st.slider("Min score", 0, 100, 0)
+    skills_filter = st.text_input("Must have skills (comma separated)", placeholder="Python, SQL")
+
+    started = time.perf_counter()
+    candidates = candidate_store.search(
+        text=search_text,
+        role=None if role_filter == "All roles" else role_filter,
+        role_prefix=role_prefix,
+        min_score=min_score or None,
+        skills=[s.strip() for s in skills_filter.split(",") if s.strip()],
+        limit=200
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    st.caption(f"🔎 {len(candidates)} matches in {elapsed_ms:.1f} ms")
+
+    if candidates:
+        st.dataframe(candidates, column_order=CANDIDATE_COLUMNS[:5], use_container_width=True)
+        chosen = st.selectbox("Open candidate", range(len(candidates)),
+                              format_func=lambda i: f"{candidates[i]['name']} - {candidates[i]['score']}")
+        if st.button("📂 Open in Analysis", key="open_candidate"):
+            st.session_state.candidate_key = candidates[chosen]['key']
+            load_resume(candidate_store.get(candidates[chosen]['key']))
+            st.session_state.page = 'ANALYSIS'
+            st.rerun()
+        if st.button("🧭 Best Matching Jobs", key="match_candidate"):
+            from matching import get_matcher
+            try:
+                matches = get_matcher().jobs_for_candidate(candidates[chosen]['key'], candidates[chosen], k=10)
+            except Exception as e:
+                print(f"Error matching jobs: {e}")
+                matches = []
+            matches = [m for m in matches if m[1] > 0]
+            if matches:
+                for _, similarity, job in matches:
+                    st.markdown(f"- [{job['title']}]({job['url']}) · {job['company']} · "
+                                f"{round(similarity * 100)}% similar")
+            else:
+                st.info("No job listings indexed yet - run a search on the Jobs page first.")
+
+# --- Backend Warm-up ---
+# The genai client is built lazily; kick that off once per process, after the
+# first page has rendered, so neither first paint nor the first analysis waits on it.
+@st.cache_resource(show_spinner=False)
+def _backend_warm_up():
+    return warm_up()
+
+_backend_warm_up()
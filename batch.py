@@ -0,0 +1,184 @@
+import os
+import io
+import csv
+import sys
+import argparse
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from config import BATCH_WORKERS, METRICS_FILE
+from gemini_backend import analyze_resume
+from metrics import write_metrics
+from candidate_store import candidate_store, candidate_key
+from scheduler import tenant_scope, BACKGROUND
+
+SUPPORTED_TYPES = {
+    ".pdf": "application/pdf",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+}
+
+RESULT_COLUMNS = [
+    "file", "name", "score", "suggestedRole", "skillsFound",
+    "strengths", "weaknesses", "improvements", "summary", "error"
+]
+
+
+def _analyze_one(filename, file_bytes, mime_type, include_improvements=False):
+    """
+    Runs one analysis and always returns a row - failures become an error row.
+    """
+    try:
+        # Bulk screening yields to interactive analyses when the backend is busy
+        with tenant_scope(priority=BACKGROUND):
+            result = analyze_resume(file_bytes, mime_type, include_improvements=include_improvements)
+    except Exception as e:
+        return {"file": filename, "error": str(e)}
+    if not result:
+        return {"file": filename, "error": "Analysis failed"}
+    try:
+        candidate_store.save(result, candidate_key(file_bytes), filename)
+    except Exception as e:
+        print(f"Error saving candidate: {e}")
+    row = {"file": filename, "error": ""}
+    row.update(result)
+    return row
+
+
+def analyze_batch(files, max_workers=BATCH_WORKERS, include_improvements=False):
+    """
+    Analyzes many resumes over a bounded thread pool.
+    files: iterable of (filename, file_bytes, mime_type). It is consumed lazily,
+    so at most 2 x max_workers files are held in memory at once.
+    Yields one row per file as soon as it finishes (completion order).
+    include_improvements=True adds per-weakness tips from the same model call.
+    """
+    files = iter(files)
+    max_workers = max(1, int(max_workers))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch") as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            # Keep the pipeline full without reading every file up front
+            while not exhausted and len(pending) < max_workers * 2:
+                try:
+                    filename, file_bytes, mime_type = next(files)
+                except StopIteration:
+                    exhausted = True
+                    break
+                # Pool threads do not inherit contextvars: run each file as the caller's tenant
+                pending.add(pool.submit(contextvars.copy_context().run, _analyze_one,
+                                        filename, file_bytes, mime_type, include_improvements))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def iter_resume_files(paths):
+    """
+    Expands files and folders into (filename, file_bytes, mime_type) tuples.
+    Files are only read when the batch worker pool asks for them.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            names = sorted(os.listdir(path))
+            candidates = [os.path.join(path, n) for n in names]
+        else:
+            candidates = [path]
+        for file_path in candidates:
+            ext = os.path.splitext(file_path)[1].lower()
+            if not os.path.isfile(file_path) or ext not in SUPPORTED_TYPES:
+                continue
+            mime_type = SUPPORTED_TYPES[ext]
+            with open(file_path, "rb") as f:
+                yield os.path.basename(file_path), f.read(), mime_type
+
+
+def rank_results(rows):
+    """
+    Sorts rows best score first, failed rows last.
+    """
+    return sorted(rows, key=lambda r: (bool(r.get("error")), -(r.get("score") or 0)))
+
+
+def _flatten(row):
+    flat = {}
+    for col in RESULT_COLUMNS:
+        value = row.get(col, "")
+        if isinstance(value, list):
+            value = "; ".join(str(v) for v in value)
+        flat[col] = value
+    return flat
+
+
+def results_to_csv(rows):
+    """
+    Returns the ranked results table as CSV text.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=RESULT_COLUMNS)
+    writer.writeheader()
+    for row in rank_results(rows):
+        writer.writerow(_flatten(row))
+    return buffer.getvalue()
+
+
+def write_results(rows, path):
+    """
+    Writes the ranked results table. ".parquet" paths need pandas + pyarrow,
+    anything else is written as CSV.
+    """
+    if path.lower().endswith(".parquet"):
+        import pandas as pd
+        pd.DataFrame([_flatten(r) for r in rank_results(rows)], columns=RESULT_COLUMNS).to_parquet(path, index=False)
+    else:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            f.write(results_to_csv(rows))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a folder of resumes in parallel.")
+    parser.add_argument("paths", nargs="+", help="Resume files or folders (PDF, PNG, JPG)")
+    parser.add_argument("-w", "--workers", type=int, default=BATCH_WORKERS, help="Max concurrent analyses")
+    parser.add_argument("-o", "--out", default="results.csv", help="Output table (.csv or .parquet)")
+    parser.add_argument("--with-improvements", action="store_true",
+                        help="Also get one improvement tip per weakness (same model call)")
+    parser.add_argument("--pdf", metavar="TEMPLATE", help="Also export every analyzed resume as a PDF with this template")
+    parser.add_argument("--pdf-dir", default="pdf", help="Folder for --pdf output")
+    args = parser.parse_args(argv)
+
+    rows = []
+    files = iter_resume_files(args.paths)
+    for row in analyze_batch(files, max_workers=args.workers, include_improvements=args.with_improvements):
+        rows.append(row)
+        if row.get("error"):
+            print(f"[{len(rows)}] {row['file']}: ERROR {row['error']}")
+        else:
+            print(f"[{len(rows)}] {row['file']}: {row.get('score')} - {row.get('suggestedRole', '')}")
+
+    write_results(rows, args.out)
+    failed = sum(1 for r in rows if r.get("error"))
+    print(f"Done: {len(rows) - failed} analyzed, {failed} failed -> {args.out}")
+    if args.pdf:
+        # Imported here so plain batch runs don't open the PDF cache
+        from pdf_export import export_batch
+        os.makedirs(args.pdf_dir, exist_ok=True)
+        exported = 0
+        for filename, pdf, error in export_batch(rows, args.pdf):
+            if pdf is None:
+                print(f"PDF {filename}: ERROR {error}")
+                continue
+            with open(os.path.join(args.pdf_dir, filename), "wb") as f:
+                f.write(pdf)
+            exported += 1
+        print(f"Exported {exported} PDF(s) -> {args.pdf_dir}")
+    if METRICS_FILE:
+        write_metrics(METRICS_FILE)
+    return 0 if rows else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
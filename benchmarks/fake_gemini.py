@@ -0,0 +1,213 @@
+"""
+Local stand-in for the Gemini REST API, so benchmarks never touch real quota.
+
+Serves generateContent and streamGenerateContent (SSE) for any model and
+answers with canned data shaped like the request: analysis JSON, one-shot
+analysis + improvements, improvements JSON, or grounded job search text with
+web sources. A Profile controls latency, error rate and payload size.
+
+    server = FakeGeminiServer(Profile(latency=0.8, error_rate=0.05)).start()
+    client = server.client()          # genai.Client pointed at the stub
+    ...
+    server.stop()
+"""
+import re
+import json
+import time
+import random
+import threading
+from dataclasses import dataclass
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from google import genai
+from google.genai import types
+
+
+@dataclass
+class Profile:
+    latency: float = 0.5        # seconds before the first byte
+    jitter: float = 0.1         # +/- uniform jitter on latency
+    per_token: float = 0.0      # extra seconds per output token (~4 chars)
+    error_rate: float = 0.0     # share of requests answered with an error
+    error_code: int = 503       # 429 or 5xx
+    retry_after: float = 0.0    # seconds sent as RetryInfo on errors (0 = none)
+    payload_scale: int = 1      # repeat list items to inflate responses
+    stream_chunks: int = 4      # chunks per streamed response
+
+
+PROFILES = {
+    "fast": Profile(latency=0.05, jitter=0.01),
+    "typical": Profile(latency=1.5, jitter=0.5, per_token=0.002),
+    "slow": Profile(latency=4.0, jitter=1.5, per_token=0.005),
+    "flaky": Profile(latency=1.0, jitter=0.3, error_rate=0.1, error_code=503),
+    "throttled": Profile(latency=1.0, jitter=0.3, error_rate=0.2, error_code=429, retry_after=1.0),
+    "large": Profile(latency=1.5, jitter=0.5, per_token=0.002, payload_scale=20),
+}
+
+
+def _answer(body, profile):
+    """
+    Builds the response text (and grounding sources) the real model would send.
+    """
+    config = body.get("generationConfig", {})
+    properties = config.get("responseSchema", {}).get("properties", {})
+    scale = max(1, profile.payload_scale)
+    prompt = json.dumps(body.get("contents", []))
+    seed = sum(map(ord, prompt[-64:]))
+
+    if "googleSearch" in json.dumps(body.get("tools", [])):
+        sources = [
+            {"web": {"uri": f"https://jobs.example.com/listing/{seed % 997}-{i}", "title": f"Listing {i + 1}"}}
+            for i in range(5)
+        ]
+        text = "Here are 5 recent openings. " + "The market for this role is active. " * (3 * scale)
+        return text, sources
+
+    if "listings" in properties:
+        companies = ["Acme", "Globex", "Initech", "Umbrella", "Hooli"]
+        listings = [
+            {"source": int(i), "isJobListing": True, "title": f"Data Analyst {i}",
+             "company": companies[int(i) % len(companies)], "location": "Remote", "mode": "Remote",
+             "posted": "3 days ago"}
+            for i in re.findall(r"\[(\d+)\] ", prompt)
+        ]
+        return json.dumps({"listings": listings}), []
+
+    tips = ["Quantify your impact with numbers", "Shorten the summary", "Add portfolio links"] * scale
+    if "name" in properties:
+        data = {
+            "name": f"Candidate {seed % 1000}",
+            "score": 40 + seed % 60,
+            "summary": "Analytical professional with a track record of delivery. " * scale,
+            "strengths": ["Communication", "SQL", "Ownership"] * scale,
+            "weaknesses": ["No metrics", "Long summary", "Missing links"] * scale,
+            "suggestedRole": "Data Analyst",
+            "skillsFound": ["Python", "SQL", "Tableau", "Excel"] * scale,
+        }
+        if "improvements" in properties:
+            data["improvements"] = tips
+    else:
+        data = {"improvements": tips}
+    return json.dumps(data), []
+
+
+def _response_json(text, sources, chunk_text=None):
+    candidate = {"content": {"role": "model", "parts": [{"text": chunk_text if chunk_text is not None else text}]}}
+    if sources:
+        candidate["groundingMetadata"] = {"groundingChunks": sources}
+    return {
+        "candidates": [candidate],
+        "usageMetadata": {
+            "promptTokenCount": 500,
+            "candidatesTokenCount": len(text) // 4,
+            "totalTokenCount": 500 + len(text) // 4,
+        },
+    }
+
+
+def _make_handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, code, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            profile = server.profile
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            server.count("requests")
+            server.count("request_bytes", int(self.headers.get("Content-Length", 0)))
+
+            time.sleep(max(0.0, profile.latency + random.uniform(-profile.jitter, profile.jitter)))
+
+            if random.random() < profile.error_rate:
+                server.count("errors")
+                error = {"code": profile.error_code, "message": "Injected by fake server",
+                         "status": "RESOURCE_EXHAUSTED" if profile.error_code == 429 else "UNAVAILABLE"}
+                if profile.retry_after:
+                    error["details"] = [{"@type": "type.googleapis.com/google.rpc.RetryInfo",
+                                         "retryDelay": f"{profile.retry_after}s"}]
+                self._send_json(profile.error_code, {"error": error})
+                return
+
+            text, sources = _answer(body, profile)
+            output_delay = profile.per_token * len(text) / 4
+
+            if ":streamGenerateContent" not in self.path:
+                time.sleep(output_delay)
+                self._send_json(200, _response_json(text, sources))
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            chunks = max(1, profile.stream_chunks)
+            size = -(-len(text) // chunks)
+            for i in range(chunks):
+                piece = text[i * size:(i + 1) * size]
+                time.sleep(output_delay / chunks)
+                # Grounding metadata comes with the last chunk, like the real API
+                payload = _response_json(text, sources if i == chunks - 1 else [], chunk_text=piece)
+                self.wfile.write(b"data: " + json.dumps(payload).encode("utf-8") + b"\r\n\r\n")
+                self.wfile.flush()
+            self.close_connection = True
+
+    return Handler
+
+
+class FakeGeminiServer:
+    def __init__(self, profile=None, host="127.0.0.1", port=0):
+        self.profile = profile or Profile()
+        self.stats = {"requests": 0, "errors": 0, "request_bytes": 0}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def client(self):
+        """
+        A real genai.Client whose requests all go to this server.
+        """
+        return genai.Client(api_key="fake-key", http_options=types.HttpOptions(base_url=self.url))
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the fake Gemini API server.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="typical")
+    args = parser.parse_args()
+    server = FakeGeminiServer(PROFILES[args.profile], port=args.port).start()
+    print(f"Fake Gemini ({args.profile}) on {server.url} - Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,82 @@
+"""
+Vector index benchmark: bulk insert, query latency and recall@k of the IVF
+index against exact search, on clustered synthetic vectors (no API calls).
+
+    python -m benchmarks.matching --items 100000
+    python -m benchmarks.matching --items 200000 --nprobe 4 --out matching.json
+"""
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+from matching import VectorIndex, _normalize
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--clusters", type=int, default=500, help="Topics in the synthetic data")
+    parser.add_argument("--batch", type=int, default=5000, help="Vectors per add() call")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--out", help="Write the JSON report here as well as stdout")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(42)
+    topics = rng.normal(size=(args.clusters, args.dim)).astype(np.float32)
+
+    def sample(n):
+        return topics[rng.integers(0, args.clusters, n)] + 0.6 * rng.normal(size=(n, args.dim)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as path:
+        index = VectorIndex(path, args.dim, nprobe=args.nprobe)
+        started = time.perf_counter()
+        for start in range(0, args.items, args.batch):
+            vectors = sample(min(args.batch, args.items - start))
+            index.add([(f"item-{start + i}", v, "", {}) for i, v in enumerate(vectors)])
+        insert_s = time.perf_counter() - started
+
+        queries = sample(args.queries)
+        latencies = []
+        found = []
+        for query in queries:
+            started = time.perf_counter()
+            found.append({key for key, _, _ in index.search(query, args.k)})
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        # Exact top-k for recall, over the same stored vectors
+        stored = np.asarray(index._vectors[:index.size])
+        exact = np.argsort(-(stored @ _normalize(queries).T), axis=0)[:args.k].T
+        recall = statistics.mean(
+            len(hits & {f"item-{i}" for i in truth}) / args.k for hits, truth in zip(found, exact))
+
+        report = {
+            "items": args.items,
+            "dim": args.dim,
+            "lists": len(index._lists),
+            "nprobe": args.nprobe,
+            "insert_s": round(insert_s, 2),
+            "insert_per_s": round(args.items / insert_s),
+            "query_p50_ms": round(statistics.median(latencies), 2),
+            "query_p95_ms": round(sorted(latencies)[int(len(latencies) * 0.95) - 1], 2),
+            f"recall_at_{args.k}": round(recall, 3),
+        }
+        index.close()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
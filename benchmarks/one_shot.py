@@ -0,0 +1,77 @@
+"""
+Compares the two-call analysis path (analyze_resume + suggest_improvements)
+with the one-shot path (analyze_resume(include_improvements=True)).
+
+    python -m benchmarks.one_shot resume.pdf --runs 5     # real API, uses quota
+    python -m benchmarks.one_shot --fake --runs 20        # local fake server
+"""
+import sys
+import json
+import time
+import argparse
+import statistics
+
+import gemini_backend
+from benchmarks.fake_gemini import FakeGeminiServer, Profile
+from benchmarks.run import synthetic_resume
+
+
+def two_call(file_bytes, mime_type):
+    result = gemini_backend.analyze_resume(file_bytes, mime_type, check_cache=False)
+    return gemini_backend.suggest_improvements(result["weaknesses"])
+
+
+def one_shot(file_bytes, mime_type):
+    return gemini_backend.analyze_resume(file_bytes, mime_type, check_cache=False,
+                                         include_improvements=True)["improvements"]
+
+
+def measure(fn, file_bytes, mime_type, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn(file_bytes, mime_type)
+        timings.append(time.perf_counter() - started)
+    return {
+        "mean_s": round(statistics.mean(timings), 3),
+        "p50_s": round(statistics.median(timings), 3),
+        "max_s": round(max(timings), 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("resume", nargs="?", help="Resume file (PDF/PNG/JPG) for live runs")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--fake", action="store_true", help="Use the local fake server instead of the API")
+    parser.add_argument("--overhead", type=float, default=1.5, help="Fake: seconds per call before output")
+    parser.add_argument("--per-token", type=float, default=0.004, help="Fake: seconds per output token")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.fake:
+        server = FakeGeminiServer(Profile(latency=args.overhead, jitter=0.0, per_token=args.per_token)).start()
+        gemini_backend.set_client(server.client())
+        file_bytes, mime_type = synthetic_resume(0), "application/pdf"
+    elif args.resume:
+        with open(args.resume, "rb") as f:
+            file_bytes = f.read()
+        mime_type = "application/pdf" if args.resume.lower().endswith(".pdf") else "image/png"
+    else:
+        parser.error("pass a resume file or --fake")
+
+    try:
+        report = {
+            "two_call": measure(two_call, file_bytes, mime_type, args.runs),
+            "one_shot": measure(one_shot, file_bytes, mime_type, args.runs),
+        }
+    finally:
+        if server:
+            server.stop()
+    report["saved_s"] = round(report["two_call"]["mean_s"] - report["one_shot"]["mean_s"], 3)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Latency / throughput benchmark for the backend against the local fake server.
+
+    python -m benchmarks.run --profile typical --concurrency 16 --resumes 200
+    python -m benchmarks.run --profile flaky --out bench.json --compare last_bench.json
+
+Replays a corpus of synthetic resumes (generated PDFs with a text layer)
+through analyze_resume, suggest_improvements and find_jobs and reports
+p50/p95/p99 latency, throughput and error rate per scenario as JSON.
+With --compare, exits 1 if p95 or throughput regressed past --max-regression.
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import gemini_backend
+from result_cache import ResultCache, MemoryBackend
+from scheduler import RequestScheduler
+from benchmarks.fake_gemini import FakeGeminiServer, PROFILES
+
+FIRST_NAMES = ["Ayesha", "Bilal", "Chen", "Diego", "Emma", "Farah", "Gita", "Hassan", "Ines", "Jonas"]
+ROLES = ["Data Analyst", "Frontend Developer", "Marketing Manager", "DevOps Engineer", "Product Designer"]
+SKILLS = ["Python", "SQL", "React", "AWS", "Figma", "Excel", "Docker", "Tableau", "SEO", "Kubernetes"]
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages):
+    """
+    Minimal valid PDF with one Helvetica text layer per page (list of line lists).
+    """
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        stream = "BT /F1 10 Tf 14 TL 50 770 Td " + " ".join(f"({_escape(l)}) '" for l in lines) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Contents {len(objects)} 0 R /Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return out
+
+
+def synthetic_resume(index, pages=1, rng=None):
+    rng = rng or random.Random(index)
+    name = f"{rng.choice(FIRST_NAMES)} Example{index}"
+    role = rng.choice(ROLES)
+    skills = rng.sample(SKILLS, 5)
+    body = [name, role, "", "SUMMARY", f"{role} with {rng.randint(1, 15)} years of experience.",
+            "", "SKILLS", ", ".join(skills), "", "EXPERIENCE"]
+    result = []
+    for page in range(pages):
+        lines = list(body) if page == 0 else []
+        lines += [f"- Delivered project {page}-{i} using {rng.choice(skills)}, improving KPIs by {rng.randint(5, 60)}%"
+                  for i in range(40)]
+        result.append(lines)
+    return make_pdf(result)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def run_scenario(call, inputs, concurrency):
+    """
+    Runs call(item) for every input at the given concurrency.
+    call returns True on success. Returns the summary dict.
+    """
+    def timed(item):
+        started = time.perf_counter()
+        try:
+            ok = call(item)
+        except Exception:
+            ok = False
+        return ok, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, inputs))
+    wall = time.perf_counter() - started
+
+    latencies = [elapsed * 1000 for _, elapsed in results]
+    errors = sum(1 for ok, _ in results if not ok)
+    return {
+        "calls": len(results),
+        "errors": errors,
+        "error_rate": round(errors / len(results), 4) if results else 0.0,
+        "throughput_rps": round(len(results) / wall, 3) if wall else 0.0,
+        "wall_s": round(wall, 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+    }
+
+
+SCENARIOS = {
+    "analyze": lambda item: gemini_backend.analyze_resume(item["pdf"], "application/pdf", check_cache=False) is not None,
+    "one_shot": lambda item: bool((gemini_backend.analyze_resume(
+        item["pdf"], "application/pdf", check_cache=False, include_improvements=True) or {}).get("improvements")),
+    "improve": lambda item: bool(gemini_backend.suggest_improvements(item["weaknesses"])),
+    "jobs": lambda item: bool(gemini_backend.find_jobs(item["query"], item["location"], "Any")["sources"]),
+}
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def compare(report, baseline, max_regression):
+    """
+    Prints per-scenario deltas vs a previous report. Returns True if any scenario regressed.
+    """
+    regressed = False
+    for name, current in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        p95 = (current["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] if previous["p95_ms"] else 0.0
+        rps = (previous["throughput_rps"] - current["throughput_rps"]) / previous["throughput_rps"] \
+            if previous["throughput_rps"] else 0.0
+        flag = p95 > max_regression or rps > max_regression
+        regressed |= flag
+        print(f"{name:10s} p95 {previous['p95_ms']:>9.1f} -> {current['p95_ms']:>9.1f} ms ({p95:+.1%})  "
+              f"throughput {previous['throughput_rps']:>8.2f} -> {current['throughput_rps']:>8.2f} rps"
+              f"{'  REGRESSION' if flag else ''}", file=sys.stderr)
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="fast")
+    parser.add_argument("--scenarios", default="analyze,improve,jobs", help=f"Comma list of {', '.join(SCENARIOS)}")
+    parser.add_argument("--resumes", type=int, default=50, help="Synthetic resumes (calls per scenario)")
+    parser.add_argument("--pages", type=int, default=1, help="Pages per synthetic resume")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--respect-limits", action="store_true",
+                        help="Keep the configured RPM/TPM limits (default: unlimited)")
+    parser.add_argument("--retry-base-delay", type=float, default=0.2)
+    parser.add_argument("--out", help="Write the JSON report here as well as stdout")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(42)
+    corpus = [{
+        "pdf": synthetic_resume(i, args.pages, rng),
+        "weaknesses": [f"Weakness {i}-{k}" for k in range(3)],
+        "query": f"{rng.choice(ROLES)} {i}",
+        "location": rng.choice(["Remote", "London", "Karachi", "New York"]),
+    } for i in range(args.resumes)]
+
+    server = FakeGeminiServer(PROFILES[args.profile]).start()
+    # Swap the shared client and keep caches / limits out of the measurement
+    gemini_backend.set_client(server.client())
+    gemini_backend.analysis_cache = ResultCache(MemoryBackend())
+    if not args.respect_limits:
+        gemini_backend.scheduler = RequestScheduler(rpm=10 ** 7, tpm=10 ** 10, base_delay=args.retry_base_delay)
+
+    results = {}
+    try:
+        for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+            results[name] = run_scenario(SCENARIOS[name], corpus, args.concurrency)
+    finally:
+        server.stop()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git": _git_revision(),
+            "python": platform.python_version(),
+            "profile": args.profile,
+            "resumes": args.resumes,
+            "pages": args.pages,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+        "server": dict(server.stats),
+        "scheduler": gemini_backend.scheduler.snapshot(),
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.max_regression):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
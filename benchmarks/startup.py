@@ -0,0 +1,90 @@
+"""
+Cold-start benchmark: how long a fresh process takes to import the backend
+and to render the HOME page, with the genai client built lazily (current
+behaviour) or eagerly before the first run (the old import-time client).
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --runs 5 --out startup.json
+
+Every sample runs in its own interpreter so module caches never carry over.
+The page render uses Streamlit's AppTest, which runs app.py headless.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each snippet prints one JSON object on its last line
+IMPORT_SNIPPET = """
+import sys, json, time
+started = time.perf_counter()
+import gemini_backend
+imported = time.perf_counter()
+sdk_loaded = "google.genai" in sys.modules
+gemini_backend.get_client()
+done = time.perf_counter()
+print(json.dumps({"import_ms": (imported - started) * 1000, "client_ms": (done - imported) * 1000,
+                  "sdk_loaded_on_import": sdk_loaded}))
+"""
+
+PAINT_SNIPPET = """
+import json, time
+started = time.perf_counter()
+if {eager}:
+    import gemini_backend
+    gemini_backend.get_client()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("app.py", default_timeout=120).run()
+print(json.dumps({{"paint_ms": (time.perf_counter() - started) * 1000, "ok": not app.exception}}))
+"""
+
+
+def _sample(snippet):
+    out = subprocess.run([sys.executable, "-c", snippet], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _summary(values):
+    return {
+        "median_ms": round(statistics.median(values), 1),
+        "min_ms": round(min(values), 1),
+        "max_ms": round(max(values), 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per measurement")
+    parser.add_argument("--out", help="Write the JSON report here as well as stdout")
+    args = parser.parse_args(argv)
+
+    imports = [_sample(IMPORT_SNIPPET) for _ in range(args.runs)]
+    lazy = [_sample(PAINT_SNIPPET.format(eager=False)) for _ in range(args.runs)]
+    eager = [_sample(PAINT_SNIPPET.format(eager=True)) for _ in range(args.runs)]
+
+    report = {
+        "runs": args.runs,
+        "backend_import": _summary([s["import_ms"] for s in imports]),
+        "first_client": _summary([s["client_ms"] for s in imports]),
+        "sdk_loaded_on_import": any(s["sdk_loaded_on_import"] for s in imports),
+        "first_paint_lazy": _summary([s["paint_ms"] for s in lazy]),
+        "first_paint_eager": _summary([s["paint_ms"] for s in eager]),
+        "render_errors": sum(1 for s in lazy + eager if not s["ok"]),
+    }
+    report["first_paint_saved_ms"] = round(
+        report["first_paint_eager"]["median_ms"] - report["first_paint_lazy"]["median_ms"], 1)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from config import CANDIDATE_DB_PATH
+
+# Columns returned by search(), in display order
+CANDIDATE_COLUMNS = ["name", "score", "suggestedRole", "skillsFound", "strengths", "weaknesses",
+                     "summary", "source", "updated", "key"]
+
+
+def candidate_key(file_bytes):
+    """
+    One row per resume file: re-analyzing the same file updates its row.
+    """
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def _fts_query(text, column=None):
+    """
+    User text -> safe FTS5 query: every word quoted (prefix match), all required.
+    """
+    terms = re.findall(r"\w+", text or "")
+    prefix = f"{column}:" if column else ""
+    return " AND ".join(f'{prefix}"{t}"*' for t in terms)
+
+
+class CandidateStore:
+    """
+    Persistent analysis results in SQLite. Role and score are indexed; summary
+    and skills get an FTS5 full-text index (plain LIKE if FTS5 is missing).
+    Safe to share between threads and Streamlit sessions.
+    """
+
+    def __init__(self, path=CANDIDATE_DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS candidates (
+                id INTEGER PRIMARY KEY,
+                key TEXT UNIQUE NOT NULL,
+                name TEXT,
+                score INTEGER,
+                role TEXT,
+                role_norm TEXT,
+                summary TEXT,
+                skills TEXT,
+                strengths TEXT,
+                weaknesses TEXT,
+                data TEXT NOT NULL,
+                source TEXT,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_role ON candidates(role_norm, score)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_candidates_score ON candidates(score)")
+        self.fts = self._create_fts()
+        self._conn.commit()
+
+    def _create_fts(self):
+        try:
+            self._conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts
+                USING fts5(summary, skills, content='candidates', content_rowid='id')
+            """)
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 unavailable, candidate text search falls back to LIKE: {e}")
+            return False
+        # External-content table: keep it in step with candidates
+        self._conn.executescript("""
+            CREATE TRIGGER IF NOT EXISTS candidates_ai AFTER INSERT ON candidates BEGIN
+                INSERT INTO candidates_fts(rowid, summary, skills) VALUES (new.id, new.summary, new.skills);
+            END;
+            CREATE TRIGGER IF NOT EXISTS candidates_ad AFTER DELETE ON candidates BEGIN
+                INSERT INTO candidates_fts(candidates_fts, rowid, summary, skills)
+                VALUES ('delete', old.id, old.summary, old.skills);
+            END;
+            CREATE TRIGGER IF NOT EXISTS candidates_au AFTER UPDATE ON candidates BEGIN
+                INSERT INTO candidates_fts(candidates_fts, rowid, summary, skills)
+                VALUES ('delete', old.id, old.summary, old.skills);
+                INSERT INTO candidates_fts(rowid, summary, skills) VALUES (new.id, new.summary, new.skills);
+            END;
+        """)
+        return True
+
+    def _upsert(self, result, key, source, now):
+        role = result.get("suggestedRole") or ""
+        skills = result.get("skillsFound") or []
+        self._conn.execute("""
+            INSERT INTO candidates (name, score, role, role_norm, summary, skills, strengths,
+                                    weaknesses, data, source, created, updated, key)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                name = excluded.name, score = excluded.score, role = excluded.role,
+                role_norm = excluded.role_norm, summary = excluded.summary, skills = excluded.skills,
+                strengths = excluded.strengths, weaknesses = excluded.weaknesses, data = excluded.data,
+                source = CASE WHEN excluded.source != '' THEN excluded.source ELSE candidates.source END,
+                updated = excluded.updated
+        """, (
+            result.get("name") or "", int(result.get("score") or 0), role, role.strip().lower(),
+            result.get("summary") or "", ", ".join(str(s) for s in skills),
+            json.dumps(result.get("strengths") or []), json.dumps(result.get("weaknesses") or []),
+            json.dumps(result), source, now, now, key,
+        ))
+
+    def save(self, result, key, source=""):
+        """
+        Inserts or updates one analyze_resume result.
+        """
+        if result:
+            self.save_many([(result, key, source)])
+
+    def save_many(self, items):
+        """
+        items: iterable of (result, key, source), written in one transaction.
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                for result, key, source in items:
+                    if result:
+                        self._upsert(result, key, source, now)
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def get(self, key):
+        """
+        The full stored result for a key, or None.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM candidates WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM candidates WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def iter_all(self, batch_size=500):
+        """
+        Every stored candidate (as search() rows), read in batches by id.
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute("SELECT * FROM candidates WHERE id > ? ORDER BY id LIMIT ?",
+                                          (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1]["id"]
+            for row in rows:
+                yield self._to_dict(row)
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def roles(self):
+        """
+        [(role, count)] most common first, for filter dropdowns.
+        """
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT MIN(role) AS role, COUNT(*) AS n FROM candidates
+                WHERE role_norm != '' GROUP BY role_norm ORDER BY n DESC, role_norm
+            """).fetchall()
+        return [(r["role"], r["n"]) for r in rows]
+
+    def search(self, text=None, role=None, min_score=None, max_score=None, skills=None, limit=50, offset=0,
+               role_prefix=False):
+        """
+        Filters stored candidates, best score first.
+        text matches summary or skills; skills (list) must all appear in skills;
+        role is a case-insensitive exact match, or a prefix match with role_prefix=True
+        ("Data Analyst" then also finds "Data Analyst Intern").
+        """
+        where, params = [], []
+        terms = []
+        if text and _fts_query(text):
+            terms.append(("", text))
+        for skill in skills or []:
+            if _fts_query(skill):
+                terms.append(("skills", skill))
+        if terms and self.fts:
+            match = " AND ".join(f"({_fts_query(value, column or None)})" for column, value in terms)
+            where.append("c.id IN (SELECT rowid FROM candidates_fts WHERE candidates_fts MATCH ?)")
+            params.append(match)
+        else:
+            for column, value in terms:
+                if column:
+                    where.append("c.skills LIKE ?")
+                    params.append(f"%{value}%")
+                else:
+                    where.append("(c.summary LIKE ? OR c.skills LIKE ?)")
+                    params += [f"%{value}%", f"%{value}%"]
+        if role and role_prefix:
+            # Prefix range on the role index
+            prefix = role.strip().lower()
+            where.append("c.role_norm >= ? AND c.role_norm < ?")
+            params += [prefix, prefix + "\U0010ffff"]
+        elif role:
+            where.append("c.role_norm = ?")
+            params.append(role.strip().lower())
+        if min_score is not None:
+            where.append("c.score >= ?")
+            params.append(int(min_score))
+        if max_score is not None:
+            where.append("c.score <= ?")
+            params.append(int(max_score))
+
+        sql = "SELECT * FROM candidates c"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY c.score DESC, c.updated DESC LIMIT ? OFFSET ?"
+        params += [int(limit), int(offset)]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    @staticmethod
+    def _to_dict(row):
+        return {
+            "key": row["key"],
+            "name": row["name"],
+            "score": row["score"],
+            "suggestedRole": row["role"],
+            "skillsFound": [s for s in row["skills"].split(", ") if s],
+            "strengths": json.loads(row["strengths"]),
+            "weaknesses": json.loads(row["weaknesses"]),
+            "summary": row["summary"],
+            "source": row["source"],
+            "updated": row["updated"],
+        }
+
+
+# Shared by every session in this process
+candidate_store = CandidateStore()
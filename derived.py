@@ -0,0 +1,170 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from templates import FIELDS as TEMPLATE_FIELDS
+
+
+def _fingerprint(value):
+    payload = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class Artifact:
+    """
+    Something computed from resume_data. fields: the resume_data keys it
+    reads. compute(data, *args) returns the value; None for artifacts that
+    are only stored with put() (e.g. streamed or user-triggered results).
+    """
+
+    def __init__(self, name, fields, compute=None):
+        self.name = name
+        self.fields = tuple(fields)
+        self.compute = compute
+
+
+class DerivedData:
+    """
+    Values derived from one resume_data dict (improvements, rendered
+    templates, rankings...). Each value remembers the fields it was computed
+    from and is reused until one of them, or one of its extra arguments,
+    changes. Recomputing is lazy: an edit only marks values stale, the next
+    get() pays for it, and values nobody asks for again cost nothing.
+    """
+
+    def __init__(self, max_entries=64):
+        self.artifacts = {}
+        self.max_entries = max_entries
+        # (name, args fingerprint) -> ({field: fingerprint}, value)
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"computed": 0, "reused": 0}
+
+    def define(self, name, fields, compute=None):
+        self.artifacts[name] = Artifact(name, fields, compute)
+        return self.artifacts[name]
+
+    def _slot(self, name, args):
+        return name, _fingerprint(args) if args else ""
+
+    def _inputs(self, name, data):
+        return {field: _fingerprint((data or {}).get(field)) for field in self.artifacts[name].fields}
+
+    def stale_fields(self, name, data, *args):
+        """
+        The fields that changed since the value was stored: [] while it is
+        fresh, None if there is no value at all.
+        """
+        with self._lock:
+            entry = self._values.get(self._slot(name, args))
+        if entry is None:
+            return None
+        inputs = self._inputs(name, data)
+        return [field for field, fp in inputs.items() if entry[0].get(field) != fp]
+
+    def is_fresh(self, name, data, *args):
+        return self.stale_fields(name, data, *args) == []
+
+    def peek(self, name, data, *args):
+        """
+        The stored value if it is still fresh, else None. Never computes.
+        """
+        slot = self._slot(name, args)
+        inputs = self._inputs(name, data)
+        with self._lock:
+            entry = self._values.get(slot)
+            if entry is None or entry[0] != inputs:
+                return None
+            self._values.move_to_end(slot)
+            self.stats["reused"] += 1
+            return entry[1]
+
+    def put(self, name, data, value, *args):
+        slot = self._slot(name, args)
+        inputs = self._inputs(name, data)
+        with self._lock:
+            self._values[slot] = (inputs, value)
+            self._values.move_to_end(slot)
+            while len(self._values) > self.max_entries:
+                self._values.popitem(last=False)
+        return value
+
+    def get(self, name, data, *args):
+        """
+        The value for data and args, recomputed only if a field it depends on changed.
+        """
+        value = self.peek(name, data, *args)
+        if value is not None:
+            return value
+        artifact = self.artifacts[name]
+        if artifact.compute is None:
+            return None
+        value = artifact.compute(data, *args)
+        with self._lock:
+            self.stats["computed"] += 1
+        if value is not None:
+            self.put(name, data, value, *args)
+        return value
+
+    def clear(self, name=None):
+        with self._lock:
+            for slot in [s for s in self._values if name is None or s[0] == name]:
+                del self._values[slot]
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, entries=len(self._values))
+
+
+def _improvements(data):
+    from gemini_backend import suggest_improvements
+    weaknesses = data.get("weaknesses", [])
+    return suggest_improvements(weaknesses) if weaknesses else []
+
+
+def _job_query(data):
+    from job_cache import clean_job_title
+    return clean_job_title(data.get("suggestedRole", ""))
+
+
+def _job_ranking(data, sources, query):
+    from job_ranking import rank_jobs
+    return rank_jobs(sources, data.get("skillsFound", []), query)
+
+
+def _template_html(data, template_id):
+    from templates import get_template_html
+    return get_template_html(template_id, data)
+
+
+def _template_pdf(data, template_id):
+    from pdf_export import export_pdf
+    return export_pdf(template_id, data)
+
+
+def _similar_jobs(data, key, exclude, index_size):
+    # index_size is only part of the arguments, so newly indexed jobs count as a change
+    from matching import get_matcher
+    matches = get_matcher().jobs_for_candidate(key, data, k=5, exclude=set(exclude))
+    return [m for m in matches if m[1] > 0]
+
+
+def resume_artifacts():
+    """
+    The derived data the app keeps per session, with the resume_data fields
+    each artifact reads.
+    """
+    derived = DerivedData()
+    # Model call: only when the weaknesses change, never for name/role/summary edits
+    derived.define("improvements", ("weaknesses",), _improvements)
+    derived.define("job_query", ("suggestedRole",), _job_query)
+    # Put-only: a search is a user action; a new target role only marks it stale
+    derived.define("job_search", ("suggestedRole",))
+    derived.define("job_ranking", ("skillsFound",), _job_ranking)
+    template_fields = [key for key, _ in TEMPLATE_FIELDS.values()]
+    derived.define("template_html", template_fields, _template_html)
+    derived.define("template_pdf", template_fields, _template_pdf)
+    # The fields matching.candidate_text embeds
+    derived.define("similar_jobs", ("suggestedRole", "skillsFound", "summary"), _similar_jobs)
+    return derived
@@ -1,82 +1,406 @@
 import os
 import json
-import google.genai as genai
-from google.genai import types
-from config import API_KEY
+import asyncio
+import hashlib
+import threading
+import urllib.error
+import urllib.request
+from urllib.parse import urljoin, urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from config import (API_KEY, REQUEST_TIMEOUT, LOCAL_TEXT_EXTRACTION, EMBEDDING_MODEL, EMBEDDING_DIM,
+                    EMBEDDING_BATCH, CACHE_BACKEND, EXTRACTION_MODEL, LISTING_CACHE_PATH, LISTING_CACHE_TTL,
+                    LISTING_RESOLVE_TIMEOUT)
+from result_cache import build_cache, make_key
+from scheduler import RequestScheduler, QuotaExceededError, INTERACTIVE, BACKGROUND
+from text_extraction import prepare_payload, payload_log
+from preprocess import preprocess_upload, preprocess_log, check_upload, PREPROCESS_VERSION, UploadRejected
+from job_cache import JobSearchCache
+from prompts import ANALYSIS, ANALYSIS_WITH_IMPROVEMENTS, IMPROVEMENTS, JOBS, LISTINGS, context_cache
+from singleflight import SingleFlight
+from metrics import registry, observe_gemini_call
+from skills import normalize_role, normalize_skills
 #from dotenv import load_dotenv
 
 # Load API Key
 
 # Initialize Client - YAHI CHANGE HAI
-client = genai.Client(api_key=API_KEY)
+# Built on first use, not at import: importing google.genai and constructing
+# the client costs about a second, which the HOME page should never pay.
+# client.models is the blocking surface, client.aio.models the asyncio one.
+# Both reuse this client's pooled HTTP connections.
+_client = None
+_client_lock = threading.Lock()
 
-def analyze_resume(file_bytes, mime_type):
+def get_client():
+    """
+    The process-wide genai.Client, created once on first call (thread-safe).
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import google.genai as genai
+                _client = genai.Client(api_key=API_KEY)
+    return _client
+
+def set_client(new_client):
+    """
+    Replaces the shared client, e.g. with one pointed at the benchmark fake server.
+    """
+    global _client
+    with _client_lock:
+        _client = new_client
+
+def warm_up():
+    """
+    Builds the client on a background thread so the first analysis doesn't pay for it.
+    """
+    thread = threading.Thread(target=get_client, daemon=True)
+    thread.start()
+    return thread
+
+def __getattr__(name):
+    # Keeps `gemini_backend.client` working without building it at import time
+    if name == "client":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+MODEL_NAME = 'gemini-2.5-flash'
+
+# Bump whenever post-processing of the analysis changes. Prompt and schema
+# edits change the prompt key (prompts.py), which is part of the cache key too.
+ANALYSIS_PARSER_VERSION = "4"
+
+# Shared by every session in this process
+analysis_cache = build_cache()
+# Parsed job listing per source URL ({} = not a job listing), shared across searches
+listing_cache = build_cache(CACHE_BACKEND, LISTING_CACHE_PATH, LISTING_CACHE_TTL, "listings")
+
+# Every Gemini call goes through this: rate limits, retries, circuit breaker,
+# per-tenant budgets and fair queuing
+scheduler = RequestScheduler()
+
+# Someone is waiting on analyses; job searches can queue behind them.
+# tenant_scope(priority=...) overrides this, e.g. for batch runs.
+OP_PRIORITY = {"analyze": INTERACTIVE, "improve": INTERACTIVE, "jobs": BACKGROUND, "extract": BACKGROUND,
+               "embed": BACKGROUND}
+
+# Identical calls running at the same time (double clicks, reruns, other
+# sessions) share one upstream request
+single_flight = SingleFlight()
+
+def _analysis_key(file_bytes, mime_type, include_improvements=False):
+    # Preprocessing, text extraction and one-shot mode change the request, so they are part of the key
+    prompt = ANALYSIS_WITH_IMPROVEMENTS if include_improvements else ANALYSIS
+    version = f"{prompt.key}+{ANALYSIS_PARSER_VERSION}+{PREPROCESS_VERSION}" + ("+text" if LOCAL_TEXT_EXTRACTION else "")
+    return make_key(file_bytes, mime_type, version, MODEL_NAME)
+
+def _improvements_key(weaknesses):
+    return hashlib.sha256(json.dumps(weaknesses).encode("utf-8")).hexdigest()
+
+def get_cached_analysis(file_bytes, mime_type, include_improvements=False):
+    """
+    Returns the cached analysis for this exact file, or None.
+    """
+    return analysis_cache.get(_analysis_key(file_bytes, mime_type, include_improvements))
+
+# --- Request Builders & Parsers (shared by the sync and async APIs) ---
+
+def _prompt_config(prompt, model, **kwargs):
+    """
+    GenerateContentConfig for a registered prompt: its schema, and its static
+    instructions either from the provider context cache or as the system
+    instruction - always ahead of the per-call content, so the prefix is shared.
+    """
+    from google.genai import types
+    cached = context_cache.name_for(prompt, model, get_client())
+    if cached:
+        kwargs["cached_content"] = cached
+    elif prompt.instructions:
+        kwargs["system_instruction"] = prompt.instructions
+    if prompt.schema:
+        kwargs.update(response_mime_type="application/json", response_schema=prompt.schema)
+    return types.GenerateContentConfig(**kwargs)
+
+def _analysis_request(file_bytes, mime_type, include_improvements=False, pdf=None):
+    """
+    (request, preprocess stats). pdf: the PdfReader from check_upload, reused
+    by every step so the PDF is parsed once.
+    """
+    from google.genai import types
+    prompt = ANALYSIS_WITH_IMPROVEMENTS if include_improvements else ANALYSIS
+
+    # Downscaled image / trimmed PDF; raises UploadRejected over the limits
+    file_bytes, mime_type, stats = preprocess_upload(file_bytes, mime_type, pdf)
+    parts = []
+    if LOCAL_TEXT_EXTRACTION:
+        # Send extracted text instead of the whole PDF, bytes only for scanned pages
+        pages = pdf.pages[:stats["pages_after"]] if pdf is not None else None
+        payload = prepare_payload(file_bytes, mime_type, pages)
+        if payload["text"]:
+            parts.append(types.Part.from_text(text="RESUME TEXT (extracted from the PDF):\n" + payload["text"]))
+        if payload["file_bytes"]:
+            parts.append(types.Part.from_bytes(data=payload["file_bytes"], mime_type=payload["mime_type"]))
+    else:
+        parts.append(types.Part.from_bytes(data=file_bytes, mime_type=mime_type))
+
+    return dict(
+        model=MODEL_NAME,
+        contents=[types.Content(role="user", parts=parts)],
+        config=_prompt_config(prompt, MODEL_NAME)
+    ), stats
+
+def _parse_analysis(response, stats=None):
+    if response.text:
+        result = json.loads(response.text)
+
+        # The model only saw the first pages - the UI says so next to the score
+        if stats and stats.get("trimmed_pages"):
+            result['trimmedPages'] = stats["trimmed_pages"]
+
+        # CLEAN THE JOB TITLE - Remove extra descriptions, use the canonical spelling
+        if 'suggestedRole' in result:
+            result['suggestedRole'] = normalize_role(result['suggestedRole'])
+        # "JS", "Javascript (ES6)" -> "JavaScript", so caching, search and ranking see one name
+        if 'skillsFound' in result:
+            result['skillsFound'] = normalize_skills(result['skillsFound'])
+
+        return result
+    return None
+
+def _improvements_request(weaknesses):
+    return dict(
+        model=MODEL_NAME,
+        contents=IMPROVEMENTS.render(weaknesses=json.dumps(weaknesses)),
+        config=_prompt_config(IMPROVEMENTS, MODEL_NAME)
+    )
+
+def _parse_improvements(response):
+    if response.text:
+        data = json.loads(response.text)
+        return data.get("improvements", [])
+    return []
+
+def _jobs_request(query, location, mode):
+    from google.genai import types
+    mode_clause = f" The job type must be {mode}." if mode and mode != "Any" else ""
+    return dict(
+        model=MODEL_NAME,
+        contents=JOBS.render(query=query, location=location, mode_clause=mode_clause),
+        config=_prompt_config(JOBS, MODEL_NAME, tools=[types.Tool(google_search=types.GoogleSearch())])
+    )
+
+def _listings_request(text, sources):
+    from google.genai import types
+    # Grounded search cannot use a response schema, so the records come from a
+    # second pass over the search answer and its numbered sources
+    numbered = "\n".join(
+        f"[{i}] {s['title']} | {s['url']} | {s.get('snippet', '')}" for i, s in enumerate(sources)
+    )
+    return dict(
+        model=EXTRACTION_MODEL,
+        contents=LISTINGS.render(text=text[:6000], sources=numbered),
+        # Copying fields out of text needs no reasoning
+        config=_prompt_config(LISTINGS, EXTRACTION_MODEL, thinking_config=types.ThinkingConfig(thinking_budget=0))
+    )
+
+def _parse_listings(response, sources):
+    """
+    Returns {source url: record}; sources the model skipped are missing.
+    """
+    parsed = {}
+    if response.text:
+        for item in json.loads(response.text).get("listings", []):
+            index = item.get("source")
+            if not isinstance(index, int) or not 0 <= index < len(sources):
+                continue
+            if not item.get("isJobListing"):
+                parsed[sources[index]["url"]] = {}
+                continue
+            parsed[sources[index]["url"]] = {
+                "title": (item.get("title") or sources[index]["title"]).strip(),
+                "company": (item.get("company") or "").strip(),
+                "location": (item.get("location") or "").strip(),
+                "mode": item.get("mode") if item.get("mode") in ("Remote", "Hybrid", "On-site") else "",
+                "posted": (item.get("posted") or "").strip(),
+            }
+    return parsed
+
+def _embed_request(texts, task_type):
+    from google.genai import types
+    return dict(
+        model=EMBEDDING_MODEL,
+        contents=list(texts),
+        config=types.EmbedContentConfig(task_type=task_type, output_dimensionality=EMBEDDING_DIM)
+    )
+
+def _grounding_sources(response):
+    # Parse Grounding Metadata to get links
+    sources = []
+    if response.candidates and response.candidates[0].grounding_metadata:
+        metadata = response.candidates[0].grounding_metadata
+        chunks = metadata.grounding_chunks or []
+        # The answer sentences that cite each chunk make a better snippet than a placeholder
+        cited = {}
+        for support in metadata.grounding_supports or []:
+            if support.segment and support.segment.text:
+                for index in support.grounding_chunk_indices or []:
+                    cited.setdefault(index, []).append(support.segment.text.strip())
+        for index, chunk in enumerate(chunks):
+            if chunk.web:
+                sources.append({
+                    "title": chunk.web.title,
+                    "company": "External Site",
+                    "url": chunk.web.uri,
+                    "snippet": " ".join(cited.get(index, [])) or "Click to view details"
+                })
+    return sources
+
+def _parse_jobs(response):
+    return {"text": response.text, "sources": _grounding_sources(response)}
+
+def _complete_json_strings(buffer):
+    """
+    Returns the fully received string items of the first JSON array in a
+    partial JSON document, e.g. '{"improvements": ["a", "b' -> ["a"].
+    """
+    start = buffer.find('[')
+    if start == -1:
+        return []
+    decoder = json.JSONDecoder()
+    items = []
+    i = start + 1
+    while True:
+        while i < len(buffer) and buffer[i] in ' \r\n\t,':
+            i += 1
+        if i >= len(buffer) or buffer[i] != '"':
+            return items
+        try:
+            value, i = decoder.raw_decode(buffer, i)
+        except json.JSONDecodeError:
+            return items
+        items.append(value)
+
+# --- Scheduled Calls ---
+
+def _estimate_tokens(request):
+    """
+    Rough input token count used to book the tokens/min bucket before the call.
+    The bucket is corrected with the real usage_metadata afterwards.
+    """
+    contents = request["contents"]
+    # Context-cached instructions still count against the tokens/min limit
+    instructions = len(getattr(request.get("config"), "system_instruction", None) or "") // 4
+    if isinstance(contents, str):
+        return len(contents) // 4 + instructions + 500
+    tokens = 500 + instructions
+    for content in contents:
+        for part in content.parts or []:
+            if part.text:
+                tokens += len(part.text) // 4
+            elif part.inline_data:
+                # ~258 tokens per PDF page / image tile; assume a few pages
+                tokens += 258 * 4
+    return tokens
+
+def _request_bytes(request):
+    contents = request["contents"]
+    size = len((getattr(request.get("config"), "system_instruction", None) or "").encode("utf-8"))
+    if isinstance(contents, str):
+        return size + len(contents.encode("utf-8"))
+    for content in contents:
+        for part in content.parts or []:
+            if part.text:
+                size += len(part.text.encode("utf-8"))
+            elif part.inline_data:
+                size += len(part.inline_data.data or b"")
+    return size
+
+def _generate(request, op):
+    estimated = _estimate_tokens(request)
+    with observe_gemini_call(op, _request_bytes(request)) as call:
+        response = scheduler.call(
+            lambda: get_client().models.generate_content(**request),
+            estimated,
+            on_retry=call.retry,
+            priority=OP_PRIORITY.get(op)
+        )
+        call.first_byte()
+        call.usage(response)
+    return response
+
+def _generate_stream(request, op):
+    """
+    Streams response chunks. The scheduler covers opening the stream and the
+    first chunk (so 429s still get retried); later chunks are passed through.
+    """
+    estimated = _estimate_tokens(request)
+
+    def open_stream():
+        stream = get_client().models.generate_content_stream(**request)
+        return next(stream, None), stream
+
+    with observe_gemini_call(op, _request_bytes(request)) as call:
+        first, stream = scheduler.call(open_stream, estimated, on_retry=call.retry,
+                                       priority=OP_PRIORITY.get(op))
+        call.first_byte()
+        last = first
+        if first is not None:
+            yield first
+            for chunk in stream:
+                last = chunk
+                yield chunk
+        if last is not None:
+            # usage_metadata on the last chunk covers the whole stream
+            call.usage(last)
+            scheduler.settle(last, estimated)
+
+async def _generate_async(request, op):
+    estimated = _estimate_tokens(request)
+    with observe_gemini_call(op, _request_bytes(request)) as call:
+        response = await scheduler.call_async(
+            lambda: get_client().aio.models.generate_content(**request),
+            estimated,
+            on_retry=call.retry,
+            priority=OP_PRIORITY.get(op)
+        )
+        call.first_byte()
+        call.usage(response)
+    return response
+
+# --- Sync API ---
+
+def analyze_resume(file_bytes, mime_type, check_cache=True, include_improvements=False):
     """
     Analyzes the resume using Gemini 2.5 Flash.
     Returns a structured dictionary.
+    Results are cached by file content, so re-uploads skip the model call.
+    Pass check_cache=False if get_cached_analysis was already tried.
+    include_improvements=True also returns "improvements" (one tip per weakness)
+    from the same call, saving the separate suggest_improvements round trip.
     """
-    prompt = """
-    You are an expert HR Resume Screener. Analyze the attached resume.
-    Provide a structured JSON response with:
-    1. The candidate's full name (Extract carefully from the header).
-    2. A score from 0-100 based on professional standards.
-    3. A brief professional summary of the candidate (Write in implied first-person "Resume Voice", e.g., "Ambitious Software Engineer...", do NOT use "He is" or "The candidate is").
-    4. Top 3 strengths.
-    5. Top 3 weaknesses or areas for improvement.
-    6. The most suitable job role for this profile - provide ONLY ONE CLEAR JOB TITLE like "Frontend Developer", "Data Analyst", "Marketing Manager" etc. Keep it short and industry standard.
-    7. A list of technical and soft skills found.
+    # Over-limit uploads fail here, before any lookup or model call
+    pdf = check_upload(file_bytes, mime_type)
+    cache_key = _analysis_key(file_bytes, mime_type, include_improvements)
+    if check_cache:
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
-    IMPORTANT: For job role, return only one concise job title that best matches the candidate's experience. Do not add descriptions or multiple roles.
-    """
+    def generate():
+        request, stats = _analysis_request(file_bytes, mime_type, include_improvements, pdf)
+        return _generate(request, "analyze"), stats
 
     try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=[
-                types.Content(
-                    parts=[
-                        types.Part.from_bytes(data=file_bytes, mime_type=mime_type),
-                        types.Part.from_text(text=prompt)
-                    ]
-                )
-            ],
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json",
-                response_schema={
-                    "type": "OBJECT",
-                    "properties": {
-                        "name": {"type": "STRING"},
-                        "score": {"type": "NUMBER"},
-                        "summary": {"type": "STRING"},
-                        "strengths": {"type": "ARRAY", "items": {"type": "STRING"}},
-                        "weaknesses": {"type": "ARRAY", "items": {"type": "STRING"}},
-                        "suggestedRole": {"type": "STRING"},
-                        "skillsFound": {"type": "ARRAY", "items": {"type": "STRING"}}
-                    }
-                }
-            )
-        )
-        
-        if response.text:
-            result = json.loads(response.text)
-            
-            # CLEAN THE JOB TITLE - Remove extra descriptions
-            if 'suggestedRole' in result:
-                role = result['suggestedRole']
-                # Keep only the main job title (first part before any comma or lengthy description)
-                if ',' in role:
-                    role = role.split(',')[0]
-                if ' with ' in role:
-                    role = role.split(' with ')[0]
-                if ' - ' in role:
-                    role = role.split(' - ')[0]
-                # Remove extra words and keep it clean
-                role = role.strip()
-                result['suggestedRole'] = role
-            
-            return result
-        return None
+        response, stats = single_flight.do("analyze:" + cache_key, generate)
+        result = _parse_analysis(response, stats)
+        if result:
+            analysis_cache.set(cache_key, result)
+        return result
 
+    except (QuotaExceededError, UploadRejected):
+        # The caller shows this to the user instead of a generic failure
+        raise
     except Exception as e:
         print(f"Error in analysis: {e}")
         return None
@@ -85,35 +409,12 @@ def suggest_improvements(weaknesses):
     """
     Generates actionable fixes for the detected weaknesses.
     """
-    prompt = f"""
-    You are a career coach. For each of the following resume weaknesses, provide one specific, actionable tip on how to fix it or phrase it better.
-    Weaknesses: {json.dumps(weaknesses)}
-    
-    Return a JSON object with a property "improvements" which is an array of strings. The order must match the input.
-    """
-
     try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type="application/json",
-                response_schema={
-                    "type": "OBJECT",
-                    "properties": {
-                        "improvements": {
-                            "type": "ARRAY",
-                            "items": {"type": "STRING"}
-                        }
-                    }
-                }
-            )
+        response = single_flight.do(
+            "improve:" + _improvements_key(weaknesses),
+            lambda: _generate(_improvements_request(weaknesses), "improve")
         )
-
-        if response.text:
-            data = json.loads(response.text)
-            return data.get("improvements", [])
-        return []
+        return _parse_improvements(response)
     except Exception as e:
         print(f"Error in improvements: {e}")
         return []
@@ -122,36 +423,297 @@ def find_jobs(query, location, mode):
     """
     Uses Gemini with Google Search Grounding to find real-time jobs.
     """
-    search_prompt = f'Find active job listings for "{query}" in "{location}".'
-    if mode and mode != "Any":
-        search_prompt += f" The job type must be {mode}."
-    
-    search_prompt += " List 5 specific job openings with company names. Focus on jobs posted in the last 30 days."
+    try:
+        response = _generate(_jobs_request(query, location, mode), "jobs")
+        return _parse_jobs(response)
+
+    except QuotaExceededError as e:
+        return {"text": str(e), "sources": []}
+    except Exception as e:
+        print(f"Error in job search: {e}")
+        return {"text": "Error fetching jobs.", "sources": []}
+
+# Grounding source URIs are one-time redirects through this host: a new URI
+# per response for the same posting. The posting's own URL is behind them.
+GROUNDING_REDIRECT_HOSTS = ("vertexaisearch.cloud.google.com",)
 
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args):
+        return None
+
+def _resolve_url(url, timeout=LISTING_RESOLVE_TIMEOUT):
+    """
+    The URL a grounding redirect points to, read from its Location header
+    (the posting itself is not fetched). Other URLs and failures: unchanged.
+    """
+    if urlsplit(url).hostname not in GROUNDING_REDIRECT_HOSTS:
+        return url
     try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=search_prompt,
-            config=types.GenerateContentConfig(
-                tools=[types.Tool(google_search=types.GoogleSearch())]
+        urllib.request.build_opener(_NoRedirect).open(urllib.request.Request(url, method="HEAD"),
+                                                       timeout=timeout).close()
+    except urllib.error.HTTPError as e:
+        if 300 <= e.code < 400 and e.headers.get("Location"):
+            return urljoin(url, e.headers["Location"])
+    except Exception as e:
+        print(f"Error resolving {url}: {e}")
+    return url
+
+def _resolve_sources(sources):
+    from job_ingest import normalize_url
+    urls = [s["url"] for s in sources]
+    if any(urlsplit(u).hostname in GROUNDING_REDIRECT_HOSTS for u in urls):
+        with ThreadPoolExecutor(max_workers=min(8, len(urls)), thread_name_prefix="resolve") as pool:
+            urls = list(pool.map(_resolve_url, urls))
+    return [dict(s, url=normalize_url(u) or u) for s, u in zip(sources, urls)]
+
+def _listing_key(url):
+    return make_key(url.encode("utf-8"), "listing", LISTINGS.key, EXTRACTION_MODEL)
+
+def extract_listings(result):
+    """
+    Typed records for the sources of a find_jobs result: a list of
+    {"title", "company", "location", "mode", "posted", "url", "snippet"}.
+
+    Grounding redirects are resolved to the posting's own URL, and each
+    posting is parsed once and cached under it, so repeated and overlapping
+    searches only send new postings to EXTRACTION_MODEL. Sources that are
+    not job openings are dropped, and the same opening (normalized title,
+    company and location) found under several URLs is kept once. Sources
+    that could not be parsed keep their title and empty fields.
+    """
+    from job_ingest import normalize_company, normalize_location
+    sources = [s for s in (result or {}).get("sources", []) if s.get("url")]
+    if not sources:
+        return []
+    sources = _resolve_sources(sources)
+    parsed = {}
+    missing = {}
+    for source in sources:
+        cached = listing_cache.get(_listing_key(source["url"]))
+        if cached is None:
+            missing.setdefault(source["url"], source)
+        else:
+            parsed[source["url"]] = cached
+    if missing:
+        missing = list(missing.values())
+        try:
+            response = single_flight.do(
+                "extract:" + hashlib.sha256("\n".join(s["url"] for s in missing).encode("utf-8")).hexdigest(),
+                lambda: _generate(_listings_request(result.get("text") or "", missing), "extract")
+            )
+            fresh = _parse_listings(response, missing)
+        except QuotaExceededError as e:
+            print(f"Listing extraction skipped: {e}")
+            fresh = {}
+        except Exception as e:
+            print(f"Error extracting listings: {e}")
+            fresh = {}
+        for url, record in fresh.items():
+            listing_cache.set(_listing_key(url), record)
+        parsed.update(fresh)
+
+    records = []
+    seen = set()
+    for source in sources:
+        record = parsed.get(source["url"])
+        if record == {}:
+            continue
+        # Not parsed: keep the source as it was found
+        record = record or {"title": source["title"], "company": "", "location": "", "mode": "", "posted": ""}
+        identity = (record["title"].casefold(), normalize_company(record["company"]).casefold(),
+                    normalize_location(record["location"]).casefold())
+        if source["url"] in seen or (record["company"] and identity in seen):
+            continue
+        seen.update((source["url"], identity))
+        records.append(dict(record, url=source["url"], snippet=source.get("snippet", "")))
+    return records
+
+def embed_texts(texts, task_type="SEMANTIC_SIMILARITY"):
+    """
+    Embeds texts with EMBEDDING_MODEL, EMBEDDING_BATCH texts per call.
+    Returns one list of EMBEDDING_DIM floats per text. Errors are raised,
+    so callers can simply try the same texts again later.
+    """
+    vectors = []
+    for start in range(0, len(texts), EMBEDDING_BATCH):
+        request = _embed_request(texts[start:start + EMBEDDING_BATCH], task_type)
+        size = sum(len(t.encode("utf-8")) for t in request["contents"])
+        with observe_gemini_call("embed", size) as call:
+            response = scheduler.call(
+                lambda: get_client().models.embed_content(**request),
+                size // 4 + 1,
+                on_retry=call.retry,
+                priority=OP_PRIORITY["embed"]
             )
+        vectors.extend(embedding.values for embedding in response.embeddings)
+    return vectors
+
+# --- Streaming API ---
+# Each yield is a snapshot of everything received so far, so a UI can simply
+# re-render it. The last snapshot equals what the non-streaming call returns.
+
+def suggest_improvements_stream(weaknesses):
+    """
+    Streaming version of suggest_improvements.
+    Yields the list of improvements every time a new one is complete.
+    A caller joining an identical stream in flight gets only the final list.
+    """
+    yield from single_flight.stream(
+        "improve-stream:" + _improvements_key(weaknesses),
+        lambda: _stream_improvements(weaknesses)
+    )
+
+def _stream_improvements(weaknesses):
+    buffer = ""
+    improvements = []
+    try:
+        for chunk in _generate_stream(_improvements_request(weaknesses), "improve"):
+            buffer += chunk.text or ""
+            partial = _complete_json_strings(buffer)
+            if len(partial) > len(improvements):
+                improvements = partial
+                yield improvements
+        final = json.loads(buffer).get("improvements", []) if buffer else []
+        if final != improvements:
+            yield final
+    except Exception as e:
+        print(f"Error in improvements: {e}")
+        if not improvements:
+            yield []
+
+def find_jobs_stream(query, location, mode):
+    """
+    Streaming version of find_jobs.
+    Yields {"text", "sources"} snapshots as market insight text and
+    grounding sources arrive.
+    """
+    text = ""
+    sources = []
+    try:
+        for chunk in _generate_stream(_jobs_request(query, location, mode), "jobs"):
+            new_sources = _grounding_sources(chunk)
+            if chunk.text or new_sources:
+                text += chunk.text or ""
+                # Grounding metadata usually arrives once, near the end
+                seen = {s["url"] for s in sources}
+                sources = sources + [s for s in new_sources if s["url"] not in seen]
+                yield {"text": text, "sources": sources}
+    except QuotaExceededError as e:
+        yield {"text": str(e), "sources": []}
+    except Exception as e:
+        print(f"Error in job search: {e}")
+        if not text:
+            yield {"text": "Error fetching jobs.", "sources": []}
+
+# --- Job Search Cache ---
+# Popular searches cost one upstream call per freshness window, shared by all sessions
+job_search_cache = JobSearchCache(find_jobs, find_jobs_stream, version=JOBS.key)
+
+# --- Metrics Gauges (read at scrape time) ---
+registry.gauge("hireme_singleflight_coalesced", "Backend calls merged into an in-flight call",
+               lambda: single_flight.snapshot()["coalesced"])
+registry.gauge("hireme_job_cache_stale_hits", "Job searches served stale while refreshing",
+               lambda: job_search_cache.snapshot()["stale_hits"])
+registry.gauge("hireme_job_cache_coalesced", "Job searches that joined an identical in-flight search",
+               lambda: job_search_cache.snapshot()["coalesced"])
+registry.gauge("hireme_scheduler_throttled_seconds", "Seconds callers waited on rate limits",
+               lambda: scheduler.snapshot()["throttled_seconds"])
+registry.gauge("hireme_circuit_open", "1 while the Gemini circuit breaker is open",
+               lambda: scheduler.breaker.state == "open")
+registry.gauge("hireme_scheduler_busy_slots", "Gemini calls currently running",
+               lambda: scheduler.queue.snapshot()["busy"])
+registry.gauge("hireme_scheduler_waiting_interactive", "Interactive calls waiting for a slot",
+               lambda: scheduler.queue.snapshot()["waiting"][INTERACTIVE])
+registry.gauge("hireme_scheduler_waiting_background", "Background calls waiting for a slot",
+               lambda: scheduler.queue.snapshot()["waiting"][BACKGROUND])
+registry.gauge("hireme_listing_cache_hits", "Job listings reused instead of extracted again",
+               lambda: listing_cache.stats()["hits"])
+registry.gauge("hireme_context_cache_reused", "Calls that sent their instructions as cached content",
+               lambda: context_cache.snapshot()["reused"])
+registry.gauge("hireme_payload_bytes_saved", "Upload bytes not sent thanks to local text extraction",
+               lambda: payload_log.summary()["bytes_saved"])
+registry.gauge("hireme_preprocess_bytes_saved", "Upload bytes removed by image downscaling and PDF trimming",
+               lambda: preprocess_log.summary()["bytes_saved"])
+
+# --- Async API ---
+# Same results as the sync functions, but many calls can overlap on one event loop.
+# Each call (retries included) is bounded by `timeout` seconds; cancelling the
+# awaiting task cancels the HTTP request too (CancelledError is re-raised, never swallowed).
+
+async def analyze_resume_async(file_bytes, mime_type, check_cache=True, include_improvements=False,
+                               timeout=REQUEST_TIMEOUT):
+    """
+    Async version of analyze_resume.
+    PDF/image decoding, text extraction and cache I/O run in worker threads,
+    so a large upload does not block the event loop.
+    """
+    # Over-limit uploads fail here, before any lookup or model call
+    pdf = await asyncio.to_thread(check_upload, file_bytes, mime_type)
+    cache_key = _analysis_key(file_bytes, mime_type, include_improvements)
+    if check_cache:
+        cached = await asyncio.to_thread(analysis_cache.get, cache_key)
+        if cached is not None:
+            return cached
+
+    async def generate():
+        request, stats = await asyncio.to_thread(_analysis_request, file_bytes, mime_type, include_improvements, pdf)
+        return await _generate_async(request, "analyze"), stats
+
+    try:
+        response, stats = await asyncio.wait_for(
+            single_flight.do_async("analyze:" + cache_key, generate),
+            timeout
         )
+        result = _parse_analysis(response, stats)
+        if result:
+            await asyncio.to_thread(analysis_cache.set, cache_key, result)
+        return result
 
-        # Parse Grounding Metadata to get links
-        sources = []
-        if response.candidates and response.candidates[0].grounding_metadata:
-            chunks = response.candidates[0].grounding_metadata.grounding_chunks
-            for chunk in chunks:
-                if chunk.web:
-                    sources.append({
-                        "title": chunk.web.title,
-                        "company": "External Site",
-                        "url": chunk.web.uri,
-                        "snippet": "Click to view details"
-                    })
-        
-        return {"text": response.text, "sources": sources}
+    except asyncio.TimeoutError:
+        print(f"Error in analysis: timed out after {timeout}s")
+        return None
+    except (QuotaExceededError, UploadRejected):
+        raise
+    except Exception as e:
+        print(f"Error in analysis: {e}")
+        return None
+
+async def suggest_improvements_async(weaknesses, timeout=REQUEST_TIMEOUT):
+    """
+    Async version of suggest_improvements.
+    """
+    try:
+        response = await asyncio.wait_for(
+            single_flight.do_async(
+                "improve:" + _improvements_key(weaknesses),
+                lambda: _generate_async(_improvements_request(weaknesses), "improve")
+            ),
+            timeout
+        )
+        return _parse_improvements(response)
+    except asyncio.TimeoutError:
+        print(f"Error in improvements: timed out after {timeout}s")
+        return []
+    except Exception as e:
+        print(f"Error in improvements: {e}")
+        return []
+
+async def find_jobs_async(query, location, mode, timeout=REQUEST_TIMEOUT):
+    """
+    Async version of find_jobs.
+    """
+    try:
+        response = await asyncio.wait_for(
+            _generate_async(_jobs_request(query, location, mode), "jobs"),
+            timeout
+        )
+        return _parse_jobs(response)
 
+    except asyncio.TimeoutError:
+        print(f"Error in job search: timed out after {timeout}s")
+        return {"text": "Error fetching jobs.", "sources": []}
+    except QuotaExceededError as e:
+        return {"text": str(e), "sources": []}
     except Exception as e:
         print(f"Error in job search: {e}")
-        return {"text": "Error fetching jobs.", "sources": []}
\ No newline at end of file
+        return {"text": "Error fetching jobs.", "sources": []}
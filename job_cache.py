@@ -0,0 +1,137 @@
+import json
+import time
+import hashlib
+import threading
+
+from config import JOB_CACHE_BACKEND, JOB_CACHE_PATH, JOB_CACHE_FRESH_SECONDS, JOB_CACHE_STALE_SECONDS
+from result_cache import build_cache
+from singleflight import SingleFlight
+from skills import clean_role
+
+
+def clean_job_title(query):
+    """
+    Keeps only the main job title - the same cleaning the JOBS page applies.
+    """
+    return clean_role(query)
+
+
+def _fold(text):
+    return " ".join((text or "").split()).casefold()
+
+
+def normalize_job_query(query, location, mode):
+    """
+    "  Data Analyst, SQL " / "REMOTE" / "Any" -> ("data analyst", "remote", "")
+    """
+    mode = _fold(mode)
+    return (_fold(clean_job_title(query or "")), _fold(location), "" if mode == "any" else mode)
+
+
+def job_query_key(query, location, mode, version=""):
+    # version: the search prompt's key, so a prompt change starts a fresh cache
+    normalized = normalize_job_query(query, location, mode)
+    return "jobs:" + hashlib.sha256(json.dumps([version, *normalized]).encode("utf-8")).hexdigest()
+
+
+class JobSearchCache:
+    """
+    Shared cache in front of find_jobs.
+    - fresh results are returned straight from the cache
+    - stale results are returned immediately while one background refresh runs
+    - identical searches already in flight wait for that call instead of starting their own
+    """
+
+    def __init__(self, fetch_fn, stream_fn=None, fresh_for=JOB_CACHE_FRESH_SECONDS,
+                 stale_for=JOB_CACHE_STALE_SECONDS, cache=None, version=""):
+        self.fetch_fn = fetch_fn
+        self.stream_fn = stream_fn
+        self.fresh_for = fresh_for
+        self.stale_for = stale_for
+        self.version = version
+        self.cache = cache or build_cache(JOB_CACHE_BACKEND, JOB_CACHE_PATH, fresh_for + stale_for, "jobs")
+        self.flights = SingleFlight()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.stats = {"fresh_hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _store(self, key, result):
+        # Errors and empty searches are not worth keeping
+        if result and result.get("sources"):
+            self.cache.set(key, {"result": result, "fetched_at": time.time()})
+
+    def _lookup(self, key, query, location, mode):
+        entry = self.cache.get(key)
+        if entry is None:
+            self._count("misses")
+            return None
+        age = time.time() - entry["fetched_at"]
+        if age < self.fresh_for:
+            self._count("fresh_hits")
+            return entry["result"]
+        if age < self.fresh_for + self.stale_for:
+            self._count("stale_hits")
+            self._refresh_in_background(key, query, location, mode)
+            return entry["result"]
+        self._count("misses")
+        return None
+
+    def _fetch(self, key, query, location, mode):
+        def fetch():
+            result = self.fetch_fn(query, location, mode)
+            self._store(key, result)
+            return result
+        return self.flights.do(key, fetch)
+
+    def _refresh(self, key, query, location, mode):
+        try:
+            self._fetch(key, query, location, mode)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh_in_background(self, key, query, location, mode):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self.stats["refreshes"] += 1
+        threading.Thread(target=self._refresh, args=(key, query, location, mode), daemon=True).start()
+
+    def get(self, query, location, mode):
+        """
+        Cached find_jobs(query, location, mode).
+        """
+        key = job_query_key(query, location, mode, self.version)
+        cached = self._lookup(key, query, location, mode)
+        if cached is not None:
+            return cached
+        return self._fetch(key, query, location, mode)
+
+    def stream(self, query, location, mode):
+        """
+        Cached find_jobs_stream(query, location, mode). A cache hit or a
+        coalesced search yields one complete snapshot; a miss streams live.
+        """
+        key = job_query_key(query, location, mode, self.version)
+        cached = self._lookup(key, query, location, mode)
+        if cached is not None:
+            yield cached
+            return
+
+        def stream():
+            result = None
+            for result in self.stream_fn(query, location, mode):
+                yield result
+            self._store(key, result)
+        yield from self.flights.stream(key, stream)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats["coalesced"] = self.flights.snapshot()["coalesced"]
+        return stats
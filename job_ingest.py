@@ -0,0 +1,483 @@
+"""
+Bulk job-listing ingestion from local feeds (JSONL or CSV dumps, optionally
+gzipped) into an indexed SQLite store that the JOBS page searches locally.
+
+    python -m job_ingest feeds/indeed.jsonl.gz feeds/company_boards.csv
+    python -m job_ingest --stats
+
+Feeds are streamed record by record and written in batches, so memory stays
+flat whatever the file size. Listings are deduplicated by normalized URL and
+by a hash of their normalized content (the same posting mirrored on several
+boards is stored once).
+"""
+import os
+import re
+import io
+import sys
+import csv
+import gzip
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import datetime
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from config import JOB_DB_PATH, INGEST_BATCH_SIZE
+from skills import normalize_role
+
+# Feed column -> our field; first one present wins
+FIELD_ALIASES = {
+    "url": ("url", "link", "apply_url", "job_url", "redirect_url"),
+    "title": ("title", "job_title", "position", "name"),
+    "company": ("company", "company_name", "employer", "hiring_organization", "organization"),
+    "location": ("location", "job_location", "city", "locations"),
+    "description": ("description", "snippet", "summary", "job_description"),
+    "posted": ("posted", "date_posted", "posted_at", "created", "published"),
+    "mode": ("mode", "remote", "work_type", "workplace_type", "job_type"),
+}
+
+# Query parameters that only track the click, never identify the listing
+TRACKING_PARAMS = re.compile(r"^(utm_.*|ref|refid|src|source|from|trk|gclid|fbclid|mc_.*)$", re.IGNORECASE)
+
+REMOTE_WORDS = re.compile(r"\b(remote|anywhere|work from home|wfh|telecommute)\b", re.IGNORECASE)
+HYBRID_WORDS = re.compile(r"\bhybrid\b", re.IGNORECASE)
+COMPANY_SUFFIX = re.compile(r"[,\s]+(inc|llc|ltd|limited|gmbh|corp|corporation|co|plc|pvt|s\.a|ag|bv)\.?$",
+                            re.IGNORECASE)
+_TAGS = re.compile(r"<[^>]+>")
+_POSTED_AGO = re.compile(r"(\d+|\ban?)\+?\s*(minute|min|hour|hr|day|week|month|year|yr)s?\s+ago", re.IGNORECASE)
+# "Sept 3" - strptime only knows "Sep"
+_SEPT = re.compile(r"\bsept\b", re.IGNORECASE)
+_POSTED_TODAY = re.compile(r"\b(today|just posted|just now|new)\b", re.IGNORECASE)
+_POSTED_FORMATS = ("%Y-%m-%d", "%b %d %Y", "%B %d %Y", "%d %b %Y", "%d %B %Y", "%m/%d/%Y", "%b %d", "%B %d",
+                   "%d %b", "%d %B")
+_POSTED_DAYS = {"minute": 0, "min": 0, "hour": 0, "hr": 0, "day": 1, "week": 7, "month": 30, "year": 365, "yr": 365}
+
+
+def _clean(value):
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        value = ", ".join(str(v) for v in value if v)
+    value = str(value)
+    if "<" in value:
+        value = _TAGS.sub(" ", value)
+    return " ".join(value.split())
+
+
+def normalize_url(url):
+    """
+    Lowercase scheme/host, no fragment, tracking parameters or trailing slash.
+    """
+    parts = urlsplit(url.strip())
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        return ""
+    query = parts.query
+    if query:
+        query = urlencode(sorted((k, v) for k, v in parse_qsl(query) if not TRACKING_PARAMS.match(k)))
+    return urlunsplit(("https", parts.netloc.lower().removeprefix("www."), parts.path.rstrip("/"), query, ""))
+
+
+def normalize_company(company):
+    return COMPANY_SUFFIX.sub("", company).strip()
+
+
+def normalize_location(location):
+    if not location or REMOTE_WORDS.fullmatch(location.strip()):
+        return "Remote" if location else ""
+    return location
+
+
+def parse_posted(text, today=None):
+    """
+    Free-form posting dates ("3 days ago", "a month ago", "Yesterday", "Oct 3",
+    "Sept 3, 2026", "2026-10-03") -> datetime.date, or None if unrecognized.
+    Relative dates count back from today (the day the text was seen).
+    """
+    today = today or datetime.date.today()
+    text = _clean(text).replace(",", " ").strip()
+    if not text:
+        return None
+    match = _POSTED_AGO.search(text)
+    if match:
+        count = 1 if match.group(1).lower() in ("a", "an") else int(match.group(1))
+        return today - datetime.timedelta(days=count * _POSTED_DAYS[match.group(2).lower()])
+    if "yesterday" in text.lower():
+        return today - datetime.timedelta(days=1)
+    if _POSTED_TODAY.search(text):
+        return today
+    text = _SEPT.sub("Sep", " ".join(text.split()))
+    for fmt in _POSTED_FORMATS:
+        # ISO timestamps: the date part is enough
+        value = text[:10] if fmt == "%Y-%m-%d" else text
+        yearless = "%Y" not in fmt
+        if yearless:
+            value, fmt = f"{value} {today.year}", fmt + " %Y"
+        try:
+            parsed = datetime.datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+        if yearless and parsed > today:
+            # "Dec 25" seen in October is last December
+            parsed = parsed.replace(year=today.year - 1)
+        return parsed
+    return None
+
+
+def work_mode(mode, location, title):
+    """
+    "Remote", "Hybrid", "On-site" or "" (unknown).
+    """
+    text = f"{mode} {location} {title}"
+    if HYBRID_WORDS.search(text):
+        return "Hybrid"
+    if REMOTE_WORDS.search(text) or str(mode).lower() in ("true", "1", "yes"):
+        return "Remote"
+    if re.search(r"\b(on-?site|in-?office)\b", text, re.IGNORECASE) or location:
+        return "On-site"
+    return ""
+
+
+def normalize_listing(raw, source=""):
+    """
+    One feed record -> a listing dict, or None if it has no usable URL or title.
+    """
+    fields = {}
+    lowered = {str(k).strip().lower(): v for k, v in raw.items()}
+    for field, aliases in FIELD_ALIASES.items():
+        fields[field] = next((_clean(lowered[a]) for a in aliases if lowered.get(a) not in (None, "")), "")
+    url = normalize_url(fields["url"])
+    title = normalize_role(fields["title"])
+    if not url or not title:
+        return None
+    company = normalize_company(fields["company"])
+    location = normalize_location(fields["location"])
+    listing = {
+        "url": url,
+        "title": title,
+        "company": company,
+        "location": location,
+        "mode": work_mode(fields["mode"], location, fields["title"]),
+        "description": fields["description"][:4000],
+        "posted": fields["posted"][:32],
+        "source": source,
+    }
+    # Resolved now: "3 days ago" means something else tomorrow
+    posted_at = parse_posted(fields["posted"])
+    listing["posted_at"] = posted_at.isoformat() if posted_at else None
+    identity = "|".join(listing[k].casefold() for k in ("title", "company", "location", "description"))
+    listing["content_hash"] = hashlib.sha256(identity.encode("utf-8")).hexdigest()
+    return listing
+
+
+# --- Feed readers (generators) ---
+
+def _open_text(path):
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", errors="replace", newline="")
+    return open(path, encoding="utf-8", errors="replace", newline="")
+
+
+def read_jsonl(path):
+    with _open_text(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                print(f"Skipping bad JSON on line {number} of {path}: {e}")
+                continue
+            if isinstance(record, dict):
+                yield record
+
+
+def read_csv(path):
+    with _open_text(path) as f:
+        yield from csv.DictReader(f)
+
+
+def read_feed(path):
+    """
+    Records of a .jsonl/.ndjson/.csv feed (optionally .gz), one at a time.
+    """
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".csv"):
+        return read_csv(path)
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return read_jsonl(path)
+    raise ValueError(f"Unsupported feed format: {path}")
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --- Store ---
+
+class JobStore:
+    """
+    Ingested job listings in SQLite: unique normalized URL and content hash,
+    indexes on title, location and company, FTS5 over title, company and
+    description (plain LIKE if FTS5 is missing). Shared by all sessions.
+    """
+
+    def __init__(self, path=JOB_DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL (a crash can lose the last batch, never corrupt the file) and much faster bulk loads
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                url TEXT UNIQUE NOT NULL,
+                content_hash TEXT UNIQUE NOT NULL,
+                title TEXT NOT NULL,
+                title_norm TEXT NOT NULL,
+                company TEXT,
+                company_norm TEXT,
+                location TEXT,
+                location_norm TEXT,
+                mode TEXT,
+                description TEXT,
+                posted TEXT,
+                posted_at TEXT,
+                source TEXT,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        self._add_posted_at()
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_title ON jobs(title_norm)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_location ON jobs(location_norm, title_norm)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_company ON jobs(company_norm)")
+        self._conn.execute("DROP INDEX IF EXISTS idx_jobs_mode")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_mode_posted ON jobs(mode, posted_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_posted ON jobs(posted_at)")
+        self.fts = self._create_fts()
+        self._conn.commit()
+
+    def _add_posted_at(self):
+        """
+        Stores created before posted_at existed: add the column and fill it,
+        counting relative dates back from when each row was last written.
+        """
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "posted_at" in columns:
+            return
+        self._conn.execute("ALTER TABLE jobs ADD COLUMN posted_at TEXT")
+        rows = self._conn.execute("SELECT id, posted, updated FROM jobs WHERE posted != ''").fetchall()
+        updates = []
+        for row in rows:
+            posted_at = parse_posted(row["posted"], datetime.date.fromtimestamp(row["updated"]))
+            if posted_at:
+                updates.append((posted_at.isoformat(), row["id"]))
+        self._conn.executemany("UPDATE jobs SET posted_at = ? WHERE id = ?", updates)
+
+    def _create_fts(self):
+        try:
+            self._conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts
+                USING fts5(title, company, description, content='jobs', content_rowid='id')
+            """)
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 unavailable, job text search falls back to LIKE: {e}")
+            return False
+        self._conn.executescript("""
+            CREATE TRIGGER IF NOT EXISTS jobs_ai AFTER INSERT ON jobs BEGIN
+                INSERT INTO jobs_fts(rowid, title, company, description)
+                VALUES (new.id, new.title, new.company, new.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS jobs_ad AFTER DELETE ON jobs BEGIN
+                INSERT INTO jobs_fts(jobs_fts, rowid, title, company, description)
+                VALUES ('delete', old.id, old.title, old.company, old.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS jobs_au AFTER UPDATE ON jobs BEGIN
+                INSERT INTO jobs_fts(jobs_fts, rowid, title, company, description)
+                VALUES ('delete', old.id, old.title, old.company, old.description);
+                INSERT INTO jobs_fts(rowid, title, company, description)
+                VALUES (new.id, new.title, new.company, new.description);
+            END;
+        """)
+        return True
+
+    _UPSERT = """
+        INSERT INTO jobs (url, content_hash, title, title_norm, company, company_norm, location,
+                          location_norm, mode, description, posted, posted_at, source, created, updated)
+        VALUES (:url, :content_hash, :title, :title_norm, :company, :company_norm, :location,
+                :location_norm, :mode, :description, :posted, :posted_at, :source, :now, :now)
+        ON CONFLICT(url) DO UPDATE SET
+            content_hash = excluded.content_hash, title = excluded.title, title_norm = excluded.title_norm,
+            company = excluded.company, company_norm = excluded.company_norm, location = excluded.location,
+            location_norm = excluded.location_norm, mode = excluded.mode, description = excluded.description,
+            posted = excluded.posted, posted_at = excluded.posted_at, source = excluded.source,
+            updated = excluded.updated
+        WHERE jobs.content_hash != excluded.content_hash
+        ON CONFLICT(content_hash) DO NOTHING
+    """
+
+    def save_many(self, listings):
+        """
+        Upserts normalized listings in one transaction. Returns how many rows
+        were inserted or changed (duplicates and unchanged listings are not).
+        """
+        now = time.time()
+        rows = [dict(listing, now=now, title_norm=listing["title"].casefold(),
+                     company_norm=listing["company"].casefold(), location_norm=listing["location"].casefold())
+                for listing in listings]
+        with self._lock:
+            try:
+                try:
+                    # rowcount sums the rows inserted or updated (not the FTS trigger writes)
+                    changed = self._conn.executemany(self._UPSERT, rows).rowcount
+                except sqlite3.IntegrityError:
+                    # An update would duplicate another listing's content: redo row by row, skipping those
+                    self._conn.rollback()
+                    changed = 0
+                    for row in rows:
+                        try:
+                            changed += self._conn.execute(self._UPSERT, row).rowcount
+                        except sqlite3.IntegrityError:
+                            pass
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return changed
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def search(self, text=None, title=None, location=None, mode=None, company=None, limit=50, offset=0):
+        """
+        Listings matching all given filters. text is a full-text query over
+        title, company and description (best match first); title is a
+        case-insensitive prefix; location a substring (Remote listings always
+        match). Without text, most recently posted first (listings without a
+        recognizable posting date last).
+        """
+        where, params = [], []
+        terms = re.findall(r"\w+", text or "")
+        ranked = bool(terms) and self.fts
+        if ranked:
+            where.append("jobs_fts MATCH ?")
+            params.append(" AND ".join(f'"{t}"*' for t in terms))
+        else:
+            for term in terms:
+                where.append("(j.title LIKE ? OR j.description LIKE ?)")
+                params += [f"%{term}%", f"%{term}%"]
+        if title:
+            prefix = title.strip().casefold()
+            where.append("j.title_norm >= ? AND j.title_norm < ?")
+            params += [prefix, prefix + "\U0010ffff"]
+        if location and location.strip().casefold() == "remote":
+            where.append("j.mode = 'Remote'")
+        elif location:
+            where.append("(j.location_norm LIKE ? OR j.mode = 'Remote')")
+            params.append(f"%{location.strip().casefold()}%")
+        if mode and mode != "Any":
+            where.append("j.mode = ?")
+            params.append(mode)
+        if company:
+            where.append("j.company_norm = ?")
+            params.append(normalize_company(company).casefold())
+
+        if ranked:
+            sql = "SELECT j.* FROM jobs_fts JOIN jobs j ON j.id = jobs_fts.rowid"
+        else:
+            sql = "SELECT j.* FROM jobs j"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY bm25(jobs_fts)" if ranked else " ORDER BY j.posted_at DESC, j.updated DESC"
+        sql += " LIMIT ? OFFSET ?"
+        params += [int(limit), int(offset)]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    @staticmethod
+    def _to_dict(row):
+        return {
+            "title": row["title"],
+            "company": row["company"],
+            "location": row["location"],
+            "mode": row["mode"],
+            "posted": row["posted"],
+            "posted_at": row["posted_at"],
+            "url": row["url"],
+            "snippet": (row["description"] or "")[:300],
+            "source": row["source"],
+        }
+
+
+# --- Pipeline ---
+
+def ingest(records, store=None, source="", batch_size=INGEST_BATCH_SIZE):
+    """
+    Normalizes and loads an iterable of raw records (e.g. read_feed(path)) in
+    batches. Returns {"read", "invalid", "written", "duplicates", "seconds"}.
+    """
+    store = store or job_store
+    started = time.perf_counter()
+    stats = {"read": 0, "invalid": 0, "written": 0}
+
+    def listings():
+        for record in records:
+            stats["read"] += 1
+            listing = normalize_listing(record, source)
+            if listing is None:
+                stats["invalid"] += 1
+            else:
+                yield listing
+
+    for batch in _batches(listings(), batch_size):
+        stats["written"] += store.save_many(batch)
+    stats["duplicates"] = stats["read"] - stats["invalid"] - stats["written"]
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    return stats
+
+
+def ingest_files(paths, store=None, batch_size=INGEST_BATCH_SIZE):
+    """
+    Ingests each feed file in turn; returns {path: stats}.
+    """
+    return {path: ingest(read_feed(path), store, os.path.basename(path), batch_size) for path in paths}
+
+
+# Shared by every session in this process
+job_store = JobStore()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("feeds", nargs="*", help=".jsonl / .csv feed files (optionally .gz)")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--stats", action="store_true", help="Print the number of stored listings")
+    args = parser.parse_args(argv)
+
+    for path, stats in ingest_files(args.feeds, batch_size=args.batch_size).items():
+        print(f"{path}: {stats['read']} read, {stats['written']} new/changed, "
+              f"{stats['duplicates']} duplicates, {stats['invalid']} invalid in {stats['seconds']}s")
+    if args.stats or not args.feeds:
+        print(f"{job_store.count()} listings in {job_store.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
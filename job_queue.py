@@ -0,0 +1,319 @@
+"""
+Background job queue for long model calls, backed by one SQLite file so
+in-process worker threads and separate worker processes share it.
+
+    python -m job_queue --threads 4                 # one worker process
+    python -m job_queue --processes 3 --threads 4   # three of them
+
+The Streamlit app submits a job, keeps the job id in session state and
+polls get(job_id); reruns and page switches no longer lose the call.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import argparse
+import threading
+import multiprocessing
+
+from config import (
+    JOB_QUEUE_PATH, JOB_WORKERS, JOB_POLL_INTERVAL, JOB_STALE_SECONDS, JOB_MAX_ATTEMPTS, JOB_KEEP_SECONDS
+)
+
+# kind -> fn(params, blob) returning a JSON-serializable result (None = failed)
+HANDLERS = {}
+
+
+def register_handler(kind, fn):
+    HANDLERS[kind] = fn
+    return fn
+
+
+class JobQueue:
+    """
+    Jobs move queued -> running -> done / failed. Claiming is one atomic
+    UPDATE, so any number of threads and processes can pull from the queue.
+    Workers also requeue jobs of dead workers and purge old finished jobs
+    every maintenance_interval seconds. clock is replaceable for tests.
+    """
+
+    def __init__(self, path=JOB_QUEUE_PATH, clock=time.time, maintenance_interval=JOB_STALE_SECONDS / 4):
+        self.path = path
+        self.clock = clock
+        self.maintenance_interval = maintenance_interval
+        self._next_maintenance = 0.0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                dedupe_key TEXT,
+                params TEXT NOT NULL,
+                blob BLOB,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                worker TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                started REAL,
+                finished REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs(dedupe_key, status)")
+
+    def submit(self, kind, params=None, blob=None, dedupe_key=None):
+        """
+        Queues a job and returns its id. With dedupe_key, a matching job that
+        is still queued or running is returned instead of starting another.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if dedupe_key:
+                    row = self._conn.execute(
+                        "SELECT id FROM jobs WHERE dedupe_key = ? AND status IN ('queued', 'running')",
+                        (dedupe_key,)
+                    ).fetchone()
+                    if row:
+                        self._conn.execute("COMMIT")
+                        return row["id"]
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO jobs (id, kind, dedupe_key, params, blob, status, created) "
+                    "VALUES (?, ?, ?, ?, ?, 'queued', ?)",
+                    (job_id, kind, dedupe_key, json.dumps(params or {}), blob, self.clock())
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def claim(self, worker):
+        """
+        Takes the oldest queued job for this worker. Returns the row or None.
+        """
+        with self._lock:
+            return self._conn.execute("""
+                UPDATE jobs SET status = 'running', worker = ?, started = ?, attempts = attempts + 1
+                WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1)
+                RETURNING id, kind, params, blob
+            """, (worker, self.clock())).fetchone()
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._lock:
+            # The uploaded file is not needed once the job is over
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, blob = NULL, finished = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, self.clock(), job_id)
+            )
+
+    def complete(self, job_id, result):
+        self._finish(job_id, "done", result=result)
+
+    def fail(self, job_id, error):
+        self._finish(job_id, "failed", error=str(error))
+
+    def get(self, job_id):
+        """
+        {"id", "kind", "status", "result", "error", "created", "started", "finished"} or None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, status, result, error, created, started, finished FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def requeue_stale(self, older_than=JOB_STALE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS):
+        """
+        Puts running jobs whose worker died (no finish after older_than seconds)
+        back in the queue. Jobs that already used max_attempts are failed
+        instead, so a job that crashes its worker cannot loop forever.
+        Returns the number requeued.
+        """
+        cutoff = self.clock() - older_than
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, blob = NULL, finished = ? "
+                "WHERE status = 'running' AND started < ? AND attempts >= ?",
+                (f"Gave up after {max_attempts} attempts (worker died or hung)", self.clock(), cutoff, max_attempts)
+            )
+            return self._conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND started < ?",
+                (cutoff,)
+            ).rowcount
+
+    def purge(self, older_than=JOB_KEEP_SECONDS):
+        """
+        Deletes finished jobs older than older_than seconds.
+        """
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished < ?",
+                (self.clock() - older_than,)
+            ).rowcount
+
+    def maintain(self):
+        """
+        requeue_stale() and purge(), at most once per maintenance_interval
+        across this queue's workers. Returns True if they ran.
+        """
+        now = self.clock()
+        with self._lock:
+            if now < self._next_maintenance:
+                return False
+            self._next_maintenance = now + self.maintenance_interval
+        self.requeue_stale()
+        self.purge()
+        return True
+
+    def snapshot(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        counts.update({r["status"]: r["n"] for r in rows})
+        return counts
+
+    def wait_for_work(self, timeout):
+        """
+        Sleeps until a job is submitted in this process or timeout passes
+        (jobs from other processes are picked up on the next poll).
+        """
+        with self._wakeup:
+            self._wakeup.wait(timeout)
+
+    def run_one(self, worker):
+        """
+        Claims and runs one job. Returns False if the queue was empty.
+        """
+        job = self.claim(worker)
+        if job is None:
+            return False
+        handler = HANDLERS.get(job["kind"])
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind {job['kind']!r}")
+            result = handler(json.loads(job["params"]), job["blob"])
+        except Exception as e:
+            print(f"Error in job {job['id']}: {e}")
+            self.fail(job["id"], e)
+            return True
+        if result is None:
+            self.fail(job["id"], "Job returned no result")
+        else:
+            self.complete(job["id"], result)
+        return True
+
+    def work(self, worker, stop=None, poll_interval=JOB_POLL_INTERVAL):
+        """
+        Worker loop: runs jobs until stop (a threading.Event) is set.
+        """
+        while stop is None or not stop.is_set():
+            try:
+                # A worker that dies while the app runs is noticed here, not only at the next start
+                self.maintain()
+                if self.run_one(worker):
+                    continue
+            except sqlite3.OperationalError as e:
+                # e.g. "database is locked" under heavy multi-process load - just retry
+                print(f"Error polling job queue: {e}")
+            self.wait_for_work(poll_interval)
+
+
+# --- Handlers ---
+
+def _analyze(params, blob):
+    # Imported here so worker processes only load the backend when they get work
+    from gemini_backend import analyze_resume
+    from candidate_store import candidate_store, candidate_key
+    from scheduler import tenant_scope
+    # Charged to (and fair-queued as) the session that submitted the job
+    with tenant_scope(params.get("tenant")):
+        result = analyze_resume(blob, params["mime_type"], check_cache=params.get("check_cache", True),
+                                include_improvements=params.get("include_improvements", False))
+    if result:
+        candidate_store.save(result, candidate_key(blob), params.get("filename", ""))
+    return result
+
+
+register_handler("analyze", _analyze)
+
+
+# --- Shared queue and in-process workers ---
+
+job_queue = JobQueue()
+
+_workers = []
+_workers_lock = threading.Lock()
+
+
+def start_workers(count=JOB_WORKERS, queue=None):
+    """
+    Starts count daemon worker threads in this process. Safe to call on every
+    Streamlit rerun - only the first call starts them.
+    """
+    queue = queue or job_queue
+    with _workers_lock:
+        if _workers or count <= 0:
+            return _workers
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        for i in range(count):
+            thread = threading.Thread(target=queue.work, args=(f"{prefix}:{i}",), daemon=True,
+                                      name=f"job-worker-{i}")
+            thread.start()
+            _workers.append(thread)
+        return _workers
+
+
+def _worker_process(threads):
+    # Own connection: a SQLite handle must not be shared across fork()
+    start_workers(threads, JobQueue())
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=max(1, JOB_WORKERS), help="Worker threads per process")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes to start")
+    args = parser.parse_args(argv)
+
+    print(f"Job workers: {args.processes} process(es) x {args.threads} thread(s) on {JOB_QUEUE_PATH}")
+    if args.processes <= 1:
+        _worker_process(args.threads)
+        return 0
+    processes = [multiprocessing.Process(target=_worker_process, args=(args.threads,), daemon=True)
+                 for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
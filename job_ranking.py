@@ -0,0 +1,83 @@
+import re
+import math
+from urllib.parse import urlparse
+
+# BM25 parameters (the usual defaults)
+K1 = 1.2
+B = 0.75
+
+# Role words count double: a "Data Analyst" listing should beat one that merely mentions SQL
+ROLE_WEIGHT = 2.0
+SKILL_WEIGHT = 1.0
+
+STOPWORDS = {
+    "a", "an", "and", "at", "for", "in", "of", "on", "or", "the", "to", "with", "job", "jobs",
+    "www", "com", "http", "https", "html", "click", "view", "details",
+}
+
+# Keeps skills like c++, c#, .net and node.js as single tokens
+_TOKEN = re.compile(r"[a-z0-9.+#]*[a-z0-9+#]")
+
+
+def tokenize(text):
+    return [t for t in _TOKEN.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def _listing_text(job):
+    url = urlparse(job.get("url") or "")
+    # Job sites often put the title in the path: /jobs/senior-data-analyst-123
+    path_words = re.sub(r"[-_/]+", " ", url.path)
+    snippet = job.get("snippet") or ""
+    return " ".join([job.get("title") or "", snippet, path_words])
+
+
+def _query_weights(skills, role):
+    """
+    term -> weight. A multi-word skill shares its weight between its words.
+    """
+    weights = {}
+    for text, weight in [(role, ROLE_WEIGHT)] + [(s, SKILL_WEIGHT) for s in skills or []]:
+        terms = set(tokenize(text))
+        for term in terms:
+            weights[term] = weights.get(term, 0.0) + weight / len(terms)
+    return weights
+
+
+def rank_jobs(sources, skills, role=""):
+    """
+    Re-scores find_jobs sources against the candidate locally (BM25 over
+    title, snippet and URL path) - no model call. Returns new dicts sorted
+    best first, each with "score" (BM25) and "match" (0-100, share of the
+    role/skill weight the listing covers). Ties keep the search order.
+    """
+    if not sources:
+        return []
+    weights = _query_weights(skills, role)
+    docs = []
+    for job in sources:
+        tokens = tokenize(_listing_text(job))
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        docs.append((counts, len(tokens)))
+
+    n = len(docs)
+    avg_len = sum(length for _, length in docs) / n or 1.0
+    df = {term: sum(1 for counts, _ in docs if term in counts) for term in weights}
+    idf = {term: math.log((n - df[term] + 0.5) / (df[term] + 0.5) + 1.0) for term in weights}
+    total_weight = sum(weights.values()) or 1.0
+
+    ranked = []
+    for position, (job, (counts, length)) in enumerate(zip(sources, docs)):
+        score = 0.0
+        covered = 0.0
+        norm = K1 * (1 - B + B * length / avg_len)
+        for term, weight in weights.items():
+            tf = counts.get(term, 0)
+            if tf:
+                score += weight * idf[term] * tf * (K1 + 1) / (tf + norm)
+                covered += weight
+        ranked.append((-score, position, dict(job, score=round(score, 3),
+                                               match=round(100 * covered / total_weight))))
+    ranked.sort(key=lambda item: item[:2])
+    return [job for _, _, job in ranked]
@@ -0,0 +1,471 @@
+"""
+Resume <-> job matching on embeddings, with a local approximate
+nearest-neighbour index per side (stored candidates, collected job listings).
+
+    python -m matching --sync                  # embed every stored candidate
+    python -m matching --stats
+    python -m matching --query "data analyst sql tableau" --k 5
+"""
+import os
+import sys
+import json
+import zlib
+import sqlite3
+import hashlib
+import argparse
+import threading
+
+import numpy as np
+
+from config import (EMBEDDING_BACKEND, EMBEDDING_DIM, EMBEDDING_BATCH, MATCH_INDEX_DIR, MATCH_NPROBE,
+                    MATCH_TRAIN_MIN)
+from job_ranking import tokenize
+
+
+def _normalize(vectors):
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+# --- Embedders ---
+
+class GeminiEmbedder:
+    name = "gemini"
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+
+    def embed(self, texts):
+        # Imported here so the local embedder and the index work without the SDK
+        from gemini_backend import embed_texts
+        return _normalize(embed_texts(list(texts)))
+
+
+class HashingEmbedder:
+    """
+    Local, deterministic stand-in: word and word-pair counts hashed into dim
+    buckets. No API calls - for offline use, tests and benchmarks.
+    """
+    name = "hashing"
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            tokens = tokenize(text)
+            features = [(t, 1.0) for t in tokens] + [(a + " " + b, 0.5) for a, b in zip(tokens, tokens[1:])]
+            for feature, weight in features:
+                h = zlib.crc32(feature.encode("utf-8"))
+                vectors[i, h % self.dim] += weight if h & 0x80000000 else -weight
+        return _normalize(vectors)
+
+
+EMBEDDERS = {"gemini": GeminiEmbedder, "hashing": HashingEmbedder}
+
+
+def build_embedder(name=EMBEDDING_BACKEND, dim=EMBEDDING_DIM):
+    return EMBEDDERS[name](dim)
+
+
+# --- Vector Index ---
+
+class VectorIndex:
+    """
+    Approximate nearest-neighbour index over unit vectors (cosine similarity).
+
+    Vectors live in a memory-mapped float32 file that grows by doubling; keys,
+    payloads and cluster assignments live in SQLite next to it. Below
+    train_min vectors every query is exact. From there on an IVF index is
+    used: k-means centroids split the vectors into ~sqrt(n) inverted lists
+    and a query only scans the nprobe lists closest to it. New vectors join
+    their nearest list on insert; the centroids are retrained whenever the
+    index has grown 4x since the last training.
+
+    Several processes (the app, the job_ingest CLI) may write the same index:
+    add() allocates rows inside a BEGIN IMMEDIATE transaction, after catching
+    up with rows the others wrote.
+    """
+
+    def __init__(self, path, dim, nprobe=MATCH_NPROBE, train_min=MATCH_TRAIN_MIN):
+        self.path = path
+        self.dim = dim
+        self.nprobe = nprobe
+        self.train_min = train_min
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(path, "items.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS items (
+                row INTEGER PRIMARY KEY,
+                key TEXT UNIQUE NOT NULL,
+                hash TEXT NOT NULL,
+                list INTEGER NOT NULL,
+                payload TEXT
+            )
+        """)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._centroids_path = os.path.join(path, "centroids.npy")
+        self.size = self._meta("size", 0)              # rows used in the vector file (dead ones included)
+        self.trained_at = self._meta("trained_at", 0)  # live vectors when the centroids were trained
+        self._vectors = None
+        self._open_vectors(max(self.size, 1024))
+        self.centroids = np.load(self._centroids_path) if os.path.exists(self._centroids_path) else None
+        self._load_lists()
+
+    def _meta(self, name, default):
+        row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return int(row[0]) if row else default
+
+    def _set_meta(self, name, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, str(value)))
+
+    def _open_vectors(self, capacity):
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        size = capacity * self.dim * 4
+        with open(self._vectors_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self.capacity = os.path.getsize(self._vectors_path) // (self.dim * 4)
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+
+    def _sync(self):
+        """
+        Picks up rows and retrained centroids written by other processes since
+        this one last looked. Call it inside the write transaction.
+        """
+        size = self._meta("size", 0)
+        trained_at = self._meta("trained_at", 0)
+        if size == self.size and trained_at == self.trained_at:
+            return
+        if trained_at != self.trained_at:
+            self.centroids = np.load(self._centroids_path) if os.path.exists(self._centroids_path) else None
+        self.size, self.trained_at = size, trained_at
+        self._open_vectors(max(size, self.capacity))
+        self._load_lists()
+
+    def _load_lists(self):
+        rows = self._conn.execute("SELECT row, list FROM items ORDER BY row").fetchall()
+        self._alive = np.zeros(self.capacity, dtype=bool)
+        self._lists = {}
+        for row, list_id in rows:
+            self._alive[row] = True
+            self._lists.setdefault(list_id, []).append(row)
+        self._arrays = {}
+
+    def __len__(self):
+        with self._lock:
+            return int(self._alive[:self.size].sum())
+
+    def _lookup(self, column, keys):
+        # Chunked to stay under SQLite's bound-parameter limit
+        keys = list(keys)
+        found = []
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                found += self._conn.execute(
+                    f"SELECT key, {column} FROM items WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+        return found
+
+    def known(self, keys):
+        """
+        {key: content hash} for the keys already in the index.
+        """
+        return dict(self._lookup("hash", keys))
+
+    def _assign(self, vectors):
+        if self.centroids is None:
+            return np.full(len(vectors), -1, dtype=np.int64)
+        return np.argmax(vectors @ self.centroids.T, axis=1)
+
+    def add(self, items):
+        """
+        items: list of (key, vector, content_hash, payload dict). A key that is
+        already present is replaced. Vectors are normalized here.
+        """
+        if not items:
+            return
+        vectors = _normalize(np.stack([np.asarray(v, dtype=np.float32) for _, v, _, _ in items]))
+        with self._lock:
+            # Write lock first, so no other process can take the same rows
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._sync()
+                old = [(row,) for _, row in self._lookup("row", [key for key, _, _, _ in items])]
+                if self.size + len(items) > self.capacity:
+                    self._open_vectors(max(self.capacity * 2, self.size + len(items)))
+                    alive = np.zeros(self.capacity, dtype=bool)
+                    alive[:len(self._alive)] = self._alive
+                    self._alive = alive
+                rows = np.arange(self.size, self.size + len(items))
+                lists = self._assign(vectors)
+                self._vectors[rows] = vectors
+                # Replaced vectors stay in the file but drop out of every list
+                self._conn.executemany("DELETE FROM items WHERE row = ?", old)
+                self._conn.executemany(
+                    "INSERT INTO items (row, key, hash, list, payload) VALUES (?, ?, ?, ?, ?)",
+                    [(int(row), key, content_hash, int(list_id), json.dumps(payload))
+                     for row, list_id, (key, _, content_hash, payload) in zip(rows, lists, items)]
+                )
+                self._set_meta("size", self.size + len(items))
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self.size += len(items)
+            for (row,) in old:
+                self._alive[row] = False
+            self._alive[rows] = True
+            for row, list_id in zip(rows.tolist(), lists.tolist()):
+                self._lists.setdefault(list_id, []).append(row)
+                self._arrays.pop(list_id, None)
+            self._maybe_train()
+
+    def _maybe_train(self):
+        live = len(self)
+        if live >= self.train_min and live >= 4 * max(self.trained_at, self.train_min // 4):
+            self.train()
+
+    def train(self, iterations=10, seed=0):
+        """
+        (Re)builds the IVF centroids with spherical k-means and reassigns every vector.
+        """
+        with self._lock:
+            self._sync()
+            rows = np.flatnonzero(self._alive[:self.size])
+            if len(rows) == 0:
+                return
+            # Never more lists than live vectors (dead rows count toward size, not here)
+            nlist = int(min(4096, len(rows), max(16, np.sqrt(len(rows)))))
+            rng = np.random.default_rng(seed)
+            sample = self._vectors[np.sort(rng.choice(rows, min(len(rows), nlist * 64), replace=False))]
+            centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+            for _ in range(iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sample)
+                empty = ~np.bincount(labels, minlength=nlist).astype(bool)
+                # Reseed empty clusters with random sample points
+                sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+                centroids = _normalize(sums)
+            self.centroids = centroids
+
+            lists = np.empty(len(rows), dtype=np.int64)
+            for start in range(0, len(rows), 16384):
+                lists[start:start + 16384] = self._assign(self._vectors[rows[start:start + 16384]])
+            np.save(self._centroids_path, centroids)
+            self._conn.executemany("UPDATE items SET list = ? WHERE row = ?",
+                                   zip(lists.tolist(), rows.tolist()))
+            self.trained_at = len(rows)
+            self._set_meta("trained_at", self.trained_at)
+            self._conn.commit()
+            self._vectors.flush()
+            self._lists = {}
+            for row, list_id in zip(rows.tolist(), lists.tolist()):
+                self._lists.setdefault(list_id, []).append(row)
+            self._arrays = {}
+
+    def _list_rows(self, list_id):
+        array = self._arrays.get(list_id)
+        if array is None:
+            array = self._arrays[list_id] = np.asarray(self._lists.get(list_id, []), dtype=np.int64)
+        return array
+
+    def vector(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT row FROM items WHERE key = ?", (key,)).fetchone()
+            return np.array(self._vectors[row[0]]) if row else None
+
+    def search(self, vector, k=10, exclude=()):
+        """
+        [(key, similarity, payload)] for the k most similar vectors, best first.
+        """
+        query = _normalize(vector)[0]
+        with self._lock:
+            if self.centroids is None:
+                rows = np.flatnonzero(self._alive[:self.size])
+            else:
+                probe = np.argsort(-(self.centroids @ query))[:self.nprobe]
+                rows = np.concatenate([self._list_rows(int(list_id)) for list_id in probe] + [self._list_rows(-1)])
+                rows = rows[self._alive[rows]]
+            if len(rows) == 0:
+                return []
+            scores = self._vectors[rows] @ query
+            # A few spare in case excluded keys are among the best
+            take = min(len(rows), k + len(exclude))
+            best = np.argpartition(-scores, take - 1)[:take]
+            best = best[np.argsort(-scores[best])]
+            found = {r: (key, payload) for r, key, payload in self._conn.execute(
+                f"SELECT row, key, payload FROM items WHERE row IN ({','.join('?' * len(best))})",
+                rows[best].tolist()
+            )}
+        results = []
+        for i in best:
+            key, payload = found[int(rows[i])]
+            if key not in exclude:
+                results.append((key, round(float(scores[i]), 4), json.loads(payload)))
+        return results[:k]
+
+    def close(self):
+        with self._lock:
+            self._vectors.flush()
+            self._conn.close()
+
+
+# --- Matcher ---
+
+def candidate_text(result):
+    skills = ", ".join(result.get("skillsFound") or [])
+    return f"{result.get('suggestedRole') or ''}. Skills: {skills}. {result.get('summary') or ''}"
+
+
+def job_text(job):
+    return f"{job.get('title') or ''}. {job.get('company') or ''}. {job.get('snippet') or ''}"
+
+
+def _content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class Matcher:
+    """
+    Embeds candidates and job listings in batches (only new or changed ones)
+    and answers "best jobs for this candidate" / "best candidates for this
+    job" from the local indexes, without a model call once both are embedded.
+    """
+
+    def __init__(self, embedder=None, path=MATCH_INDEX_DIR):
+        self.embedder = embedder or build_embedder()
+        base = os.path.join(path, f"{self.embedder.name}-{self.embedder.dim}")
+        self.candidates = VectorIndex(os.path.join(base, "candidates"), self.embedder.dim)
+        self.jobs = VectorIndex(os.path.join(base, "jobs"), self.embedder.dim)
+
+    def _add(self, index, entries):
+        """
+        entries: (key, text, payload). Embeds only keys that are new or whose text changed.
+        """
+        entries = {key: (text, payload) for key, text, payload in entries if key and text.strip(". ")}
+        known = index.known(entries)
+        todo = [(key, text, payload) for key, (text, payload) in entries.items()
+                if known.get(key) != _content_hash(text)]
+        for start in range(0, len(todo), EMBEDDING_BATCH):
+            batch = todo[start:start + EMBEDDING_BATCH]
+            vectors = self.embedder.embed([text for _, text, _ in batch])
+            index.add([(key, vector, _content_hash(text), payload)
+                       for (key, text, payload), vector in zip(batch, vectors)])
+        return len(todo)
+
+    def add_candidates(self, candidates):
+        """
+        candidates: (key, analyze_resume result) pairs. Returns how many were embedded.
+        """
+        return self._add(self.candidates, [
+            (key, candidate_text(result),
+             {"name": result.get("name", ""), "score": result.get("score", 0),
+              "suggestedRole": result.get("suggestedRole", "")})
+            for key, result in candidates
+        ])
+
+    def add_jobs(self, sources):
+        """
+        sources: find_jobs listings; the URL is the key. Returns how many were embedded.
+        """
+        return self._add(self.jobs, [
+            (job.get("url"), job_text(job),
+             {"title": job.get("title", ""), "company": job.get("company", ""), "url": job.get("url", "")})
+            for job in sources
+        ])
+
+    def sync_candidates(self, store=None, batch_size=500):
+        """
+        Embeds every stored candidate that is not indexed yet (or changed).
+        """
+        if store is None:
+            from candidate_store import candidate_store as store
+        added = 0
+        batch = []
+        for row in store.iter_all(batch_size):
+            batch.append((row["key"], row))
+            if len(batch) >= batch_size:
+                added += self.add_candidates(batch)
+                batch = []
+        return added + self.add_candidates(batch)
+
+    def jobs_for_candidate(self, key, result=None, k=10, exclude=()):
+        """
+        Best indexed jobs for a candidate. With result given, the candidate
+        is indexed first if needed (one embedding call at most).
+        """
+        if result is not None:
+            self.add_candidates([(key, result)])
+        vector = self.candidates.vector(key)
+        return [] if vector is None else self.jobs.search(vector, k, exclude)
+
+    def candidates_for_job(self, job, k=10):
+        """
+        Best indexed candidates for a find_jobs listing (indexed first if needed).
+        """
+        self.add_jobs([job])
+        vector = self.jobs.vector(job.get("url"))
+        return [] if vector is None else self.candidates.search(vector, k)
+
+    def search_text(self, text, k=10):
+        """
+        Free-text query against both indexes: {"candidates": [...], "jobs": [...]}.
+        """
+        vector = self.embedder.embed([text])[0]
+        return {"candidates": self.candidates.search(vector, k), "jobs": self.jobs.search(vector, k)}
+
+    def snapshot(self):
+        return {"embedder": self.embedder.name, "dim": self.embedder.dim,
+                "candidates": len(self.candidates), "jobs": len(self.jobs),
+                "clustered": {"candidates": self.candidates.centroids is not None,
+                              "jobs": self.jobs.centroids is not None}}
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher():
+    """
+    The process-wide Matcher, opened on first use.
+    """
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = Matcher()
+    return _matcher
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sync", action="store_true", help="Embed stored candidates that are not indexed yet")
+    parser.add_argument("--stats", action="store_true", help="Print index sizes")
+    parser.add_argument("--query", help="Free-text search over candidates and jobs")
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    matcher = get_matcher()
+    if args.sync:
+        print(f"Embedded {matcher.sync_candidates()} candidate(s)")
+    if args.query:
+        print(json.dumps(matcher.search_text(args.query, args.k), indent=2))
+    if args.stats or not (args.sync or args.query):
+        print(json.dumps(matcher.snapshot(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
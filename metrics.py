@@ -0,0 +1,311 @@
+import os
+import time
+import asyncio
+import bisect
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# --- Prometheus-style Registry ---
+
+SECONDS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 2e7)
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 2))
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_label_text(names, key + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_label_text(names, key + ('+Inf',))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_label_text(self.labels, key)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """
+    Value read from a callback at scrape time, e.g. lambda: scheduler.snapshot()["retries"].
+    """
+
+    def __init__(self, name, help, fn):
+        self.name = name
+        self.help = help
+        self.fn = fn
+
+    def render(self):
+        try:
+            value = float(self.fn())
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {value}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            # Re-registering (e.g. module reload) returns the existing metric
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=SECONDS_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name, help, fn):
+        with self._lock:
+            gauge = self._metrics[name] = Gauge(name, help, fn)
+            return gauge
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# --- Backend Metrics ---
+
+GEMINI_REQUESTS = registry.counter(
+    "hireme_gemini_requests_total", "Gemini calls by operation and outcome", ("op", "status"))
+GEMINI_SECONDS = registry.histogram(
+    "hireme_gemini_request_seconds", "Wall time of a Gemini call, retries included", ("op",))
+GEMINI_TTFB = registry.histogram(
+    "hireme_gemini_ttfb_seconds", "Time to first byte (first chunk for streams, full response otherwise)", ("op",))
+GEMINI_REQUEST_BYTES = registry.histogram(
+    "hireme_gemini_request_bytes", "Request payload size (text + inline files)", ("op",), BYTES_BUCKETS)
+GEMINI_TOKENS = registry.counter(
+    "hireme_gemini_tokens_total", "Tokens reported in usage_metadata", ("op", "kind"))
+GEMINI_RETRIES = registry.counter(
+    "hireme_gemini_retries_total", "Retried Gemini attempts", ("op",))
+CACHE_LOOKUPS = registry.counter(
+    "hireme_cache_lookups_total", "Cache lookups by cache and outcome", ("cache", "outcome"))
+APP_RERUNS = registry.counter(
+    "hireme_app_reruns_total", "Streamlit script runs by page", ("page",))
+
+# --- Tenant Metrics ---
+
+TENANT_CALLS = registry.counter(
+    "hireme_tenant_calls_total", "Scheduled Gemini calls by tenant, priority and outcome",
+    ("tenant", "priority", "status"))
+TENANT_TOKENS = registry.counter(
+    "hireme_tenant_tokens_total", "Tokens used per tenant", ("tenant",))
+TENANT_WAIT_SECONDS = registry.histogram(
+    "hireme_tenant_wait_seconds", "Time a call waited on budgets, the fair queue and rate limits",
+    ("tenant", "priority"))
+
+# One label value per session would grow without bound; later tenants share "other"
+MAX_TENANT_LABELS = int(os.getenv("HIREME_MAX_TENANT_LABELS", 50))
+_tenant_labels = set()
+_tenant_labels_lock = threading.Lock()
+
+
+def tenant_label(tenant):
+    with _tenant_labels_lock:
+        if tenant in _tenant_labels:
+            return tenant
+        if len(_tenant_labels) < MAX_TENANT_LABELS:
+            _tenant_labels.add(tenant)
+            return tenant
+    return "other"
+
+# --- Spans (OpenTelemetry if installed, otherwise no-op) ---
+
+try:
+    from opentelemetry import trace as _otel_trace
+    _tracer = _otel_trace.get_tracer("hireme")
+except ImportError:
+    _tracer = None
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+
+@contextmanager
+def span(name, **attributes):
+    if _tracer is None:
+        yield _NoopSpan()
+        return
+    with _tracer.start_as_current_span(name) as current:
+        for key, value in attributes.items():
+            current.set_attribute(key, value)
+        yield current
+
+
+class CallObserver:
+    """
+    Collects per-call facts while a Gemini call runs; see observe_gemini_call.
+    """
+
+    def __init__(self, op, span_):
+        self.op = op
+        self.span = span_
+        self.started = time.perf_counter()
+        self.ttfb = None
+        self.retries = 0
+
+    def retry(self, error=None):
+        self.retries += 1
+        GEMINI_RETRIES.inc(op=self.op)
+
+    def first_byte(self):
+        if self.ttfb is None:
+            self.ttfb = time.perf_counter() - self.started
+            GEMINI_TTFB.observe(self.ttfb, op=self.op)
+
+    def usage(self, response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        for kind, field in (("prompt", "prompt_token_count"), ("output", "candidates_token_count"),
+                            ("cached", "cached_content_token_count"), ("total", "total_token_count")):
+            value = getattr(usage, field, None)
+            if value:
+                GEMINI_TOKENS.inc(value, op=self.op, kind=kind)
+                self.span.set_attribute(f"gemini.tokens.{kind}", value)
+
+
+@contextmanager
+def observe_gemini_call(op, request_bytes):
+    """
+    Records wall time, TTFB, request bytes, tokens, retries and outcome of one call.
+    """
+    GEMINI_REQUEST_BYTES.observe(request_bytes, op=op)
+    with span("gemini." + op, **{"gemini.op": op, "gemini.request_bytes": request_bytes}) as current:
+        observer = CallObserver(op, current)
+        status = "ok"
+        try:
+            yield observer
+        except (GeneratorExit, asyncio.CancelledError):
+            status = "cancelled"
+            raise
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            elapsed = time.perf_counter() - observer.started
+            if observer.ttfb is None and status == "ok":
+                observer.first_byte()
+            GEMINI_SECONDS.observe(elapsed, op=op)
+            GEMINI_REQUESTS.inc(op=op, status=status)
+            current.set_attribute("gemini.retries", observer.retries)
+            current.set_attribute("gemini.status", status)
+
+# --- Exporters ---
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """
+    Serves registry.render() on http://host:port/metrics. Safe to call on every
+    Streamlit rerun - only the first call starts the server.
+    """
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"Error starting metrics server: {e}")
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+        return _server
+
+
+def write_metrics(path):
+    """
+    File exporter - writes the current metrics in Prometheus text format.
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
@@ -0,0 +1,169 @@
+import io
+import os
+import base64
+import hashlib
+import zipfile
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config import CACHE_BACKEND, CACHE_TTL, PDF_RENDERER, PDF_CACHE_PATH, PDF_WORKERS
+from result_cache import build_cache
+from templates import get_template_html
+
+# Template HTML is a fragment; renderers want a full page
+DOCUMENT = """<!DOCTYPE html>
+<html><head><meta charset="utf-8">
+<style>@page {{ size: A4; margin: 0; }} body {{ margin: 0; }}</style>
+</head><body>{body}</body></html>"""
+
+# PDF bytes (base64) keyed on renderer + hash of the rendered HTML
+pdf_cache = build_cache(CACHE_BACKEND, PDF_CACHE_PATH, CACHE_TTL, "pdf")
+
+
+# --- Renderers (imported only when a PDF is actually made) ---
+
+def _weasyprint(document):
+    from weasyprint import HTML
+    return HTML(string=document).write_pdf()
+
+
+def _xhtml2pdf(document):
+    from xhtml2pdf import pisa
+    out = io.BytesIO()
+    status = pisa.CreatePDF(document, dest=out, encoding="utf-8")
+    if status.err:
+        raise RuntimeError(f"xhtml2pdf reported {status.err} error(s)")
+    return out.getvalue()
+
+
+# Preference order for "auto": weasyprint handles the grid/flex layouts, xhtml2pdf is pure Python
+RENDERERS = {
+    "weasyprint": _weasyprint,
+    "xhtml2pdf": _xhtml2pdf,
+}
+
+
+def available_renderer(preferred=PDF_RENDERER):
+    """
+    Name of the renderer to use, or None if none is installed.
+    """
+    names = list(RENDERERS) if preferred == "auto" else [preferred]
+    for name in names:
+        if name in RENDERERS and importlib.util.find_spec(name) is not None:
+            return name
+    return None
+
+
+def render_pdf(html, renderer):
+    """
+    HTML fragment -> PDF bytes. Module-level so process pool workers can run it.
+    """
+    return RENDERERS[renderer](DOCUMENT.format(body=html))
+
+
+def _pdf_key(html, renderer):
+    return f"pdf:{renderer}:" + hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+def _cached_pdf(key):
+    cached = pdf_cache.get(key)
+    return base64.b64decode(cached) if cached is not None else None
+
+
+def _store_pdf(key, pdf):
+    pdf_cache.set(key, base64.b64encode(pdf).decode("ascii"))
+
+
+# --- Public API ---
+
+def html_to_pdf(html):
+    """
+    Renders one HTML fragment to PDF bytes, reusing the cached PDF when the
+    same HTML was exported before. Returns None if no renderer is installed
+    or rendering fails.
+    """
+    renderer = available_renderer()
+    if renderer is None:
+        print("Error exporting PDF: install xhtml2pdf or weasyprint")
+        return None
+    key = _pdf_key(html, renderer)
+    pdf = _cached_pdf(key)
+    if pdf is not None:
+        return pdf
+    try:
+        pdf = render_pdf(html, renderer)
+    except Exception as e:
+        print(f"Error exporting PDF: {e}")
+        return None
+    _store_pdf(key, pdf)
+    return pdf
+
+
+def export_pdf(template_id, data):
+    """
+    resume_data rendered with a template, as PDF bytes (or None).
+    """
+    return html_to_pdf(get_template_html(template_id, data))
+
+
+def pdf_filename(row):
+    base = os.path.splitext(row.get("file") or "")[0] or row.get("name") or "resume"
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in base) + ".pdf"
+
+
+def export_batch(rows, template_id, max_workers=PDF_WORKERS):
+    """
+    Exports many analyzed resumes (batch result rows or resume_data dicts).
+    HTML is rendered here (memoized); PDF rendering, which is CPU-bound, runs
+    on a process pool. Cached PDFs and duplicate documents are rendered once.
+    Yields (filename, pdf_bytes or None, error) as each one finishes.
+    """
+    renderer = available_renderer()
+    rows = [r for r in rows if not r.get("error")]
+    if renderer is None:
+        for row in rows:
+            yield pdf_filename(row), None, "No PDF renderer installed (xhtml2pdf or weasyprint)"
+        return
+
+    pending = {}   # cache key -> (html, [filenames])
+    for row in rows:
+        html = get_template_html(template_id, row)
+        key = _pdf_key(html, renderer)
+        pdf = None if key in pending else _cached_pdf(key)
+        if pdf is not None:
+            yield pdf_filename(row), pdf, ""
+        else:
+            pending.setdefault(key, (html, []))[1].append(pdf_filename(row))
+    if not pending:
+        return
+
+    with ProcessPoolExecutor(max_workers=max(1, min(int(max_workers), len(pending)))) as pool:
+        futures = {pool.submit(render_pdf, html, renderer): key for key, (html, _) in pending.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                pdf, error = future.result(), ""
+                _store_pdf(key, pdf)
+            except Exception as e:
+                pdf, error = None, str(e)
+            for filename in pending[key][1]:
+                yield filename, pdf, error
+
+
+def pdfs_to_zip(results):
+    """
+    Zips (filename, pdf_bytes, error) results, skipping failures. Returns the zip bytes.
+    """
+    buffer = io.BytesIO()
+    seen = set()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for filename, pdf, _ in results:
+            if pdf is None:
+                continue
+            name, n = filename, 1
+            while name in seen:
+                n += 1
+                name = f"{os.path.splitext(filename)[0]}-{n}.pdf"
+            seen.add(name)
+            archive.writestr(name, pdf)
+    return buffer.getvalue()
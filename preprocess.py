@@ -0,0 +1,201 @@
+import io
+import math
+import time
+
+from config import (MAX_UPLOAD_BYTES, MAX_PDF_PAGES, PDF_KEEP_PAGES, IMAGE_MAX_SIDE, IMAGE_QUALITY,
+                    MAX_IMAGE_PIXELS)
+from text_extraction import TOKENS_PER_PAGE, PayloadLog
+
+SUPPORTED_MIME_TYPES = {"application/pdf", "image/png", "image/jpeg", "image/webp"}
+
+# First bytes of each supported format
+_MAGIC = {
+    "application/pdf": (b"%PDF",),
+    "image/png": (b"\x89PNG\r\n\x1a\n",),
+    "image/jpeg": (b"\xff\xd8\xff",),
+    "image/webp": (b"RIFF",),
+}
+
+# Settings that change what is sent - part of the analysis cache key
+PREPROCESS_VERSION = f"pre{PDF_KEEP_PAGES}/{IMAGE_MAX_SIDE}/{IMAGE_QUALITY}"
+
+
+class UploadRejected(ValueError):
+    """
+    The upload breaks a limit; nothing was sent to the model.
+    """
+
+
+def estimate_image_tokens(width, height):
+    """
+    Gemini: small images cost one tile, larger ones one tile per 768x768 crop.
+    """
+    if width <= 384 and height <= 384:
+        return TOKENS_PER_PAGE
+    return math.ceil(width / 768) * math.ceil(height / 768) * TOKENS_PER_PAGE
+
+
+def _pdf_reader(data):
+    from pypdf import PdfReader
+    return PdfReader(io.BytesIO(data))
+
+
+def _open_pdf(data):
+    try:
+        reader = _pdf_reader(data)
+        len(reader.pages)
+        return reader
+    except ImportError:
+        return None
+    except Exception as e:
+        # Unreadable here; the model may still manage, so it is sent as-is
+        print(f"Error reading PDF, sending as-is: {e}")
+        return None
+
+
+def _image_pixels(data):
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    try:
+        # Reads the header only - the pixels are never decoded here
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+    except Image.DecompressionBombError:
+        # Past twice Pillow's own limit - far over ours too
+        return math.inf
+    except Exception as e:
+        print(f"Error reading image size: {e}")
+        return None
+    return width * height
+
+
+def check_upload(file_bytes, mime_type, pdf=None):
+    """
+    Raises UploadRejected if the file must not be sent: type, size, magic
+    bytes, then the PDF page count and image pixel count (read from the
+    PDF structure / image header, nothing is rendered).
+
+    Returns the parsed PdfReader for a readable PDF, else None. Pass it on as
+    pdf= to preprocess_upload so the file is parsed only once.
+    """
+    view = memoryview(file_bytes)
+    if mime_type not in SUPPORTED_MIME_TYPES:
+        raise UploadRejected(f"Unsupported file type {mime_type}. Upload a PDF, PNG, JPG or WEBP.")
+    if view.nbytes == 0:
+        raise UploadRejected("The file is empty.")
+    if view.nbytes > MAX_UPLOAD_BYTES:
+        raise UploadRejected(f"File is {view.nbytes / 1e6:.1f} MB; the limit is {MAX_UPLOAD_BYTES / 1e6:.0f} MB.")
+    if not any(view[:len(magic)] == magic for magic in _MAGIC[mime_type]):
+        raise UploadRejected(f"The file content does not look like {mime_type}.")
+    if mime_type == "application/pdf":
+        pdf = pdf or _open_pdf(file_bytes)
+        if pdf is not None and len(pdf.pages) > MAX_PDF_PAGES:
+            raise UploadRejected(f"PDF has {len(pdf.pages)} pages; the limit is {MAX_PDF_PAGES}.")
+        return pdf
+    pixels = _image_pixels(file_bytes)
+    if pixels is not None and pixels > MAX_IMAGE_PIXELS:
+        raise UploadRejected(f"Image is too large (over {MAX_IMAGE_PIXELS / 1e6:.0f} megapixels).")
+    return None
+
+
+def _image(data, mime_type, stats):
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+    try:
+        # Lazy: reads the header only. Pillow's global MAX_IMAGE_PIXELS is left alone
+        image = Image.open(io.BytesIO(data))
+    except Image.DecompressionBombError:
+        image = None
+    if image is None or image.size[0] * image.size[1] > MAX_IMAGE_PIXELS:
+        raise UploadRejected(f"Image is too large (over {MAX_IMAGE_PIXELS / 1e6:.0f} megapixels).")
+    width, height = image.size
+    stats.update(width_before=width, height_before=height, width_after=width, height_after=height)
+    stats["est_tokens_before"] = stats["est_tokens_after"] = estimate_image_tokens(width, height)
+
+    scale = IMAGE_MAX_SIDE / max(width, height)
+    if scale >= 1 and mime_type == "image/jpeg":
+        # Small JPEG: already compact, send as-is
+        return None
+    if scale < 1 and image.format == "JPEG":
+        # Let the JPEG decoder downscale in the DCT domain - far cheaper than decoding 12 MP
+        image.draft("RGB", (int(width * scale), int(height * scale)))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "L"):
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.convert("RGBA").getchannel("A"))
+        image = background
+    if scale < 1:
+        image.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE), Image.LANCZOS)
+
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=IMAGE_QUALITY, optimize=True)
+    if out.tell() >= len(data) and scale >= 1:
+        return None
+    stats.update(width_after=image.size[0], height_after=image.size[1],
+                 est_tokens_after=estimate_image_tokens(*image.size), action="image_resized")
+    return out.getvalue(), "image/jpeg"
+
+
+def _pdf(reader, stats):
+    pages = len(reader.pages)
+    stats.update(pages_before=pages, pages_after=pages,
+                 est_tokens_before=pages * TOKENS_PER_PAGE, est_tokens_after=pages * TOKENS_PER_PAGE)
+    if pages <= PDF_KEEP_PAGES:
+        return None
+
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    for page in reader.pages[:PDF_KEEP_PAGES]:
+        writer.add_page(page)
+    out = io.BytesIO()
+    writer.write(out)
+    stats.update(pages_after=PDF_KEEP_PAGES, est_tokens_after=PDF_KEEP_PAGES * TOKENS_PER_PAGE,
+                 trimmed_pages=pages - PDF_KEEP_PAGES, action="pdf_trimmed")
+    return out.getvalue(), "application/pdf"
+
+
+def preprocess_upload(file_bytes, mime_type, pdf=None):
+    """
+    Checks limits, then shrinks the upload before it goes to the model:
+    images are downscaled to IMAGE_MAX_SIDE and recompressed as JPEG, PDFs
+    longer than PDF_KEEP_PAGES keep only their first pages. Anything that is
+    already small is passed through untouched (same buffer, no copy).
+    pdf: the reader check_upload returned, if the caller already has it.
+
+    Returns (file_bytes, mime_type, stats); stats["trimmed_pages"] is the
+    number of PDF pages left out. Raises UploadRejected.
+    """
+    started = time.perf_counter()
+    pdf = check_upload(file_bytes, mime_type, pdf)
+    # bytes are used in place (BytesIO over bytes does not copy); other buffers are copied once
+    data = file_bytes if isinstance(file_bytes, bytes) else bytes(memoryview(file_bytes))
+    stats = {"original_bytes": len(data), "action": "none", "est_tokens_before": 0, "est_tokens_after": 0,
+             "trimmed_pages": 0}
+
+    processed = None
+    if pdf is not None:
+        processed = _pdf(pdf, stats)
+    elif mime_type != "application/pdf":
+        try:
+            processed = _image(data, mime_type, stats)
+        except UploadRejected:
+            raise
+        except Exception as e:
+            print(f"Error preprocessing image, sending as-is: {e}")
+    if processed is None:
+        processed = (data, mime_type)
+        stats["est_tokens_after"] = stats["est_tokens_before"]
+
+    stats["sent_bytes"] = len(processed[0])
+    stats["bytes_saved"] = stats["original_bytes"] - stats["sent_bytes"]
+    stats["tokens_saved"] = stats["est_tokens_before"] - stats["est_tokens_after"]
+    stats["preprocess_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    preprocess_log.record(stats)
+    return processed[0], processed[1], stats
+
+
+preprocess_log = PayloadLog()
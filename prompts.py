@@ -0,0 +1,306 @@
+"""
+Every prompt and response schema sent to the model, in one registry.
+
+A Prompt has a static prefix (instructions, identical for every call, sent
+as the system instruction) and a small dynamic template. Prompt.key carries
+the version and a hash of the text and schema, so editing a prompt makes old
+cached results stop matching without anyone remembering to bump a number.
+
+    python -m prompts           # token profile, estimated locally
+    python -m prompts --api     # exact counts from models.count_tokens
+"""
+import sys
+import json
+import time
+import copy
+import hashlib
+import argparse
+import textwrap
+import threading
+
+from config import CONTEXT_CACHE, CONTEXT_CACHE_TTL, CONTEXT_CACHE_MIN_TOKENS
+from singleflight import SingleFlight
+
+PROMPTS = {}
+
+
+def estimate_tokens(text):
+    # About 4 characters per token for English prose and JSON
+    return len(text) // 4 + 1 if text else 0
+
+
+class Prompt:
+    """
+    instructions: static prefix. template: str.format template for the
+    per-call part. schema: response schema (None = free text). sample: fields
+    for the template, used by the profiler.
+    """
+
+    def __init__(self, name, version, instructions="", template="", schema=None, sample=None):
+        self.name = name
+        self.version = version
+        self.instructions = textwrap.dedent(instructions).strip()
+        self.template = textwrap.dedent(template).strip()
+        self.schema = schema
+        self.sample = sample or {}
+        digest = hashlib.sha256(
+            json.dumps([self.instructions, self.template, schema], sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        self.key = f"{name}/v{version}/{digest[:12]}"
+
+    def render(self, **fields):
+        """
+        The per-call part of the prompt.
+        """
+        return self.template.format(**fields) if self.template else ""
+
+    def extend(self, name, version, instructions="", properties=None):
+        """
+        A new prompt with more instructions and schema properties, e.g. the
+        one-shot analysis that also returns improvements.
+        """
+        schema = copy.deepcopy(self.schema)
+        if properties:
+            schema["properties"].update(properties)
+        return Prompt(name, version, self.instructions + "\n" + textwrap.dedent(instructions).strip(),
+                      self.template, schema, self.sample)
+
+
+def register(prompt):
+    PROMPTS[prompt.name] = prompt
+    return prompt
+
+
+def get_prompt(name):
+    return PROMPTS[name]
+
+
+# --- Prompts ---
+
+ANALYSIS = register(Prompt("analysis", 3, instructions="""
+    You are an expert HR Resume Screener. Analyze the attached resume.
+    Provide a structured JSON response with:
+    1. The candidate's full name (Extract carefully from the header).
+    2. A score from 0-100 based on professional standards.
+    3. A brief professional summary of the candidate (Write in implied first-person "Resume Voice", e.g., "Ambitious Software Engineer...", do NOT use "He is" or "The candidate is").
+    4. Top 3 strengths.
+    5. Top 3 weaknesses or areas for improvement.
+    6. The most suitable job role for this profile - provide ONLY ONE CLEAR JOB TITLE like "Frontend Developer", "Data Analyst", "Marketing Manager" etc. Keep it short and industry standard.
+    7. A list of technical and soft skills found.
+
+    IMPORTANT: For job role, return only one concise job title that best matches the candidate's experience. Do not add descriptions or multiple roles.
+    """, schema={
+    "type": "OBJECT",
+    "properties": {
+        "name": {"type": "STRING"},
+        "score": {"type": "NUMBER"},
+        "summary": {"type": "STRING"},
+        "strengths": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "weaknesses": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "suggestedRole": {"type": "STRING"},
+        "skillsFound": {"type": "ARRAY", "items": {"type": "STRING"}}
+    }
+}))
+
+# One-shot mode: the coaching tips come back in the same generation
+ANALYSIS_WITH_IMPROVEMENTS = register(ANALYSIS.extend("analysis_improvements", 3, instructions="""
+    8. For each weakness, one specific, actionable tip on how to fix it or phrase it better, as "improvements". The order must match the weaknesses.
+    """, properties={"improvements": {"type": "ARRAY", "items": {"type": "STRING"}}}))
+
+IMPROVEMENTS = register(Prompt("improvements", 2, instructions="""
+    You are a career coach. For each of the following resume weaknesses, provide one specific, actionable tip on how to fix it or phrase it better.
+    Return a JSON object with a property "improvements" which is an array of strings. The order must match the input.
+    """, template="Weaknesses: {weaknesses}", schema={
+    "type": "OBJECT",
+    "properties": {
+        "improvements": {"type": "ARRAY", "items": {"type": "STRING"}}
+    }
+}, sample={"weaknesses": json.dumps(["No metrics", "Long summary", "Missing links"])}))
+
+# Grounded search takes no response schema and no separate instructions
+JOBS = register(Prompt("jobs", 1, template="""
+    Find active job listings for "{query}" in "{location}".{mode_clause} List 5 specific job openings with company names. Focus on jobs posted in the last 30 days.
+    """, sample={"query": "Data Analyst", "location": "Remote", "mode_clause": ""}))
+
+LISTINGS = register(Prompt("listings", 2, instructions="""
+    Below is a job search answer and the web sources it cited, numbered [0], [1], ...
+    For every source, return one record with its source number. Take the job title,
+    company, location, work mode and posting date from the source and the answer text.
+    Use "" for anything that is not stated. Set isJobListing to false for sources that
+    are not a single job opening (news, salary pages, search result pages).
+    """, template="""
+    ANSWER:
+    {text}
+
+    SOURCES:
+    {sources}
+    """, schema={
+    "type": "OBJECT",
+    "properties": {
+        "listings": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "source": {"type": "INTEGER"},
+                    "isJobListing": {"type": "BOOLEAN"},
+                    "title": {"type": "STRING"},
+                    "company": {"type": "STRING"},
+                    "location": {"type": "STRING"},
+                    "mode": {"type": "STRING", "enum": ["Remote", "Hybrid", "On-site", "Unknown"]},
+                    "posted": {"type": "STRING"}
+                },
+                "required": ["source", "isJobListing", "title", "company", "location", "mode"]
+            }
+        }
+    }
+}, sample={"text": "Here are 5 recent openings. " * 20,
+           "sources": "\n".join(f"[{i}] Listing {i} | https://jobs.example.com/{i} | Data Analyst at Acme"
+                                for i in range(5))}))
+
+
+# --- Provider-side context caching ---
+
+class ContextCache:
+    """
+    Keeps a prompt's instructions in a Gemini context cache
+    (client.caches.create), so each call sends only its dynamic part and the
+    prefix is billed at the cached-token rate. One cache per prompt key and
+    model, renewed before it expires.
+
+    The API refuses caches under a minimum size (CONTEXT_CACHE_MIN_TOKENS);
+    shorter prefixes are sent as a normal system instruction.
+
+    Creating a cache is a network call: it runs outside the lock, once per
+    key (concurrent first calls for the same prompt share it), so other
+    prompts never wait on it.
+    """
+
+    def __init__(self, enabled=CONTEXT_CACHE, ttl=CONTEXT_CACHE_TTL, min_tokens=CONTEXT_CACHE_MIN_TOKENS):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.min_tokens = min_tokens
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self.stats = {"created": 0, "reused": 0, "too_small": 0, "errors": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _fresh(self, key):
+        """
+        (True, name or None) while a cache entry or a remembered failure is valid, else (False, None).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.time():
+                return True, entry[0]
+        return False, None
+
+    def name_for(self, prompt, model, client):
+        """
+        The cached content name to send with this prompt, or None.
+        """
+        if not self.enabled or not prompt.instructions:
+            return None
+        if estimate_tokens(prompt.instructions) < self.min_tokens:
+            self._count("too_small")
+            return None
+        key = (prompt.key, model)
+        fresh, name = self._fresh(key)
+        if fresh:
+            if name:
+                self._count("reused")
+            return name
+        return self._flights.do(f"{prompt.key}|{model}", lambda: self._create(key, prompt, model, client))
+
+    def _create(self, key, prompt, model, client):
+        # A call that lost the race to an identical create finds its result here
+        fresh, name = self._fresh(key)
+        if fresh:
+            return name
+        started = time.time()
+        try:
+            from google.genai import types
+            cache = client.caches.create(model=model, config=types.CreateCachedContentConfig(
+                display_name=prompt.key,
+                system_instruction=prompt.instructions,
+                ttl=f"{self.ttl}s"
+            ))
+            if not cache.name:
+                raise ValueError("no cache name in the response")
+        except Exception as e:
+            print(f"Error creating context cache for {prompt.key}: {e}")
+            with self._lock:
+                # Plain system instruction for a while instead of retrying on every call
+                self._entries[key] = (None, time.time() + 300)
+                self.stats["errors"] += 1
+            return None
+        with self._lock:
+            # Renewed a minute early so no call lands on an expired cache
+            self._entries[key] = (cache.name, started + self.ttl - 60)
+            self.stats["created"] += 1
+        return cache.name
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats, active=sum(1 for name, _ in self._entries.values() if name))
+
+
+context_cache = ContextCache()
+
+
+# --- Token profiler ---
+
+def profile(count=estimate_tokens, min_tokens=CONTEXT_CACHE_MIN_TOKENS):
+    """
+    Token cost of every registered prompt, split into the static prefix, the
+    dynamic part (rendered with the prompt's sample) and the response schema.
+    """
+    rows = []
+    for prompt in PROMPTS.values():
+        static = count(prompt.instructions) if prompt.instructions else 0
+        dynamic = count(prompt.render(**prompt.sample)) if prompt.template else 0
+        schema = count(json.dumps(prompt.schema)) if prompt.schema else 0
+        rows.append({
+            "prompt": prompt.name,
+            "key": prompt.key,
+            "static_tokens": static,
+            "dynamic_tokens": dynamic,
+            "schema_tokens": schema,
+            "total_tokens": static + dynamic + schema,
+            "static_share": round(static / ((static + dynamic) or 1), 2),
+            "context_cacheable": static >= min_tokens,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api", action="store_true", help="Count with the Gemini API instead of estimating")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    count = estimate_tokens
+    if args.api:
+        from gemini_backend import get_client, MODEL_NAME
+        client = get_client()
+
+        def count(text):
+            return client.models.count_tokens(model=MODEL_NAME, contents=text).total_tokens
+
+    rows = profile(count)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+    print(f"{'prompt':<24}{'static':>8}{'dynamic':>9}{'schema':>8}{'total':>8}  key")
+    for row in rows:
+        print(f"{row['prompt']:<24}{row['static_tokens']:>8}{row['dynamic_tokens']:>9}"
+              f"{row['schema_tokens']:>8}{row['total_tokens']:>8}  {row['key']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+from config import CACHE_BACKEND, CACHE_PATH, CACHE_TTL, CACHE_MAX_ENTRIES, REDIS_URL
+from metrics import CACHE_LOOKUPS
+
+
+def make_key(file_bytes, mime_type, prompt_version, model):
+    """
+    Content-addressed cache key for one analysis request.
+    Same file + mime type + prompt version + model -> same key.
+    """
+    h = hashlib.sha256()
+    h.update(file_bytes)
+    for part in (mime_type, prompt_version, model):
+        h.update(b"\0")
+        h.update(str(part).encode("utf-8"))
+    return h.hexdigest()
+
+
+# --- Backends ---
+# Every backend stores JSON strings and supports get(key) / set(key, value, ttl).
+
+class MemoryBackend:
+    """
+    In-process LRU. Lost on restart, shared by all sessions of this process.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires and expires < time.time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._items[key] = (value, time.time() + ttl if ttl else None)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class SQLiteBackend:
+    """
+    On-disk cache in a single SQLite file. Survives restarts.
+    Least recently used rows are dropped once max_entries is exceeded.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires REAL,
+                accessed REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires = row
+            if expires and expires < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl if ttl else None, now)
+            )
+            # Drop expired rows, then trim to max_entries (oldest access first)
+            self._conn.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires < ?", (now,))
+            self._conn.execute("""
+                DELETE FROM cache WHERE key IN (
+                    SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+
+class RedisBackend:
+    """
+    Redis-compatible store. TTL is handled by Redis itself, size is kept
+    under max_entries with a sorted set of keys ordered by last access.
+    Works with redis.Redis or any object exposing the same commands (see FakeRedis).
+    """
+
+    def __init__(self, redis_client, max_entries=CACHE_MAX_ENTRIES, prefix="hireme:analysis:"):
+        self.redis = redis_client
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self.index_key = prefix + "_lru"
+
+    def get(self, key):
+        value = self.redis.get(self.prefix + key)
+        if value is None:
+            self.redis.zrem(self.index_key, key)
+            return None
+        self.redis.zadd(self.index_key, {key: time.time()})
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def set(self, key, value, ttl):
+        self.redis.set(self.prefix + key, value, ex=int(ttl) if ttl else None)
+        self.redis.zadd(self.index_key, {key: time.time()})
+        overflow = self.redis.zcard(self.index_key) - self.max_entries
+        if overflow > 0:
+            for old in self.redis.zrange(self.index_key, 0, overflow - 1):
+                old = old.decode("utf-8") if isinstance(old, bytes) else old
+                self.redis.delete(self.prefix + old)
+                self.redis.zrem(self.index_key, old)
+
+    def clear(self):
+        for key in self.redis.zrange(self.index_key, 0, -1):
+            key = key.decode("utf-8") if isinstance(key, bytes) else key
+            self.redis.delete(self.prefix + key)
+        self.redis.delete(self.index_key)
+
+
+class FakeRedis:
+    """
+    Tiny in-memory stand-in for the handful of Redis commands RedisBackend uses.
+    Handy for local runs without a Redis server.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._zsets = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires < time.time():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def get(self, key):
+        with self._lock:
+            return self._data[key] if self._alive(key) else None
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = value
+            if ex:
+                self._expires[key] = time.time() + ex
+            else:
+                self._expires.pop(key, None)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if key in self._data or key in self._zsets:
+                    removed += 1
+                self._data.pop(key, None)
+                self._zsets.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    def zadd(self, name, mapping):
+        with self._lock:
+            self._zsets.setdefault(name, {}).update(mapping)
+            return len(mapping)
+
+    def zrem(self, name, *members):
+        with self._lock:
+            zset = self._zsets.get(name, {})
+            return sum(zset.pop(m, None) is not None for m in members)
+
+    def zcard(self, name):
+        with self._lock:
+            return len(self._zsets.get(name, {}))
+
+    def zrange(self, name, start, end):
+        with self._lock:
+            members = sorted(self._zsets.get(name, {}).items(), key=lambda kv: kv[1])
+            end = len(members) if end == -1 else end + 1
+            return [m for m, _ in members[start:end]]
+
+
+# --- Cache Front ---
+
+class ResultCache:
+    """
+    JSON result cache over any backend, with hit / miss counters.
+    """
+
+    def __init__(self, backend, ttl=CACHE_TTL, name="analysis"):
+        self.backend = backend
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"Error reading cache: {e}")
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        CACHE_LOOKUPS.inc(cache=self.name, outcome="miss" if value is None else "hit")
+        return None if value is None else json.loads(value)
+
+    def set(self, key, result):
+        try:
+            self.backend.set(key, json.dumps(result), self.ttl)
+        except Exception as e:
+            print(f"Error writing cache: {e}")
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+def build_cache(backend=CACHE_BACKEND, path=CACHE_PATH, ttl=CACHE_TTL, namespace="analysis"):
+    """
+    Creates the cache configured in config.py.
+    Falls back to the in-process LRU if the chosen backend is unavailable.
+    """
+    try:
+        if backend == "sqlite":
+            return ResultCache(SQLiteBackend(path), ttl, namespace)
+        if backend == "redis":
+            import redis
+            return ResultCache(RedisBackend(redis.Redis.from_url(REDIS_URL), prefix=f"hireme:{namespace}:"), ttl, namespace)
+        if backend == "fakeredis":
+            return ResultCache(RedisBackend(FakeRedis(), prefix=f"hireme:{namespace}:"), ttl, namespace)
+    except Exception as e:
+        print(f"Error creating {backend} cache, using memory: {e}")
+    return ResultCache(MemoryBackend(), ttl, namespace)
@@ -0,0 +1,592 @@
+import time
+import heapq
+import random
+import asyncio
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from config import (
+    RATE_LIMIT_RPM, RATE_LIMIT_TPM, MAX_RETRIES, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+    BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT, MAX_CONCURRENT_CALLS,
+    DEFAULT_TENANT, TENANT_RPM, TENANT_TPM, TENANT_MAX_WAIT, TENANT_WEIGHTS
+)
+from metrics import TENANT_CALLS, TENANT_TOKENS, TENANT_WAIT_SECONDS, tenant_label
+
+# HTTP codes worth retrying - quota and transient server errors
+RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling the provider while the circuit breaker is open.
+    """
+
+
+class QuotaExceededError(Exception):
+    """
+    Raised when a tenant's request or token budget would need too long a wait.
+    """
+
+
+# --- Tenants & Priorities ---
+# The tenant (a user session, an API key, ...) and priority of the code running
+# right now. Set them once per Streamlit run / job / batch; every backend call
+# made inside picks them up.
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+_PRIORITY_ORDER = {INTERACTIVE: 0, BACKGROUND: 1}
+
+_tenant = contextvars.ContextVar("hireme_tenant", default=DEFAULT_TENANT)
+_priority = contextvars.ContextVar("hireme_priority", default=None)
+
+
+def current_tenant():
+    return _tenant.get()
+
+
+def set_tenant(tenant):
+    """
+    Sets the tenant for the rest of this thread / task (e.g. a Streamlit script run).
+    """
+    _tenant.set(tenant or DEFAULT_TENANT)
+
+
+@contextmanager
+def tenant_scope(tenant=None, priority=None):
+    """
+    Runs the block as `tenant` and/or with a forced `priority`.
+    """
+    tokens = []
+    if tenant is not None:
+        tokens.append((_tenant, _tenant.set(tenant or DEFAULT_TENANT)))
+    if priority is not None:
+        tokens.append((_priority, _priority.set(priority)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class TokenBucket:
+    """
+    Classic token bucket refilled continuously at `rate_per_min`.
+    reserve() never blocks - it books the tokens and returns how long the
+    caller must wait before using them, so it works for threads and asyncio alike.
+    """
+
+    def __init__(self, rate_per_min, capacity=None):
+        self.rate = rate_per_min / 60.0
+        self.capacity = capacity or rate_per_min
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount=1):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Never ask for more than a full bucket, or we would wait forever
+            self.tokens -= min(amount, self.capacity)
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def adjust(self, delta):
+        """
+        Corrects a reservation once the real cost is known (positive = charge more).
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_running:
+                return False
+            self.trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """
+        Ends a half-open trial that finished without a verdict (cancelled,
+        interrupted), so the next call can be the trial. The state stays half-open.
+        """
+        with self._lock:
+            self.trial_running = False
+
+
+def _error_code(error):
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def is_retryable(error):
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if _error_code(error) in RETRYABLE_CODES:
+        return True
+    # httpx transport problems (connection reset, read timeout, ...)
+    return type(error).__module__.startswith("httpx") and "Error" in type(error).__name__
+
+
+def retry_after(error):
+    """
+    Seconds the provider asked us to wait, from the Retry-After header or the
+    google.rpc.RetryInfo detail ("retryDelay": "12s"). None if not given.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            pass
+    details = getattr(error, "details", None)
+    if isinstance(details, dict):
+        details = details.get("error", details).get("details", [])
+    for detail in details if isinstance(details, list) else []:
+        delay = detail.get("retryDelay") if isinstance(detail, dict) else None
+        if isinstance(delay, str) and delay.endswith("s"):
+            try:
+                return float(delay[:-1])
+            except ValueError:
+                pass
+    return None
+
+
+class _Waiter:
+    __slots__ = ("start", "wake", "granted", "cancelled")
+
+    def __init__(self, start, wake):
+        self.start = start
+        self.wake = wake
+        self.granted = False
+        self.cancelled = False
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class FairQueue:
+    """
+    Hands out `slots` concurrent call slots. When all are busy, waiting calls
+    are served interactive first, then by weighted fair queuing: each call gets
+    a virtual finish time start + cost / weight, where start is the later of the
+    queue's virtual time and the tenant's previous finish. A tenant that fires
+    many calls pushes its own finish times out, so other tenants overtake it.
+    """
+
+    def __init__(self, slots=MAX_CONCURRENT_CALLS):
+        self.slots = max(1, slots)
+        self.busy = 0
+        self.virtual_time = 0.0
+        self._finish = {}   # tenant -> virtual finish time of its last call
+        self._heap = []     # (priority, finish, seq, waiter)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _enqueue(self, tenant, weight, priority, cost, wake):
+        # Caller holds the lock. Returns None if a slot was free, else the waiter.
+        if len(self._finish) > 4096:
+            # Tenants whose tags are in the past would start at virtual_time anyway
+            self._finish = {t: f for t, f in self._finish.items() if f > self.virtual_time}
+        start = max(self.virtual_time, self._finish.get(tenant, 0.0))
+        finish = start + max(cost, 1) / max(weight, 1e-3)
+        self._finish[tenant] = finish
+        if self.busy < self.slots:
+            self.busy += 1
+            self.virtual_time = max(self.virtual_time, start)
+            return None
+        waiter = _Waiter(start, wake)
+        heapq.heappush(self._heap, (_PRIORITY_ORDER.get(priority, 0), finish, next(self._seq), waiter))
+        return waiter
+
+    def acquire(self, tenant, weight=1.0, priority=INTERACTIVE, cost=1):
+        """
+        Blocks until the call may run. Returns the seconds spent waiting.
+        """
+        started = time.monotonic()
+        event = threading.Event()
+        with self._lock:
+            waiter = self._enqueue(tenant, weight, priority, cost, event.set)
+        if waiter is not None:
+            event.wait()
+        return time.monotonic() - started
+
+    async def acquire_async(self, tenant, weight=1.0, priority=INTERACTIVE, cost=1):
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            waiter = self._enqueue(tenant, weight, priority, cost,
+                                   lambda: loop.call_soon_threadsafe(_resolve, future))
+        if waiter is not None:
+            try:
+                await future
+            except asyncio.CancelledError:
+                with self._lock:
+                    waiter.cancelled = True
+                    granted = waiter.granted
+                if granted:
+                    # The slot was handed over just as we were cancelled - pass it on
+                    self.release()
+                raise
+        return time.monotonic() - started
+
+    def release(self):
+        """
+        Frees a slot, handing it straight to the next waiting call if any.
+        """
+        with self._lock:
+            while self._heap:
+                waiter = heapq.heappop(self._heap)[-1]
+                if waiter.cancelled:
+                    continue
+                try:
+                    waiter.wake()
+                except RuntimeError:
+                    # Event loop of an async waiter is gone
+                    continue
+                waiter.granted = True
+                self.virtual_time = max(self.virtual_time, waiter.start)
+                return
+            self.busy -= 1
+
+    def snapshot(self):
+        with self._lock:
+            waiting = {INTERACTIVE: 0, BACKGROUND: 0}
+            for priority, _, _, waiter in self._heap:
+                if not waiter.cancelled:
+                    waiting[INTERACTIVE if priority == 0 else BACKGROUND] += 1
+            return {"slots": self.slots, "busy": self.busy, "waiting": waiting}
+
+
+class TenantBudget:
+    """
+    One tenant's requests/min and tokens/min budgets (None = unlimited) and usage stats.
+    """
+
+    def __init__(self, name, rpm=TENANT_RPM, tpm=TENANT_TPM, weight=1.0):
+        self.name = name
+        self.weight = weight
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.stats = {"calls": 0, "tokens": 0, "waited_seconds": 0.0, "failures": 0, "rejected": 0}
+
+    def reserve(self, estimated_tokens, max_wait):
+        """
+        Books one request and the estimated tokens; returns the wait. Raises
+        QuotaExceededError (and gives the booking back) if that wait is over max_wait.
+        """
+        booked = []
+        delay = 0.0
+        for bucket, amount in ((self.requests, 1), (self.tokens, estimated_tokens)):
+            if bucket is not None:
+                delay = max(delay, bucket.reserve(amount))
+                booked.append((bucket, min(amount, bucket.capacity)))
+        if delay > max_wait:
+            for bucket, amount in booked:
+                bucket.adjust(-amount)
+            raise QuotaExceededError(
+                f"Usage limit reached for {self.name}, try again in {delay:.0f} seconds")
+        return delay
+
+    def adjust(self, delta):
+        if self.tokens is not None:
+            self.tokens.adjust(delta)
+
+
+class RequestScheduler:
+    """
+    Central gate for every Gemini call: requests/min + tokens/min buckets,
+    jittered exponential backoff on retryable errors, Retry-After support
+    and a circuit breaker. Use call() from threads and call_async() from asyncio.
+
+    Calls are made on behalf of a tenant (current_tenant() unless given) with a
+    priority: each tenant has its own budgets, and when the backend is busy
+    waiting calls are ordered by FairQueue. The DEFAULT_TENANT has no budget.
+    """
+
+    def __init__(self, rpm=RATE_LIMIT_RPM, tpm=RATE_LIMIT_TPM, max_retries=MAX_RETRIES,
+                 base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY, breaker=None,
+                 max_concurrent=MAX_CONCURRENT_CALLS, tenant_rpm=TENANT_RPM, tenant_tpm=TENANT_TPM,
+                 tenant_max_wait=TENANT_MAX_WAIT, tenant_weights=None):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.queue = FairQueue(max_concurrent)
+        self.tenant_rpm = tenant_rpm
+        self.tenant_tpm = tenant_tpm
+        self.tenant_max_wait = tenant_max_wait
+        self.tenant_weights = TENANT_WEIGHTS if tenant_weights is None else tenant_weights
+        self._tenants = {}
+        # Retry-After from one caller pauses everyone, so the whole process backs off
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "retries": 0, "throttled_seconds": 0.0, "failures": 0, "rejected": 0}
+
+    def _count(self, key, amount=1, tenant=None):
+        with self._lock:
+            if key in self.stats:
+                self.stats[key] += amount
+            if tenant is not None and key in tenant.stats:
+                tenant.stats[key] += amount
+
+    def tenant(self, name):
+        """
+        The TenantBudget for name, created on first use.
+        """
+        with self._lock:
+            budget = self._tenants.pop(name, None)
+            if budget is None:
+                exempt = name == DEFAULT_TENANT
+                budget = TenantBudget(name, 0 if exempt else self.tenant_rpm, 0 if exempt else self.tenant_tpm,
+                                      self.tenant_weights.get(name, 1.0))
+                if len(self._tenants) >= 1024:
+                    # Per-session tenants come and go: forget the least recently used
+                    del self._tenants[next(iter(self._tenants))]
+            # Re-inserted so the dict stays in least-recently-used order
+            self._tenants[name] = budget
+            return budget
+
+    def _resolve(self, tenant, priority):
+        return self.tenant(tenant or current_tenant()), _priority.get() or priority or INTERACTIVE
+
+    def _budget_delay(self, budget, priority, estimated_tokens):
+        try:
+            return budget.reserve(estimated_tokens, self.tenant_max_wait)
+        except QuotaExceededError:
+            self._count("rejected", tenant=budget)
+            TENANT_CALLS.inc(tenant=tenant_label(budget.name), priority=priority, status="quota")
+            raise
+
+    def _admission_delay(self, estimated_tokens):
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError("Gemini circuit breaker is open, try again shortly")
+        delay = max(
+            self.requests.reserve(1),
+            self.tokens.reserve(estimated_tokens),
+            self._paused_until - time.monotonic(),
+            0.0
+        )
+        if delay:
+            self._count("throttled_seconds", delay)
+        return delay
+
+    def _backoff(self, attempt, error):
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = random.uniform(0, delay)  # full jitter
+        hinted = retry_after(error)
+        if hinted is not None:
+            delay = max(delay, hinted)
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.monotonic() + hinted)
+        return delay
+
+    def settle(self, response, estimated_tokens, tenant=None):
+        """
+        Corrects the tokens/min buckets with the real usage of a finished call.
+        """
+        usage = getattr(response, "usage_metadata", None)
+        actual = getattr(usage, "total_token_count", None)
+        if actual:
+            budget = tenant or self.tenant(current_tenant())
+            self.tokens.adjust(actual - estimated_tokens)
+            budget.adjust(actual - estimated_tokens)
+            self._count("tokens", actual, tenant=budget)
+            TENANT_TOKENS.inc(actual, tenant=tenant_label(budget.name))
+
+    def _should_retry(self, error, attempt, tenant=None):
+        if not is_retryable(error):
+            # e.g. a 400 - our request is bad, the provider itself is fine
+            self.breaker.record_success()
+            self._count("failures", tenant=tenant)
+            return False
+        self.breaker.record_failure()
+        if attempt >= self.max_retries:
+            self._count("failures", tenant=tenant)
+            return False
+        self._count("retries")
+        return True
+
+    def _finished(self, budget, priority, status, waited):
+        TENANT_CALLS.inc(tenant=tenant_label(budget.name), priority=priority, status=status)
+        TENANT_WAIT_SECONDS.observe(waited, tenant=tenant_label(budget.name), priority=priority)
+
+    def _refund(self, estimated_tokens):
+        # A failed attempt used no tokens; a retry books its own
+        self.tokens.adjust(-min(estimated_tokens, self.tokens.capacity))
+
+    def _abandon(self, estimated_tokens):
+        # Cancelled or interrupted: no verdict for the breaker, so free its trial
+        self._refund(estimated_tokens)
+        self.breaker.release_trial()
+
+    def _attempt(self, fn, budget, priority, estimated_tokens):
+        # Rate-limit wait first, without a slot, so a throttled call never blocks a ready one
+        delay = self._admission_delay(estimated_tokens)
+        try:
+            time.sleep(delay)
+            waited = self.queue.acquire(budget.name, budget.weight, priority, estimated_tokens)
+        except BaseException:
+            self._abandon(estimated_tokens)
+            raise
+        try:
+            return fn(), waited + delay
+        except Exception:
+            # call() records the outcome with the breaker
+            self._refund(estimated_tokens)
+            raise
+        except BaseException:
+            self._abandon(estimated_tokens)
+            raise
+        finally:
+            self.queue.release()
+
+    async def _attempt_async(self, coro_fn, budget, priority, estimated_tokens):
+        delay = self._admission_delay(estimated_tokens)
+        try:
+            await asyncio.sleep(delay)
+            waited = await self.queue.acquire_async(budget.name, budget.weight, priority, estimated_tokens)
+        except BaseException:
+            self._abandon(estimated_tokens)
+            raise
+        try:
+            return await coro_fn(), waited + delay
+        except Exception:
+            self._refund(estimated_tokens)
+            raise
+        except BaseException:
+            self._abandon(estimated_tokens)
+            raise
+        finally:
+            self.queue.release()
+
+    def call(self, fn, estimated_tokens=1000, on_retry=None, tenant=None, priority=None):
+        """
+        Runs fn() under the rate limits, retrying transient failures.
+        on_retry(error) is called before each retry. tenant and priority
+        default to the current tenant_scope().
+        """
+        budget, priority = self._resolve(tenant, priority)
+        self._count("calls", tenant=budget)
+        waited = self._budget_delay(budget, priority, estimated_tokens)
+        time.sleep(waited)
+        attempt = 0
+        while True:
+            try:
+                response, seconds = self._attempt(fn, budget, priority, estimated_tokens)
+            except CircuitOpenError:
+                self._finished(budget, priority, "rejected", waited)
+                raise
+            except Exception as e:
+                if not self._should_retry(e, attempt, budget):
+                    self._finished(budget, priority, "error", waited)
+                    raise
+                if on_retry:
+                    on_retry(e)
+                time.sleep(self._backoff(attempt, e))
+                attempt += 1
+                continue
+            waited += seconds
+            self._count("waited_seconds", waited, tenant=budget)
+            self._finished(budget, priority, "ok", waited)
+            self.breaker.record_success()
+            self.settle(response, estimated_tokens, budget)
+            return response
+
+    async def call_async(self, coro_fn, estimated_tokens=1000, on_retry=None, tenant=None, priority=None):
+        """
+        Async twin of call(). coro_fn() must return a fresh awaitable per attempt.
+        """
+        budget, priority = self._resolve(tenant, priority)
+        self._count("calls", tenant=budget)
+        waited = self._budget_delay(budget, priority, estimated_tokens)
+        await asyncio.sleep(waited)
+        attempt = 0
+        while True:
+            try:
+                response, seconds = await self._attempt_async(coro_fn, budget, priority, estimated_tokens)
+            except CircuitOpenError:
+                self._finished(budget, priority, "rejected", waited)
+                raise
+            except Exception as e:
+                if not self._should_retry(e, attempt, budget):
+                    self._finished(budget, priority, "error", waited)
+                    raise
+                if on_retry:
+                    on_retry(e)
+                await asyncio.sleep(self._backoff(attempt, e))
+                attempt += 1
+                continue
+            waited += seconds
+            self._count("waited_seconds", waited, tenant=budget)
+            self._finished(budget, priority, "ok", waited)
+            self.breaker.record_success()
+            self.settle(response, estimated_tokens, budget)
+            return response
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["tenants"] = {name: dict(b.stats, weight=b.weight) for name, b in self._tenants.items()}
+        stats["breaker"] = self.breaker.state
+        stats["queue"] = self.queue.snapshot()
+        return stats
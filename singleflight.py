@@ -0,0 +1,140 @@
+import asyncio
+import threading
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.completed = False
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: the first caller for a key runs the
+    work, everyone arriving while it runs waits and gets the same result (or
+    the same exception). Nothing is cached once the call finishes.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    def _join(self, key):
+        """
+        Returns (flight, is_leader). Only the leader does the work.
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.stats["coalesced"] += 1
+                return flight, False
+            self.stats["executions"] += 1
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def _finish(self, key, flight, result=None, error=None, completed=True):
+        flight.result = result
+        flight.error = error
+        flight.completed = completed
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.done.set()
+
+    def do(self, key, fn):
+        """
+        Runs fn() once per key across all threads calling at the same time.
+        """
+        flight, leader = self._join(key)
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            if flight.completed:
+                return flight.result
+            # The leader was an abandoned stream - do the work ourselves
+            return fn()
+        try:
+            result = fn()
+        except Exception as e:
+            self._finish(key, flight, error=e)
+            raise
+        except BaseException:
+            self._finish(key, flight, completed=False)
+            raise
+        self._finish(key, flight, result)
+        return result
+
+    def stream(self, key, gen_fn):
+        """
+        Streaming twin of do(). The leader yields every snapshot from gen_fn();
+        followers wait and yield only the final snapshot. If the leader's
+        consumer goes away mid-stream, followers stream on their own instead.
+        """
+        flight, leader = self._join(key)
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            if flight.completed:
+                yield flight.result
+            else:
+                yield from gen_fn()
+            return
+        result = None
+        try:
+            for result in gen_fn():
+                yield result
+        except Exception as e:
+            self._finish(key, flight, error=e)
+            raise
+        except BaseException:
+            # GeneratorExit lands here when the consumer stops iterating
+            self._finish(key, flight, completed=False)
+            raise
+        self._finish(key, flight, result)
+
+    async def do_async(self, key, coro_fn):
+        """
+        asyncio version of do(). Cancelling one waiter never cancels the
+        shared call for the others; when the last waiter is cancelled (or
+        times out) the shared call is cancelled too, HTTP request included.
+        """
+        loop_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            self.stats["calls"] += 1
+            entry = self._tasks.get(loop_key)
+            if entry is not None and not entry["task"].done():
+                self.stats["coalesced"] += 1
+                entry["waiters"] += 1
+            else:
+                self.stats["executions"] += 1
+                entry = {"task": asyncio.ensure_future(coro_fn()), "waiters": 1}
+                self._tasks[loop_key] = entry
+                entry["task"].add_done_callback(lambda t: self._forget(loop_key, entry))
+        task = entry["task"]
+        try:
+            return await asyncio.shield(task)
+        finally:
+            with self._lock:
+                entry["waiters"] -= 1
+                abandoned = entry["waiters"] == 0 and not task.done()
+                if abandoned and self._tasks.get(loop_key) is entry:
+                    # Callers arriving from now on start a fresh call
+                    del self._tasks[loop_key]
+            if abandoned:
+                task.cancel()
+
+    def _forget(self, loop_key, entry):
+        with self._lock:
+            if self._tasks.get(loop_key) is entry:
+                del self._tasks[loop_key]
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.stats)
@@ -0,0 +1,379 @@
+import re
+import json
+from collections import deque
+from functools import lru_cache
+
+from config import SKILL_TAXONOMY_PATH
+
+# --- Taxonomy ---
+# canonical name -> aliases (matched case-insensitively; the canonical name is an alias too)
+
+TAXONOMY = {
+    # Languages
+    "Python": ["python3", "py"],
+    "JavaScript": ["js", "javascript es6", "es6", "ecmascript", "java script", "vanilla js"],
+    "TypeScript": ["ts"],
+    "Java": ["java se", "java ee", "j2ee"],
+    "C": ["c language", "ansi c"],
+    "C++": ["cpp", "c plus plus"],
+    "C#": ["c sharp", "csharp"],
+    "Go": ["golang"],
+    "Rust": [],
+    "Ruby": [],
+    "PHP": [],
+    "Kotlin": [],
+    "Swift": [],
+    "R": ["r programming", "r language"],
+    "MATLAB": [],
+    "Scala": [],
+    "Bash": ["shell scripting", "shell", "bash scripting"],
+    "SQL": ["structured query language", "t-sql", "tsql", "pl/sql", "plsql"],
+    "HTML": ["html5"],
+    "CSS": ["css3"],
+    # Frontend
+    "React": ["react.js", "reactjs", "react js"],
+    "Angular": ["angularjs", "angular.js"],
+    "Vue.js": ["vue", "vuejs", "vue js"],
+    "Next.js": ["nextjs", "next js"],
+    "Redux": [],
+    "Tailwind CSS": ["tailwind", "tailwindcss"],
+    "Sass": ["scss"],
+    "jQuery": [],
+    # Backend
+    "Node.js": ["node", "nodejs", "node js"],
+    "Express.js": ["express", "expressjs"],
+    "Django": [],
+    "Flask": [],
+    "FastAPI": [],
+    "Spring Boot": ["spring", "springboot"],
+    ".NET": ["dotnet", "dot net", "asp.net", ".net core"],
+    "Ruby on Rails": ["rails", "ror"],
+    "GraphQL": [],
+    "REST APIs": ["rest", "restful", "rest api", "restful apis", "restful api"],
+    # Data
+    "PostgreSQL": ["postgres", "postgre sql", "psql"],
+    "MySQL": [],
+    "MongoDB": ["mongo"],
+    "Redis": [],
+    "Elasticsearch": ["elastic search"],
+    "Pandas": [],
+    "NumPy": [],
+    "Apache Spark": ["spark", "pyspark"],
+    "Hadoop": [],
+    "Kafka": ["apache kafka"],
+    "Airflow": ["apache airflow"],
+    "Tableau": [],
+    "Power BI": ["powerbi", "microsoft power bi"],
+    "Excel": ["ms excel", "microsoft excel", "advanced excel"],
+    "Data Analysis": ["data analytics"],
+    "Data Visualization": ["data viz"],
+    "Statistics": ["statistical analysis"],
+    "ETL": [],
+    # ML / AI
+    "Machine Learning": ["ml"],
+    "Deep Learning": ["dl"],
+    "TensorFlow": ["tensor flow"],
+    "PyTorch": ["torch"],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "Natural Language Processing": ["nlp"],
+    "Computer Vision": ["cv"],
+    "Generative AI": ["genai", "gen ai", "llm", "llms", "large language models"],
+    # Cloud / DevOps
+    "AWS": ["amazon web services"],
+    "Azure": ["microsoft azure"],
+    "Google Cloud": ["gcp", "google cloud platform"],
+    "Docker": [],
+    "Kubernetes": ["k8s"],
+    "Terraform": [],
+    "CI/CD": ["ci cd", "cicd", "continuous integration"],
+    "Jenkins": [],
+    "GitHub Actions": [],
+    "Git": ["github", "gitlab", "version control"],
+    "Linux": ["unix"],
+    # Design
+    "Figma": [],
+    "Adobe Photoshop": ["photoshop"],
+    "Adobe Illustrator": ["illustrator"],
+    "UI Design": ["ui"],
+    "UX Design": ["ux", "user experience"],
+    # Business / marketing
+    "SEO": ["search engine optimization"],
+    "Digital Marketing": [],
+    "Google Analytics": ["ga4"],
+    "Salesforce": ["sfdc"],
+    "Project Management": [],
+    "Agile": ["agile methodologies", "agile methodology"],
+    "Scrum": [],
+    "Jira": [],
+    # Soft skills
+    "Communication": ["communication skills", "verbal communication", "written communication"],
+    "Leadership": ["team leadership"],
+    "Teamwork": ["collaboration", "team work", "team player"],
+    "Problem Solving": ["problem-solving", "analytical thinking"],
+    "Time Management": [],
+}
+
+# Too common as plain words to find by scanning free text; exact skill entries still match
+SCAN_EXCLUDED = {"c", "r", "go", "py", "ts", "ui", "ux", "cv", "ml", "dl", "rest", "node", "express",
+                 "spring", "spark", "shell", "swift", "communication", "rails", "torch", "unix"}
+
+# --- Roles ---
+
+ROLE_ALIASES = {
+    "front end developer": "Frontend Developer",
+    "front-end developer": "Frontend Developer",
+    "frontend engineer": "Frontend Developer",
+    "back end developer": "Backend Developer",
+    "back-end developer": "Backend Developer",
+    "backend engineer": "Backend Developer",
+    "full stack developer": "Full Stack Developer",
+    "full-stack developer": "Full Stack Developer",
+    "fullstack developer": "Full Stack Developer",
+    "software developer": "Software Engineer",
+    "devops": "DevOps Engineer",
+    "ui/ux designer": "UI/UX Designer",
+    "ux/ui designer": "UI/UX Designer",
+    "ml engineer": "Machine Learning Engineer",
+    "data analyst": "Data Analyst",
+    "data scientist": "Data Scientist",
+}
+
+# Everything from the first comma, " with ", " - ", "(" or "|" on is a description, not the title
+_ROLE_TAIL = re.compile(r"\s*(?:,|\(|\||\bwith\b|\s[-–—]\s).*$", re.IGNORECASE | re.DOTALL)
+_SPACES = re.compile(r"\s+")
+# Version and level suffixes only: "Python 3.11", "React v18", "Java (8+)", "SQL (Advanced)"
+_LEVELS = r"basic|beginner|intermediate|advanced|expert|fluent|native|proficient"
+_VERSION = r"v?\d+(?:\.\d+)*\+?"
+_QUALIFIER = re.compile(rf"\s*(?:\(\s*(?:{_VERSION}|{_LEVELS})\s*\)|\b{_VERSION})\s*$", re.IGNORECASE)
+_QUALIFIER_ONLY = re.compile(rf"^(?:{_VERSION}|{_LEVELS})$", re.IGNORECASE)
+# Lists inside one skillsFound entry, e.g. "Machine Learning (TensorFlow, PyTorch)"
+_SPLIT = re.compile(r"\s*(?:;|,|\||\(|\)|\[|\])\s*")
+# "AWS & Docker" is two skills, "R&D" and "Research and Development" are one
+_CONJUNCTION = re.compile(r"\s*(?:&|\band\b)\s*", re.IGNORECASE)
+# Words around a skill that are not skills themselves: "proficient in Python"
+_FILLER = {"in", "with", "of", "using", "for", "the", "a", "an", "and", "or", "strong", "good", "working",
+           "knowledge", "experience", "experienced", "skills", "skill", "proficiency", "familiar",
+           "familiarity", "basic", "beginner", "intermediate", "advanced", "expert", "proficient"}
+_FILLER_WORD = re.compile(r"[a-z0-9+#.]+")
+
+
+def _fold(text):
+    return _SPACES.sub(" ", (text or "").strip()).casefold()
+
+
+def clean_role(text):
+    """
+    Cuts descriptions off a job title: "Data Analyst, 3+ years with SQL" -> "Data Analyst".
+    """
+    return _ROLE_TAIL.sub("", (text or "").strip()).strip()
+
+
+def normalize_role(text):
+    """
+    Clean title, mapped to its canonical spelling when it is a known variant.
+    """
+    role = clean_role(text)
+    return ROLE_ALIASES.get(_fold(role), role)
+
+
+# --- Alias index (Aho-Corasick) ---
+
+_WORD = re.compile(r"[a-z0-9+#]")
+
+
+class AliasAutomaton:
+    """
+    Aho-Corasick automaton over every alias: finds all whole-word alias
+    occurrences in a text in one pass, however many aliases there are.
+    """
+
+    def __init__(self, aliases):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]   # per state: (alias length, canonical) ending here
+        for alias, canonical in aliases.items():
+            state = 0
+            for ch in alias:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append((len(alias), canonical))
+        # Breadth-first failure links
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[nxt] = target
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def scan(self, text):
+        """
+        Yields (start, end, canonical) for every whole-word match in text (already casefolded).
+        """
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        n = len(text)
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            for length, canonical in out[state]:
+                start = i - length + 1
+                # Whole words only: "java" must not match inside "javascript"
+                if start > 0 and _WORD.match(text[start - 1]):
+                    continue
+                if i + 1 < n and _WORD.match(text[i + 1]):
+                    continue
+                yield start, i + 1, canonical
+
+
+class SkillIndex:
+    """
+    Precompiled lookup tables for a taxonomy: exact alias dict plus an
+    Aho-Corasick automaton for scanning longer strings and free text.
+    """
+
+    def __init__(self, taxonomy, scan_excluded=SCAN_EXCLUDED):
+        self.aliases = {}
+        for canonical, aliases in taxonomy.items():
+            for alias in [canonical] + list(aliases):
+                self.aliases[_fold(alias)] = canonical
+        self.automaton = AliasAutomaton({a: c for a, c in self.aliases.items() if a not in scan_excluded})
+        self._normalize = lru_cache(maxsize=65536)(self._normalize_uncached)
+
+    def find(self, text):
+        """
+        Canonical skills mentioned in free text, in order of first appearance.
+        Overlapping matches keep the longest ("machine learning" over "learning").
+        """
+        matches = sorted(self.automaton.scan(_fold(text)), key=lambda m: (m[0], -(m[1] - m[0])))
+        found, seen, end = [], set(), -1
+        for start, stop, canonical in matches:
+            if start < end:
+                continue
+            end = stop
+            if canonical not in seen:
+                seen.add(canonical)
+                found.append(canonical)
+        return found
+
+    def _lookup(self, text):
+        folded = _fold(text)
+        return self.aliases.get(folded) or self.aliases.get(_fold(_QUALIFIER.sub("", folded)))
+
+    def _covered(self, text):
+        """
+        The skills in text if known aliases and filler words account for all
+        of it ("proficient in Python" -> ["Python"]), else None.
+        """
+        folded = _fold(text)
+        matches = sorted(self.automaton.scan(folded), key=lambda m: (m[0], -(m[1] - m[0])))
+        rest, end = [], 0
+        for start, stop, _ in matches:
+            if start >= end:
+                rest.append(folded[end:start])
+                end = stop
+        rest.append(folded[end:])
+        leftover = [w for w in _FILLER_WORD.findall(" ".join(rest)) if w not in _FILLER]
+        if leftover or not matches:
+            return None
+        return self.find(folded)
+
+    def _normalize_part(self, part):
+        canonical = self._lookup(part)
+        if canonical:
+            return [canonical]
+        if "/" in part:
+            # "React/Redux" -> both; "CI/CD" and "PL/SQL" were already matched whole above
+            pieces = [p.strip() for p in part.split("/") if p.strip()]
+            resolved = [self._lookup(p) for p in pieces]
+            if any(resolved):
+                return [r or _SPACES.sub(" ", p) for r, p in zip(resolved, pieces)]
+        found = self._covered(part)
+        # Unknown skill: keep what the model wrote, tidied up
+        return found or [_SPACES.sub(" ", part)]
+
+    def _split_conjunction(self, part):
+        """
+        Splits on "&"/"and" only when every side is a known skill; anything
+        else ("R&D", "Pen and paper") stays one entry.
+        """
+        pieces = [p.strip() for p in _CONJUNCTION.split(part)]
+        if len(pieces) > 1 and all(p and (self._lookup(p) or self._covered(p)) for p in pieces):
+            return pieces
+        return [part]
+
+    def _normalize_uncached(self, skill):
+        if not _fold(skill):
+            return ()
+        canonical = self._lookup(skill)
+        if canonical:
+            return (canonical,)
+        result = []
+        for part in _SPLIT.split(skill.strip()):
+            part = part.strip()
+            if not part or _QUALIFIER_ONLY.match(part):
+                continue
+            for piece in self._split_conjunction(part):
+                for name in self._normalize_part(piece):
+                    if name not in result:
+                        result.append(name)
+        return tuple(result) or (_SPACES.sub(" ", skill.strip()),)
+
+    def normalize(self, skill):
+        """
+        One skillsFound entry -> tuple of canonical skills (usually one).
+        """
+        return self._normalize(skill)
+
+    def normalize_list(self, skills):
+        """
+        Canonicalizes and de-duplicates a skills list, keeping first-seen order.
+        """
+        result, seen = [], set()
+        for skill in skills or []:
+            if not isinstance(skill, str):
+                continue
+            for canonical in self.normalize(skill):
+                key = canonical.casefold()
+                if key not in seen:
+                    seen.add(key)
+                    result.append(canonical)
+        return result
+
+
+def _load_taxonomy(path):
+    taxonomy = {k: list(v) for k, v in TAXONOMY.items()}
+    if not path:
+        return taxonomy
+    try:
+        with open(path, encoding="utf-8") as f:
+            for canonical, aliases in json.load(f).items():
+                taxonomy.setdefault(canonical, []).extend(aliases)
+    except Exception as e:
+        print(f"Error loading skill taxonomy {path}: {e}")
+    return taxonomy
+
+
+# Built once per process
+skill_index = SkillIndex(_load_taxonomy(SKILL_TAXONOMY_PATH))
+
+
+def normalize_skills(skills):
+    return skill_index.normalize_list(skills)
+
+
+def extract_skills(text):
+    return skill_index.find(text)
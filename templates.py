@@ -0,0 +1,224 @@
+import json
+import html
+import hashlib
+import threading
+from string import Formatter
+
+from result_cache import ResultCache, MemoryBackend
+
+# --- Template Sources ---
+# {placeholders} are filled per render; {base_style} is a constant resolved at
+# compile time. List placeholders are expanded with the template's item markup.
+
+BASE_STYLE = "padding: 40px; font-family: sans-serif; color: #1e293b; background: white; min-height: 1000px;"
+
+MODERN_HTML = """
+        <div id="resume-preview" style="{base_style}">
+            <div style="border-bottom: 2px solid #0f172a; padding-bottom: 20px; margin-bottom: 30px;">
+                <h1 style="font-size: 42px; margin: 0; text-transform: uppercase; letter-spacing: 1px;">{name}</h1>
+                <p style="font-size: 18px; color: #64748b; margin-top: 10px;">{role}</p>
+            </div>
+            <div style="display: grid; grid-template-columns: 2fr 1fr; gap: 40px;">
+                <div>
+                    <h3 style="font-size: 14px; font-weight: bold; text-transform: uppercase; border-bottom: 1px solid #e2e8f0; padding-bottom: 5px;">Professional Summary</h3>
+                    <p style="font-size: 14px; line-height: 1.6;">{summary}</p>
+
+                    <h3 style="font-size: 14px; font-weight: bold; text-transform: uppercase; border-bottom: 1px solid #e2e8f0; padding-bottom: 5px; margin-top: 30px;">Strengths</h3>
+                    <ul style="font-size: 14px; line-height: 1.6;">
+                        {strengths}
+                    </ul>
+                </div>
+                <div style="background: #f8fafc; padding: 20px; border-radius: 8px;">
+                    <h3 style="font-size: 14px; font-weight: bold; text-transform: uppercase; margin-bottom: 15px;">Skills</h3>
+                    <div style="display: flex; flex-wrap: wrap; gap: 8px;">
+                        {skills}
+                    </div>
+                </div>
+            </div>
+        </div>
+        """
+
+EXECUTIVE_HTML = """
+        <div id="resume-preview" style="{base_style} font-family: 'Georgia', serif; text-align: center;">
+            <h1 style="font-size: 36px; color: #1e3a8a; margin-bottom: 5px;">{name}</h1>
+            <p style="font-size: 16px; font-style: italic; color: #64748b; margin-bottom: 40px;">{role}</p>
+
+            <div style="text-align: left; margin-bottom: 30px;">
+                <h2 style="font-size: 16px; color: #1e3a8a; border-bottom: 1px solid #cbd5e1; padding-bottom: 5px;">EXECUTIVE SUMMARY</h2>
+                <p style="font-size: 14px; line-height: 1.8;">{summary}</p>
+            </div>
+
+            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 40px; text-align: left;">
+                <div>
+                    <h2 style="font-size: 16px; color: #1e3a8a; border-bottom: 1px solid #cbd5e1; padding-bottom: 5px;">COMPETENCIES</h2>
+                    <ul style="font-size: 14px; line-height: 1.6;">{skills}</ul>
+                </div>
+                 <div>
+                    <h2 style="font-size: 16px; color: #1e3a8a; border-bottom: 1px solid #cbd5e1; padding-bottom: 5px;">HIGHLIGHTS</h2>
+                    <ul style="font-size: 14px; line-height: 1.6;">{strengths}</ul>
+                </div>
+            </div>
+        </div>
+        """
+
+CREATIVE_HTML = """
+        <div id="resume-preview" style="{base_style} font-family: 'Arial', sans-serif;">
+            <div style="background: linear-gradient(135deg, #4f46e5 0%, #7c3aed 100%); color: white; padding: 40px; margin: -40px -40px 40px -40px;">
+                <h1 style="font-size: 48px; margin: 0; font-weight: 300;">{name}</h1>
+                <p style="font-size: 20px; margin: 10px 0 0 0; opacity: 0.9;">{role}</p>
+            </div>
+
+            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 40px;">
+                <div>
+                    <h3 style="font-size: 18px; color: #4f46e5; border-left: 4px solid #4f46e5; padding-left: 15px; margin-bottom: 20px;">PROFILE</h3>
+                    <p style="font-size: 14px; line-height: 1.6; color: #64748b;">{summary}</p>
+
+                    <h3 style="font-size: 18px; color: #4f46e5; border-left: 4px solid #4f46e5; padding-left: 15px; margin: 30px 0 20px 0;">STRENGTHS</h3>
+                    <div style="display: flex; flex-wrap: wrap; gap: 10px;">
+                        {strengths}
+                    </div>
+                </div>
+
+                <div>
+                    <h3 style="font-size: 18px; color: #4f46e5; border-left: 4px solid #4f46e5; padding-left: 15px; margin-bottom: 20px;">SKILLS</h3>
+                    <div style="display: flex; flex-wrap: wrap; gap: 8px;">
+                        {skills}
+                    </div>
+                </div>
+            </div>
+        </div>
+        """
+
+LIST_ITEM = '<li>{}</li>'
+
+# --- Engine ---
+
+# Fields of resume_data a template can use, with their defaults
+FIELDS = {
+    "name": ("name", "Candidate Name"),
+    "role": ("suggestedRole", "Professional Role"),
+    "summary": ("summary", ""),
+    "skills": ("skillsFound", []),
+    "strengths": ("strengths", []),
+}
+
+
+class ResumeTemplate:
+    """
+    A template compiled once into literal / placeholder segments, so a render
+    is a single join instead of re-parsing and re-formatting the whole page.
+    items maps a list placeholder to (item markup, max items or None).
+    """
+
+    def __init__(self, template_id, label, caption, image, source, items=None, constants=None):
+        self.template_id = template_id
+        self.label = label
+        self.caption = caption
+        self.image = image
+        self.items = items or {}
+        self.segments = self._compile(source, dict(constants or {}, base_style=BASE_STYLE))
+
+    def _compile(self, source, constants):
+        segments = []
+        literal = ""
+        for text, field, _, _ in Formatter().parse(source):
+            literal += text
+            if field is None:
+                continue
+            if field in constants:
+                literal += constants[field]
+            elif field in FIELDS:
+                segments.append(literal)
+                segments.append(field)
+                literal = ""
+            else:
+                raise ValueError(f"Unknown placeholder {{{field}}} in template {self.template_id}")
+        segments.append(literal)
+        # Even positions are literals, odd positions are field names
+        return tuple(segments)
+
+    def _value(self, field, value):
+        if field not in self.items:
+            return html.escape(str(value))
+        markup, limit = self.items[field]
+        values = list(value or [])[:limit] if limit else list(value or [])
+        return "".join(markup.format(html.escape(str(v))) for v in values)
+
+    def render(self, data):
+        parts = list(self.segments)
+        for i in range(1, len(parts), 2):
+            key, default = FIELDS[parts[i]]
+            parts[i] = self._value(parts[i], data.get(key, default))
+        return "".join(parts)
+
+
+# --- Registry ---
+
+TEMPLATES = {}
+_lock = threading.Lock()
+
+# Rendered HTML keyed on (template id, content hash of the fields it uses)
+render_cache = ResultCache(MemoryBackend(max_entries=256), ttl=0, name="templates")
+
+
+def register_template(template):
+    """
+    Adds (or replaces) a template; it shows up on the TEMPLATES page in registration order.
+    """
+    with _lock:
+        TEMPLATES[template.template_id] = template
+    return template
+
+
+def _content_hash(data):
+    fields = {key: data.get(key, default) for key, default in FIELDS.values()}
+    payload = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_template_html(template_id, data):
+    """
+    Renders resume_data with a registered template. Output is memoized, so
+    reruns with the same data and template skip rendering entirely.
+    """
+    template = TEMPLATES.get(template_id)
+    if template is None:
+        return "<div>Template not found</div>"
+    key = f"{template_id}:{_content_hash(data)}"
+    cached = render_cache.get(key)
+    if cached is not None:
+        return cached
+    rendered = template.render(data)
+    render_cache.set(key, rendered)
+    return rendered
+
+
+register_template(ResumeTemplate(
+    "modern", "Modern Tech", "Clean & Professional",
+    "https://images.unsplash.com/photo-1586281380349-632531db7ed4?auto=format&fit=crop&q=80&w=400&h=300",
+    MODERN_HTML,
+    items={
+        "strengths": (LIST_ITEM, None),
+        "skills": ('<span style="background: white; border: 1px solid #e2e8f0; padding: 4px 8px; font-size: 12px;">{}</span>', None),
+    },
+))
+
+register_template(ResumeTemplate(
+    "executive", "Executive Pro", "Elegant & Corporate",
+    "https://images.unsplash.com/photo-1586282391129-76a6df840fd0?auto=format&fit=crop&q=80&w=400&h=300",
+    EXECUTIVE_HTML,
+    items={
+        "skills": (LIST_ITEM, 8),
+        "strengths": (LIST_ITEM, None),
+    },
+))
+
+register_template(ResumeTemplate(
+    "creative", "Creative", "Modern & Creative",
+    "https://images.unsplash.com/photo-1606326608606-aa0b62935f2b?auto=format&fit=crop&q=80&w=400&h=300",
+    CREATIVE_HTML,
+    items={
+        "strengths": ('<span style="background: #f1f5f9; color: #4f46e5; padding: 8px 12px; border-radius: 20px; font-size: 12px; font-weight: 600;">{}</span>', None),
+        "skills": ('<span style="background: #4f46e5; color: white; padding: 6px 12px; border-radius: 6px; font-size: 12px; font-weight: 600;">{}</span>', None),
+    },
+))
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Caches and stores go to a throwaway folder; set before config is imported
+os.environ.setdefault("HIREME_DATA_DIR", tempfile.mkdtemp(prefix="hireme-tests-"))
+os.environ.setdefault("HIREME_EMBEDDING_BACKEND", "hashing")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
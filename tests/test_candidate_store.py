@@ -0,0 +1,10 @@
+from candidate_store import CandidateStore
+
+
+def test_role_filter_is_exact_unless_prefix_requested(tmp_path):
+    store = CandidateStore(str(tmp_path / "candidates.sqlite3"))
+    store.save({"name": "A", "score": 80, "suggestedRole": "Data Analyst"}, "a")
+    store.save({"name": "B", "score": 70, "suggestedRole": "Data Analyst Intern"}, "b")
+
+    assert [c["key"] for c in store.search(role="data analyst")] == ["a"]
+    assert [c["key"] for c in store.search(role="Data Analyst", role_prefix=True)] == ["a", "b"]
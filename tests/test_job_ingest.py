@@ -0,0 +1,46 @@
+import sqlite3
+import datetime
+
+from job_ingest import JobStore, ingest, parse_posted
+
+TODAY = datetime.date(2026, 10, 18)
+
+
+def test_parse_posted_formats():
+    assert parse_posted("Sept 3, 2026", TODAY) == datetime.date(2026, 9, 3)
+    assert parse_posted("1 year ago", TODAY) == TODAY - datetime.timedelta(days=365)
+    assert parse_posted("a day ago", TODAY) == TODAY - datetime.timedelta(days=1)
+    assert parse_posted("30+ days ago", TODAY) == TODAY - datetime.timedelta(days=30)
+    assert parse_posted("2026-10-01T09:00:00Z", TODAY) == datetime.date(2026, 10, 1)
+    assert parse_posted("Dec 25", TODAY) == datetime.date(2025, 12, 25)
+    assert parse_posted("soon", TODAY) is None
+
+
+def test_search_sorts_on_the_parsed_posting_date(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    two_days_ago = (datetime.date.today() - datetime.timedelta(days=2)).isoformat()
+    ingest([
+        {"url": "https://example.com/old", "title": "Analyst", "description": "old", "posted": "9 days ago"},
+        {"url": "https://example.com/new", "title": "Analyst", "description": "new", "posted": two_days_ago},
+        {"url": "https://example.com/none", "title": "Analyst", "description": "none", "posted": "soon"},
+    ], store)
+
+    assert [job["url"].rsplit("/", 1)[1] for job in store.search()] == ["new", "old", "none"]
+
+
+def test_existing_store_gets_posted_at(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE jobs (id INTEGER PRIMARY KEY, url TEXT UNIQUE NOT NULL, content_hash TEXT UNIQUE NOT NULL,
+                           title TEXT NOT NULL, title_norm TEXT NOT NULL, company TEXT, company_norm TEXT,
+                           location TEXT, location_norm TEXT, mode TEXT, description TEXT, posted TEXT,
+                           source TEXT, created REAL NOT NULL, updated REAL NOT NULL)
+    """)
+    seen = datetime.datetime(2026, 10, 10).timestamp()
+    conn.execute("INSERT INTO jobs VALUES (1, 'https://example.com/a', 'h', 'Analyst', 'analyst', '', '', '', '', "
+                 "'', '', '3 days ago', '', ?, ?)", (seen, seen))
+    conn.commit()
+    conn.close()
+
+    assert JobStore(path).search()[0]["posted_at"] == "2026-10-07"
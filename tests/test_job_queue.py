@@ -0,0 +1,56 @@
+import threading
+
+from job_queue import JobQueue, register_handler
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_queue(tmp_path, clock):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), clock=clock, maintenance_interval=150)
+
+
+def test_worker_requeues_a_dead_workers_job_while_running(tmp_path):
+    clock = FakeClock()
+    queue = make_queue(tmp_path, clock)
+    stop = threading.Event()
+
+    def handler(params, blob):
+        stop.set()
+        return {"ok": True}
+
+    register_handler("test-requeue", handler)
+    job_id = queue.submit("test-requeue")
+    queue.claim("dead-worker")
+    # The first pass finds nothing stale yet; the job stays with the dead worker
+    assert queue.maintain()
+    assert queue.get(job_id)["status"] == "running"
+
+    clock.now += 700
+    worker = threading.Thread(target=queue.work, args=("live-worker", stop, 0.01))
+    worker.start()
+    worker.join(5)
+    assert not worker.is_alive()
+    assert queue.get(job_id)["status"] == "done"
+
+
+def test_maintenance_purges_old_finished_jobs_on_schedule(tmp_path):
+    clock = FakeClock()
+    queue = make_queue(tmp_path, clock)
+    job_id = queue.submit("test-purge")
+    queue.claim("worker")
+    queue.complete(job_id, {"ok": True})
+
+    clock.now += 24 * 3600 + 1
+    assert queue.maintain()
+    assert queue.get(job_id) is None
+
+    # Not again until maintenance_interval has passed
+    assert not queue.maintain()
+    clock.now += 150
+    assert queue.maintain()
@@ -0,0 +1,35 @@
+import numpy as np
+
+from matching import VectorIndex
+
+
+def unit(dim, i):
+    vector = np.zeros(dim, dtype=np.float32)
+    vector[i] = 1.0
+    return vector
+
+
+def test_two_writers_never_share_rows(tmp_path):
+    path = str(tmp_path / "index")
+    first = VectorIndex(path, 8)
+    second = VectorIndex(path, 8)
+    first.add([("a", unit(8, 0), "h", {})])
+    second.add([("b", unit(8, 1), "h", {})])
+    first.add([("c", unit(8, 2), "h", {})])
+
+    reopened = VectorIndex(path, 8)
+    assert reopened.size == 3
+    for key, i in (("a", 0), ("b", 1), ("c", 2)):
+        assert np.allclose(reopened.vector(key), unit(8, i))
+    assert [key for key, _, _ in first.search(unit(8, 1), k=1)] == ["b"]
+
+
+def test_training_with_fewer_live_vectors_than_lists(tmp_path):
+    index = VectorIndex(str(tmp_path / "index"), 8, train_min=1)
+    index.add([(key, unit(8, i), "h", {}) for i, key in enumerate("abc")])
+    # Replacing leaves dead rows behind: size 6, three live vectors
+    index.add([(key, unit(8, i), "h2", {}) for i, key in enumerate("abc")])
+    index.train()
+
+    assert index.centroids is not None and len(index.centroids) == 3
+    assert [key for key, _, _ in index.search(unit(8, 2), k=1)] == ["c"]
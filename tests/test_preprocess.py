@@ -0,0 +1,66 @@
+import io
+
+import pytest
+from PIL import Image
+
+import preprocess
+from preprocess import preprocess_upload, UploadRejected
+
+
+def png(width, height):
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), "white").save(out, "PNG")
+    return out.getvalue()
+
+
+def test_pixel_limit_leaves_pillow_global_alone(monkeypatch):
+    before = Image.MAX_IMAGE_PIXELS
+    monkeypatch.setattr(preprocess, "MAX_IMAGE_PIXELS", 100 * 100)
+    with pytest.raises(UploadRejected):
+        preprocess_upload(png(200, 200), "image/png")
+    with pytest.raises(UploadRejected):
+        preprocess._image(png(200, 200), "image/png", {})
+    assert Image.MAX_IMAGE_PIXELS == before
+
+
+def blank_pdf(pages):
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(612, 792)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def test_long_pdf_is_parsed_once_and_reports_trimmed_pages(monkeypatch):
+    import pypdf
+    from preprocess import check_upload, PDF_KEEP_PAGES
+    from text_extraction import prepare_payload
+
+    parsed = []
+    original = pypdf.PdfReader.__init__
+
+    def counting_init(self, *args, **kwargs):
+        parsed.append(1)
+        original(self, *args, **kwargs)
+
+    monkeypatch.setattr(pypdf.PdfReader, "__init__", counting_init)
+    data = blank_pdf(PDF_KEEP_PAGES + 3)
+    pdf = check_upload(data, "application/pdf")
+    trimmed, mime_type, stats = preprocess_upload(data, "application/pdf", pdf)
+    payload = prepare_payload(trimmed, mime_type, pdf.pages[:stats["pages_after"]])
+
+    assert len(parsed) == 1
+    assert stats["trimmed_pages"] == 3
+    assert payload["stats"]["pages"] == PDF_KEEP_PAGES
+
+
+def test_analysis_result_flags_trimmed_pdf():
+    from gemini_backend import _parse_analysis
+
+    class Response:
+        text = '{"name": "A", "score": 70}'
+
+    assert _parse_analysis(Response(), {"trimmed_pages": 3})["trimmedPages"] == 3
+    assert "trimmedPages" not in _parse_analysis(Response(), {"trimmed_pages": 0})
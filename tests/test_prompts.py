@@ -0,0 +1,75 @@
+import pytest
+
+import prompts
+from prompts import ContextCache, Prompt, estimate_tokens
+
+
+class FakeTime:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+class FakeCaches:
+    def __init__(self, fail=False):
+        self.created = []
+        self.fail = fail
+
+    def create(self, model, config):
+        if self.fail:
+            raise RuntimeError("quota")
+        self.created.append((model, config))
+
+        class Cache:
+            name = f"cachedContents/{len(self.created)}"
+        return Cache
+
+
+class FakeClient:
+    def __init__(self, fail=False):
+        self.caches = FakeCaches(fail)
+
+
+LONG = Prompt("long_test", 1, instructions="Rate the resume carefully. " * 400)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(prompts, "time", fake)
+    return fake
+
+
+def test_long_prompt_is_cached_reused_and_renewed(clock):
+    assert estimate_tokens(LONG.instructions) >= 1024
+    cache = ContextCache(enabled=True, ttl=600, min_tokens=1024)
+    client = FakeClient()
+
+    assert cache.name_for(LONG, "model", client) == "cachedContents/1"
+    model, config = client.caches.created[0]
+    assert model == "model"
+    assert config.display_name == LONG.key
+    assert config.system_instruction == LONG.instructions
+    assert config.ttl == "600s"
+
+    clock.now += 500
+    assert cache.name_for(LONG, "model", client) == "cachedContents/1"
+    # Renewed a minute before the provider would expire it
+    clock.now += 41
+    assert cache.name_for(LONG, "model", client) == "cachedContents/2"
+    assert cache.snapshot() == {"created": 2, "reused": 1, "too_small": 0, "errors": 0, "active": 1}
+
+
+def test_failed_create_falls_back_for_a_while(clock):
+    cache = ContextCache(enabled=True, ttl=600, min_tokens=1024)
+    client = FakeClient(fail=True)
+
+    assert cache.name_for(LONG, "model", client) is None
+    assert cache.name_for(LONG, "model", client) is None
+    assert cache.snapshot()["errors"] == 1
+
+    client.caches.fail = False
+    clock.now += 301
+    assert cache.name_for(LONG, "model", client) == "cachedContents/1"
@@ -0,0 +1,50 @@
+import time
+import asyncio
+
+import pytest
+
+from scheduler import RequestScheduler, CircuitBreaker
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def half_open_scheduler():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.state == "half-open"
+    return RequestScheduler(breaker=breaker, tenant_rpm=0, tenant_tpm=0)
+
+
+def test_cancelled_async_trial_frees_the_breaker():
+    scheduler = half_open_scheduler()
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def ok():
+        return "ok"
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(scheduler.call_async(slow), 0.05)
+        assert scheduler.breaker.state == "half-open"
+        return await scheduler.call_async(ok)
+
+    assert asyncio.run(main()) == "ok"
+    assert scheduler.breaker.state == "closed"
+
+
+def test_interrupted_sync_trial_frees_the_breaker():
+    scheduler = half_open_scheduler()
+
+    def interrupted():
+        raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        scheduler.call(interrupted)
+    assert scheduler.breaker.state == "half-open"
+    assert scheduler.call(lambda: "ok") == "ok"
+    assert scheduler.breaker.state == "closed"
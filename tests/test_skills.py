@@ -0,0 +1,13 @@
+from skills import normalize_skills
+
+
+def test_conjunctions_inside_one_skill_stay_whole():
+    assert normalize_skills(["R&D"]) == ["R&D"]
+    assert normalize_skills(["Research and Development"]) == ["Research and Development"]
+    assert normalize_skills(["Pen and paper"]) == ["Pen and paper"]
+
+
+def test_conjunctions_of_known_skills_split():
+    assert normalize_skills(["AWS & Docker"]) == ["AWS", "Docker"]
+    assert normalize_skills(["proficient in Python and SQL"]) == ["Python", "SQL"]
+    assert normalize_skills(["ML (TensorFlow, PyTorch)"]) == ["Machine Learning", "TensorFlow", "PyTorch"]
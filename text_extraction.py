@@ -0,0 +1,115 @@
+import io
+import time
+import threading
+from collections import deque
+
+# Gemini bills a PDF page or an image at about 258 tokens regardless of content
+TOKENS_PER_PAGE = 258
+# Fewer characters than this on a page means it is a scan / image-only page
+MIN_PAGE_CHARS = 40
+
+
+def estimate_text_tokens(text):
+    return len(text) // 4
+
+
+def _pdf_pages(file_bytes):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return None
+    return PdfReader(io.BytesIO(file_bytes))
+
+
+def prepare_payload(file_bytes, mime_type, parsed_pages=None):
+    """
+    Pulls text out of text-layer PDFs so the model gets compact text instead of
+    the whole document. Image-only pages (scans) are kept as a smaller PDF
+    containing just those pages. Images and unreadable PDFs are sent as-is.
+    parsed_pages: this PDF's pypdf pages if already parsed, so it is not parsed again.
+
+    Returns a dict: text, file_bytes (None if nothing binary is left),
+    mime_type and stats (bytes / estimated tokens before and after).
+    """
+    started = time.perf_counter()
+    payload = {"text": "", "file_bytes": file_bytes, "mime_type": mime_type}
+    pages = 1
+    text_pages = 0
+
+    if mime_type == "application/pdf":
+        if parsed_pages is None:
+            try:
+                reader = _pdf_pages(file_bytes)
+                parsed_pages = reader.pages if reader is not None else None
+            except Exception as e:
+                print(f"Error reading PDF, sending raw bytes: {e}")
+        if parsed_pages is not None:
+            pages = len(parsed_pages)
+            texts = []
+            image_pages = []
+            for index, page in enumerate(parsed_pages):
+                page_text = (page.extract_text() or "").strip()
+                if len(page_text) >= MIN_PAGE_CHARS:
+                    texts.append(f"--- Page {index + 1} ---\n{page_text}")
+                else:
+                    image_pages.append(page)
+            text_pages = len(texts)
+
+            if texts:
+                payload["text"] = "\n\n".join(texts)
+                if not image_pages:
+                    payload["file_bytes"] = None
+                else:
+                    from pypdf import PdfWriter
+                    writer = PdfWriter()
+                    for page in image_pages:
+                        writer.add_page(page)
+                    out = io.BytesIO()
+                    writer.write(out)
+                    payload["file_bytes"] = out.getvalue()
+
+    sent_bytes = len(payload["text"].encode("utf-8")) + len(payload["file_bytes"] or b"")
+    tokens_before = TOKENS_PER_PAGE * pages
+    tokens_after = estimate_text_tokens(payload["text"]) + TOKENS_PER_PAGE * (pages - text_pages if payload["file_bytes"] else 0)
+    payload["stats"] = {
+        "original_bytes": len(file_bytes),
+        "sent_bytes": sent_bytes,
+        "bytes_saved": len(file_bytes) - sent_bytes,
+        "pages": pages,
+        "text_pages": text_pages,
+        "est_tokens_before": tokens_before,
+        "est_tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+        "extract_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    payload_log.record(payload["stats"])
+    return payload
+
+
+class PayloadLog:
+    """
+    Keeps the last few per-call payload stats plus running totals.
+    """
+
+    def __init__(self, size=100):
+        self.recent = deque(maxlen=size)
+        self.totals = {"calls": 0, "bytes_saved": 0, "tokens_saved": 0}
+        self._lock = threading.Lock()
+
+    def record(self, stats):
+        with self._lock:
+            self.recent.append(stats)
+            self.totals["calls"] += 1
+            self.totals["bytes_saved"] += stats["bytes_saved"]
+            self.totals["tokens_saved"] += stats["tokens_saved"]
+
+    def last(self):
+        with self._lock:
+            return self.recent[-1] if self.recent else None
+
+    def summary(self):
+        with self._lock:
+            return dict(self.totals)
+
+
+payload_log = PayloadLog()